@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the memory allocated by repeated calls of the batched models with and without preallocated output and
+scratch buffers (see pyrism.models.batch.Workspace, asv style). Run this file directly for a quick measurement without
+asv.
+"""
+from __future__ import division, print_function
+
+import timeit
+
+import numpy as np
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2.7, the benchmarks are skipped by the runner (see setup)
+    tracemalloc = None
+
+from pyrism.models import batch, PROSAILFunction, Workspace
+
+
+def traced(func):
+    """Peak memory in bytes which is allocated during a call of func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class TrackAllocations(object):
+    params = ([1, 64], [False, True])
+    param_names = ['n_samples', 'workspace']
+    unit = 'bytes'
+
+    def setup(self, n_samples, workspace):
+        if tracemalloc is None:
+            raise NotImplementedError("tracemalloc is not available")
+
+        random = np.random.RandomState(0)
+        self.states = np.column_stack([random.uniform(1, 2.5, n_samples), random.uniform(10, 80, n_samples),
+                                       random.uniform(0.5, 6, n_samples), random.uniform(0, 1, n_samples)])
+        self.func = PROSAILFunction(30, 20, 10, names=('N', 'Cab', 'lai', 'moisture'),
+                                    fixed=dict(Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, hotspot=0.1, reflectance=0.2))
+
+        self.workspace = Workspace() if workspace else None
+        self.out = np.empty((n_samples, 2101)) if workspace else None
+
+        # The buffers are allocated in the first calls
+        self.leaf = batch.prospect(self.states[:, 0], self.states[:, 1], 8., 0.0, 0.01, 0.009,
+                                   workspace=self.workspace)
+        self.func(self.states, out=self.out, workspace=self.workspace)
+
+    def track_prospect(self, n_samples, workspace):
+        return traced(lambda: batch.prospect(self.states[:, 0], self.states[:, 1], 8., 0.0, 0.01, 0.009,
+                                             out=self.leaf if workspace else None, workspace=self.workspace))
+
+    def track_prosail(self, n_samples, workspace):
+        return traced(lambda: self.func(self.states, out=self.out, workspace=self.workspace))
+
+    def time_prosail(self, n_samples, workspace):
+        self.func(self.states, out=self.out, workspace=self.workspace)
+
+
+if __name__ == '__main__':
+    benchmark = TrackAllocations()
+
+    for n_samples in TrackAllocations.params[0]:
+        for workspace in TrackAllocations.params[1]:
+            benchmark.setup(n_samples, workspace)
+            seconds = min(timeit.repeat(lambda: benchmark.time_prosail(n_samples, workspace), number=10, repeat=3))
+            print("n_samples={0:>3} workspace={1!s:<5} PROSPECT {2:>10} bytes, PROSAIL {3:>10} bytes "
+                  "{4:10.6f} s".format(n_samples, workspace, benchmark.track_prospect(n_samples, workspace),
+                                       benchmark.track_prosail(n_samples, workspace), seconds / 10))
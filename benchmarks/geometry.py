@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the geometry preprocessing of pyrism.core.Kernel (asv style). Run this file directly for a quick
+measurement without asv.
+"""
+from __future__ import division, print_function
+
+import timeit
+
+import numpy as np
+
+from pyrism.core import Kernel
+
+
+class TimeKernelGeometry(object):
+    params = ([10 ** 3, 10 ** 5, 10 ** 7], ['DEG', 'RAD'], [False, True])
+    param_names = ['n_angles', 'angle_unit', 'normalize']
+    timeout = 300
+
+    def setup(self, n_angles, angle_unit, normalize):
+        scale = 60. if angle_unit == 'DEG' else np.radians(60.)
+        self.iza, self.vza, self.raa = np.random.RandomState(0).uniform(-scale, scale, (3, n_angles))
+
+    def time_kernel(self, n_angles, angle_unit, normalize):
+        Kernel(self.iza, self.vza, self.raa, normalize=normalize, angle_unit=angle_unit)
+
+    def time_kernel_degrees(self, n_angles, angle_unit, normalize):
+        Kernel(self.iza, self.vza, self.raa, normalize=normalize, angle_unit=angle_unit).raaDeg
+
+
+if __name__ == '__main__':
+    benchmark = TimeKernelGeometry()
+
+    for n_angles in TimeKernelGeometry.params[0]:
+        for angle_unit in TimeKernelGeometry.params[1]:
+            for normalize in TimeKernelGeometry.params[2]:
+                benchmark.setup(n_angles, angle_unit, normalize)
+                seconds = min(timeit.repeat(lambda: benchmark.time_kernel(n_angles, angle_unit, normalize),
+                                            number=1, repeat=3))
+                print("n_angles={0:>9} angle_unit={1} normalize={2!s:<5} {3:10.6f} s".format(
+                    n_angles, angle_unit, normalize, seconds))
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the optical models PROSPECT, LSM, LIDF, VolScatt and SAIL, of their batched versions, of SAIL.hemisphere
+and of the albedo over the number of angles, quadrature nodes, parameter samples and the length of a time series (asv
+style). Use benchmarks/run.py to store the results as JSON without asv.
+"""
+from __future__ import division, print_function
+
+import numpy as np
+
+from pyrism import PROSPECT, LSM, SAIL, VolScatt, LIDF
+from pyrism.models import batch, PROSAILFunction
+
+
+def samples(n_samples, seed=0):
+    """Random PROSAIL states with the columns N, Cab, lai and moisture."""
+    random = np.random.RandomState(seed)
+    return np.column_stack([random.uniform(1, 2.5, n_samples), random.uniform(10, 80, n_samples),
+                            random.uniform(0.5, 6, n_samples), random.uniform(0, 1, n_samples)])
+
+
+def angles(n_angles):
+    """Incidence angles in [DEG] between 10 and 60."""
+    return np.linspace(10., 60., n_angles)
+
+
+class TimePROSPECT(object):
+    params = ([1, 10, 100],)
+    param_names = ['n_samples']
+
+    def setup(self, n_samples):
+        self.states = samples(n_samples)
+
+    def time_prospect(self, n_samples):
+        for N, Cab, lai, moisture in self.states:
+            PROSPECT(N, Cab, 8., 0.0, 0.01, 0.009)
+
+    def time_batch_prospect(self, n_samples):
+        batch.prospect(self.states[:, 0], self.states[:, 1], 8., 0.0, 0.01, 0.009)
+
+
+class TimeLSM(object):
+    params = ([1, 10, 100, 1000],)
+    param_names = ['n_samples']
+
+    def setup(self, n_samples):
+        self.states = samples(n_samples)
+
+    def time_lsm(self, n_samples):
+        for N, Cab, lai, moisture in self.states:
+            LSM(0.2, moisture)
+
+    def time_batch_lsm(self, n_samples):
+        batch.lsm(0.2, self.states[:, 3])
+
+    def time_batch_lsm_bands(self, n_samples):
+        batch.lsm(0.2, self.states[:, 3], bands='L8')
+
+
+class TimeLIDF(object):
+    params = ([18, 90, 360],)
+    param_names = ['n_elements']
+
+    def setup(self, n_elements):
+        self.lza = np.linspace(0., 90., n_elements)
+
+    def time_campbell(self, n_elements):
+        LIDF.campbell(57, n_elements=n_elements)
+
+    def time_verhoef(self, n_elements):
+        LIDF.verhoef(-0.35, -0.15, n_elements=n_elements)
+
+    def time_nilson(self, n_elements):
+        LIDF.nilson(self.lza, mla=45, distribution='plagiophile')
+
+
+class TimeVolScatt(object):
+    params = ([1, 10, 100], ['campbell', 'verhoef', 'nilson', 'beta', 'measured'])
+    param_names = ['n_angles', 'lidf_type']
+
+    # parameters a and b of the registered distributions, 'measured' are the weights of 90 inclination angles
+    lidf_params = dict(campbell=dict(a=57), verhoef=dict(a=-0.35, b=-0.15), nilson=dict(a=45., b=0.5),
+                       beta=dict(a=1.101, b=1.930), measured=dict(lidf_type=LIDF.beta(1.101, 1.930, n_elements=90)))
+
+    def setup(self, n_angles, lidf_type):
+        self.iza = angles(n_angles)
+        self.kwargs = dict(lidf_type=lidf_type)
+        self.kwargs.update(self.lidf_params[lidf_type])
+
+    def time_coef(self, n_angles, lidf_type):
+        for iza in self.iza:
+            VolScatt(iza, 20, 10).coef(**self.kwargs)
+
+
+class TimeSAIL(object):
+    params = ([1, 10, 100],)
+    param_names = ['n_angles']
+
+    def setup(self, n_angles):
+        self.iza = angles(n_angles)
+        self.leaf = PROSPECT(1.5, 40., 8., 0.0, 0.01, 0.009)
+        self.soil = LSM(0.2, 0.3)
+
+    def time_sail(self, n_angles):
+        for iza in self.iza:
+            SAIL(iza, 20, 10, self.leaf.ks, self.leaf.kt, 3., 0.1, self.soil.ref)
+
+
+class TimeSAILHemisphere(object):
+    params = ([(9, 18), (18, 36)],)
+    param_names = ['grid']
+
+    def setup(self, grid):
+        self.leaf = PROSPECT(1.5, 40., 8., 0.0, 0.01, 0.009)
+        self.soil = LSM(0.2, 0.3)
+
+    def time_hemisphere(self, grid):
+        SAIL.hemisphere(30, grid[0], grid[1], self.leaf.ks, self.leaf.kt, 3., 0.1, self.soil.ref)
+
+    def time_single(self, grid):
+        SAIL(30, 20, 10, self.leaf.ks, self.leaf.kt, 3., 0.1, self.soil.ref)
+
+
+class TimeBatchSAIL(object):
+    params = ([1, 10, 100, 1000],)
+    param_names = ['n_samples']
+
+    def setup(self, n_samples):
+        self.states = samples(n_samples)
+        self.leaf = batch.prospect(self.states[:, 0], self.states[:, 1], 8., 0.0, 0.01, 0.009)
+        self.soil = LSM(0.2, 0.3)
+
+    def time_sail(self, n_samples):
+        batch.sail(30, 20, 10, self.leaf.ks, self.leaf.kt, self.states[:, 2], 0.1, self.soil.ref)
+
+
+class TimeAlbedo(object):
+    params = ([4, 8, 16],)
+    param_names = ['n_nodes']
+    timeout = 300
+
+    def setup(self, n_nodes):
+        self.leaf = PROSPECT(1.5, 40., 8., 0.0, 0.01, 0.009)
+        self.soil = LSM(0.2, 0.3)
+
+        # Gauss-Legendre nodes in cos(vza) and raa of batch.albedo
+        x, w = np.polynomial.legendre.leggauss(n_nodes)
+        mu, raa = 0.5 * (x + 1.), 0.5 * np.pi * (x + 1.)
+        self.vza, self.raa = np.degrees(np.arccos(mu)), np.degrees(raa)
+        self.weights = (2. / np.pi) * np.outer(mu * 0.5 * w, 0.5 * np.pi * w)
+
+    def time_albedo(self, n_nodes):
+        batch.albedo(30, self.leaf.ks, self.leaf.kt, 3., 0.1, self.soil.ref, n_vza=n_nodes, n_raa=n_nodes)
+
+    def time_loop(self, n_nodes):
+        black_sky = 0.
+        for i, vza in enumerate(self.vza):
+            for j, raa in enumerate(self.raa):
+                black_sky += self.weights[i, j] * SAIL(30, vza, raa, self.leaf.ks, self.leaf.kt, 3., 0.1,
+                                                       self.soil.ref).BRF.ref
+
+
+class TimePROSAILSeries(object):
+    params = ([10, 100, 1000], [1, 4])
+    param_names = ['series_length', 'n_angles']
+    timeout = 300
+
+    def setup(self, series_length, n_angles):
+        self.states = samples(series_length)
+        self.functions = [PROSAILFunction(iza, 20, 10, names=('N', 'Cab', 'lai', 'moisture'),
+                                          fixed=dict(Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, hotspot=0.1,
+                                                     reflectance=0.2))
+                          for iza in angles(n_angles)]
+
+    def time_evaluate(self, series_length, n_angles):
+        for func in self.functions:
+            func.evaluate(self.states)
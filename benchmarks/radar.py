@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the radar models Rayleigh, Mie, DielConstant, I2EM, I2EM.Emissivity, I2EM.hemisphere and of the I2EM
+lookup table over the number of angles, parameter samples, pixels and the length of a time series (asv style). Use
+benchmarks/run.py to store the results as JSON without asv.
+"""
+from __future__ import division, print_function
+
+import numpy as np
+
+from pyrism import Rayleigh, Mie, DielConstant, I2EM
+from pyrism.emulate import I2EMTable
+from pyrism.models import I2EMFunction
+
+
+def angles(n_angles):
+    """Incidence angles in [DEG] between 10 and 60."""
+    return np.linspace(10., 60., n_angles)
+
+
+class TimeScattering(object):
+    params = ([1, 100, 10000],)
+    param_names = ['n_samples']
+
+    def setup(self, n_samples):
+        self.particle_size = np.linspace(0.01, 0.1, n_samples)
+
+    def time_rayleigh(self, n_samples):
+        Rayleigh(1.26, self.particle_size, 10 + 1j)
+
+    def time_mie(self, n_samples):
+        Mie(1.26, self.particle_size, 10 + 1j)
+
+
+class TimeDielConstant(object):
+    params = ([1, 100, 10000],)
+    param_names = ['n_samples']
+
+    def setup(self, n_samples):
+        self.frequency = np.linspace(1., 10., n_samples)
+
+    def time_water(self, n_samples):
+        DielConstant.water(self.frequency, 20.)
+
+    def time_saline_water(self, n_samples):
+        DielConstant.saline_water(self.frequency, 20., 5.)
+
+    def time_soil(self, n_samples):
+        DielConstant.soil(self.frequency, 20., 0.4, 0.3, 0.2)
+
+    def time_vegetation(self, n_samples):
+        DielConstant.vegetation(self.frequency, 0.3)
+
+    def time_combine(self, n_samples):
+        DielConstant.combine(self.frequency, 0.3, 20., 0.4, 0.3, 0.2)
+
+
+class TimeI2EM(object):
+    params = ([1, 8, 32], ['exponential', 'gaussian'])
+    param_names = ['n_angles', 'corrfunc']
+    timeout = 300
+
+    def setup(self, n_angles, corrfunc):
+        self.iza = angles(n_angles)
+
+    def time_i2em(self, n_angles, corrfunc):
+        I2EM(self.iza, self.iza, 0., frequency=1.26, diel_constant=10 + 1j, corrlength=10., sigma=0.3,
+             corrfunc=corrfunc)
+
+    def time_i2em_monostatic(self, n_angles, corrfunc):
+        I2EM(self.iza, self.iza, 180., frequency=1.26, diel_constant=10 + 1j, corrlength=10., sigma=0.3,
+             corrfunc=corrfunc, monostatic=True)
+
+
+class TimeI2EMMonostatic(object):
+    # The monostatic mode against the general model at the backscatter geometry for many incidence angles
+    params = ([32, 256],)
+    param_names = ['n_angles']
+    timeout = 300
+
+    def setup(self, n_angles):
+        self.iza = angles(n_angles)
+
+    def time_general(self, n_angles):
+        I2EM(self.iza, self.iza, 180., frequency=5.4, diel_constant=12 - 2j, corrlength=5., sigma=2.)
+
+    def time_monostatic(self, n_angles):
+        I2EM(self.iza, None, None, frequency=5.4, diel_constant=12 - 2j, corrlength=5., sigma=2., monostatic=True)
+
+
+class TimeI2EMHemisphere(object):
+    params = ([(9, 18), (18, 36)],)
+    param_names = ['grid']
+    timeout = 300
+
+    def time_hemisphere(self, grid):
+        I2EM.hemisphere(35., grid[0], grid[1], frequency=1.26, diel_constant=10 + 1j, corrlength=10., sigma=0.3)
+
+    def time_single(self, grid):
+        I2EM(35., 20., 10., frequency=1.26, diel_constant=10 + 1j, corrlength=10., sigma=0.3)
+
+
+class TimeEmissivity(object):
+    params = ([1, 2],)
+    param_names = ['n_angles']
+    timeout = 300
+
+    def setup(self, n_angles):
+        self.iza = angles(n_angles)
+
+    def time_emissivity(self, n_angles):
+        for iza in self.iza:
+            I2EM.Emissivity(iza, iza, 0.)
+
+
+class TimeI2EMSeries(object):
+    params = ([4, 16, 64], [1, 4])
+    param_names = ['series_length', 'n_angles']
+    timeout = 300
+
+    def setup(self, series_length, n_angles):
+        random = np.random.RandomState(0)
+        self.states = np.column_stack([random.uniform(5, 25, series_length), random.uniform(0.5, 5, series_length)])
+        self.func = I2EMFunction(angles(n_angles), angles(n_angles), 0., names=('eps_real', 'eps_imag'),
+                                 fixed=dict(frequency=1.26, corrlength=10., sigma=0.3))
+
+    def time_evaluate(self, series_length, n_angles):
+        self.func.evaluate(self.states)
+
+
+class TimeI2EMTable(object):
+    params = ([10000, 1000000],)
+    param_names = ['n_pixels']
+    timeout = 300
+
+    def setup(self, n_pixels):
+        self.table = I2EMTable.build(angles(11), np.linspace(3, 30, 5), np.linspace(0.5, 5, 4),
+                                     np.linspace(0.1, 1.5, 5), np.linspace(2, 15, 5))
+
+        random = np.random.RandomState(0)
+        bounds = np.array([(axis[0], axis[-1]) for axis in self.table.axes])
+        self.pixels = bounds[:, 0] + random.random_sample((n_pixels, len(bounds))) * (bounds[:, 1] - bounds[:, 0])
+
+    def time_interpolate(self, n_pixels):
+        self.table.interpolate(self.pixels)
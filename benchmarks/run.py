@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+Runner of the asv style benchmarks without asv.
+
+The benchmark classes of all modules in this directory are collected, every parameter combination is set up and timed
+with timeit (methods time_*) or measured (methods track_*). The results are stored as JSON together with the commit
+and a description of the machine, so that two commits can be compared on the same box:
+
+    python -m benchmarks.run -o before.json
+    git checkout <other commit>
+    python -m benchmarks.run -o after.json --compare before.json
+
+Options are described by ``python -m benchmarks.run --help``.
+"""
+from __future__ import division, print_function
+
+import argparse
+import datetime
+import importlib
+import inspect
+import itertools
+import json
+import multiprocessing
+import os
+import pkgutil
+import platform
+import re
+import subprocess
+import sys
+import timeit
+
+import numpy as np
+
+DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def git(*args):
+    """Output of a git command in the repository or None if git is not available."""
+    try:
+        with open(os.devnull, 'w') as devnull:
+            return subprocess.check_output(('git',) + args, cwd=DIRECTORY, stderr=devnull).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Commit, machine and library versions of the current run."""
+    status = git('status', '--porcelain', '--untracked-files=no')
+
+    return dict(commit=git('rev-parse', 'HEAD'), dirty=bool(status) if status is not None else None,
+                date=datetime.datetime.utcnow().isoformat() + 'Z', machine=platform.node(),
+                platform=platform.platform(), processor=platform.processor(), cpu_count=multiprocessing.cpu_count(),
+                python=platform.python_version(), numpy=np.__version__)
+
+
+def collect(pattern=None):
+    """
+    Benchmarks of all modules in this directory.
+
+    Parameters
+    ----------
+    pattern : str, optional
+        Regular expression which is searched in the names 'module.Class.method'.
+
+    Returns
+    -------
+    benchmarks : list of tuple
+        Name, class and method name of each benchmark.
+    """
+    benchmarks = []
+
+    for _, module_name, _ in pkgutil.iter_modules([DIRECTORY]):
+        if module_name == 'run':
+            continue
+
+        module = importlib.import_module('benchmarks.' + module_name)
+
+        for class_name, cls in sorted(vars(module).items()):
+            if not inspect.isclass(cls) or cls.__module__ != module.__name__:
+                continue
+
+            for method in sorted(vars(cls)):
+                if method.startswith(('time_', 'track_')):
+                    name = '.'.join((module_name, class_name, method))
+
+                    if pattern is None or re.search(pattern, name):
+                        benchmarks.append((name, cls, method))
+
+    return benchmarks
+
+
+def measure(cls, method, params, repeat=5, min_time=0.1):
+    """
+    Time or track one benchmark for one parameter combination.
+
+    The number of calls per repeat is chosen such that a repeat takes at least `min_time` seconds. A single call
+    which exceeds the timeout of the benchmark class (default 60 s) is not repeated.
+
+    Returns
+    -------
+    result : dict or None
+        None if the setup raises NotImplementedError (the combination is skipped like in asv).
+    """
+    instance = cls()
+
+    try:
+        if hasattr(instance, 'setup'):
+            instance.setup(*params)
+    except NotImplementedError:
+        return None
+
+    try:
+        func = getattr(instance, method)
+
+        if method.startswith('track_'):
+            return dict(value=func(*params), unit=getattr(cls, 'unit', 'unit'))
+
+        first = timeit.timeit(lambda: func(*params), number=1)
+
+        if first > getattr(cls, 'timeout', 60.):
+            samples, number = [first], 1
+        else:
+            number = max(1, int(min_time / first)) if first > 0 else 1
+            samples = [seconds / number for seconds in timeit.repeat(lambda: func(*params), number=number,
+                                                                      repeat=repeat)]
+
+        return dict(min=min(samples), median=float(np.median(samples)), number=number, repeat=len(samples),
+                    unit='seconds')
+    finally:
+        if hasattr(instance, 'teardown'):
+            instance.teardown(*params)
+
+
+def run(pattern=None, repeat=5, min_time=0.1, verbose=True):
+    """
+    Run the benchmarks.
+
+    Parameters
+    ----------
+    pattern : str, optional
+        See collect.
+    repeat : int, optional
+        Number of timed repeats. Default is 5.
+    min_time : float, optional
+        Minimal duration of a repeat in seconds. Default is 0.1.
+    verbose : bool, optional
+        Print each result.
+
+    Returns
+    -------
+    results : dict
+        Environment (see environment) and 'results', which maps the benchmark names to a list with one entry per
+        parameter combination.
+    """
+    results = {}
+
+    for name, cls, method in collect(pattern):
+        params = getattr(cls, 'params', ())
+        names = getattr(cls, 'param_names', [])
+
+        # asv accepts a single parameter list without enclosing tuple
+        if params and not isinstance(params[0], (list, tuple)):
+            params = (params,)
+
+        entries = results[name] = []
+
+        for combination in itertools.product(*params):
+            result = measure(cls, method, combination, repeat, min_time)
+
+            if result is None:
+                continue
+
+            result['params'] = dict(zip(names, combination))
+            entries.append(result)
+
+            if verbose:
+                print(format_entry(name, result))
+
+    document = environment()
+    document['results'] = results
+
+    return document
+
+
+def format_entry(name, entry):
+    params = ' '.join('{0}={1}'.format(key, value) for key, value in sorted(entry['params'].items()))
+
+    if entry['unit'] == 'seconds':
+        return '{0:<45} {1:<35} {2:12.6f} s'.format(name, params, entry['min'])
+
+    return '{0:<45} {1:<35} {2:>12} {3}'.format(name, params, entry['value'], entry['unit'])
+
+
+def compare(baseline, current, factor=1.1):
+    """
+    Compare two results of run.
+
+    Parameters
+    ----------
+    baseline, current : dict
+        Results of run (e.g. loaded from the JSON files).
+    factor : float, optional
+        Ratio current / baseline of the fastest repeat above which a benchmark is a regression. Default is 1.1.
+
+    Returns
+    -------
+    rows : list of tuple
+        Name, parameters, baseline, current and ratio of each benchmark which is in both results.
+    regressions : list of tuple
+        The rows with a ratio above factor.
+    """
+    def values(document):
+        return dict(((name, json.dumps(entry['params'], sort_keys=True)), entry.get('min', entry.get('value')))
+                    for name, entries in document['results'].items() for entry in entries)
+
+    before, after = values(baseline), values(current)
+    rows = []
+
+    for key in sorted(set(before) & set(after)):
+        ratio = after[key] / before[key] if before[key] else np.inf if after[key] else 1.
+        rows.append(key + (before[key], after[key], ratio))
+
+    return rows, [row for row in rows if row[-1] > factor]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the pyrism benchmarks and store the results as JSON.")
+    parser.add_argument('-o', '--output', help="JSON file of the results. Default is benchmarks/results/<commit>.json")
+    parser.add_argument('-b', '--bench', help="Regular expression of the benchmarks to run (module.Class.method)")
+    parser.add_argument('--repeat', type=int, default=5, help="Number of timed repeats (default 5)")
+    parser.add_argument('--min-time', type=float, default=0.1,
+                        help="Minimal duration of a repeat in seconds (default 0.1)")
+    parser.add_argument('--compare', metavar='BASELINE', help="JSON file of a previous run to compare with")
+    parser.add_argument('--factor', type=float, default=1.1,
+                        help="Slow down factor which counts as a regression in the comparison (default 1.1)")
+    args = parser.parse_args(argv)
+
+    document = run(args.bench, args.repeat, args.min_time)
+
+    output = args.output
+    if output is None:
+        output = os.path.join(DIRECTORY, 'results', '{}.json'.format((document['commit'] or 'unknown')[:12]))
+
+    if os.path.dirname(output) and not os.path.isdir(os.path.dirname(output)):
+        os.makedirs(os.path.dirname(output))
+
+    with open(output, 'w') as stream:
+        json.dump(document, stream, indent=1, sort_keys=True)
+
+    print("Results are stored in {}".format(output))
+
+    if args.compare is None:
+        return 0
+
+    with open(args.compare) as stream:
+        baseline = json.load(stream)
+
+    rows, regressions = compare(baseline, document, args.factor)
+
+    print("\nComparison with {0} ({1})".format(args.compare, baseline.get('commit')))
+    for name, params, before, after, ratio in rows:
+        marker = '!' if ratio > args.factor else ' '
+        print("{0} {1:<45} {2:<45} {3:12.6g} {4:12.6g} {5:6.2f}".format(marker, name, params, before, after, ratio))
+
+    print("{0} of {1} benchmarks are slower than {2} times the baseline".format(len(regressions), len(rows),
+                                                                                args.factor))
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+from .persistent import PersistentCache
+from .lru import (LRUCache, Memoized, memoize, freeze, nbytes)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import functools
+import hashlib
+import sys
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'hit_rate', 'entries', 'nbytes', 'max_bytes'])
+
+
+def freeze(value):
+    """
+    Hashable key of a (nested) model input. Arrays are represented by their dtype, shape and a SHA-1 digest of their
+    content, so that equal arrays give equal keys regardless of their identity.
+
+    Parameters
+    ----------
+    value : object
+        Scalar, ndarray, list, tuple, dict or any hashable object.
+
+    Returns
+    -------
+    key : tuple or object
+    """
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("Arrays with object dtype can not be hashed by content")
+
+        digest = hashlib.sha1(np.ascontiguousarray(value).view(np.uint8)).hexdigest()
+        return 'ndarray', value.dtype.str, value.shape, digest
+
+    if isinstance(value, np.generic):
+        return value.dtype.str, value.item()
+
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(freeze(item) for item in value)
+
+    if isinstance(value, dict):
+        return ('dict',) + tuple(sorted((key, freeze(item)) for key, item in value.items()))
+
+    hash(value)
+    return value
+
+
+def nbytes(value, depth=3):
+    """
+    Approximate memory of a cached value in bytes. The arrays of tuples, lists, dicts and instance attributes (e.g.
+    of a model instance) are counted up to a nesting depth of `depth`.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+
+    size = sys.getsizeof(value)
+
+    if depth > 0:
+        if isinstance(value, (list, tuple)):
+            size += sum(nbytes(item, depth - 1) for item in value)
+        elif isinstance(value, dict):
+            size += sum(nbytes(item, depth - 1) for item in value.values())
+        elif hasattr(value, '__dict__'):
+            size += sum(nbytes(item, depth - 1) for item in vars(value).values())
+
+    return size
+
+
+class LRUCache(object):
+    """
+    In-process cache with least recently used eviction bounded by the memory of the stored values.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Maximal memory of the stored values in bytes (see nbytes). Default is 128 MB.
+    max_entries : int or None, optional
+        Maximal number of entries. Default is None (unbounded).
+
+    Returns
+    -------
+    All returns are attributes!
+    hits, misses : int
+        Number of successful and failed look ups.
+    nbytes : int
+        Memory of the stored values in bytes.
+
+    See Also
+    --------
+    memoize
+    """
+
+    def __init__(self, max_bytes=2 ** 27, max_entries=None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+        self.__entries = OrderedDict()
+
+    def get(self, key, default=None):
+        """Look up a key and mark it as most recently used."""
+        try:
+            value, size = self.__entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.__entries[key] = (value, size)
+        self.hits += 1
+
+        return value
+
+    def put(self, key, value):
+        """Store a value and evict the least recently used entries if the cache is full."""
+        if key in self.__entries:
+            self.nbytes -= self.__entries.pop(key)[1]
+
+        size = nbytes(value)
+
+        # Values which are larger than the cache are not stored
+        if size > self.max_bytes:
+            return
+
+        self.__entries[key] = (value, size)
+        self.nbytes += size
+
+        while self.nbytes > self.max_bytes or (self.max_entries is not None and
+                                               len(self.__entries) > self.max_entries):
+            self.nbytes -= self.__entries.popitem(last=False)[1][1]
+
+    def clear(self):
+        """Remove all entries and reset the statistics."""
+        self.__entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.nbytes = 0
+
+    def info(self):
+        """
+        Statistics of the cache.
+
+        Returns
+        -------
+        CacheInfo
+            Named tuple with hits, misses, hit_rate, entries, nbytes and max_bytes.
+        """
+        calls = self.hits + self.misses
+        return CacheInfo(self.hits, self.misses, self.hits / calls if calls else 0., len(self.__entries),
+                         self.nbytes, self.max_bytes)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+
+class Memoized(object):
+    """
+    Model or function with an LRU cache of its results (see memoize).
+
+    Returns
+    -------
+    All returns are attributes!
+    cache : LRUCache
+        Cache of the results.
+    """
+
+    def __init__(self, func, cache):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.cache = cache
+
+    def __call__(self, *args, **kwargs):
+        key = freeze((args, kwargs))
+        result = self.cache.get(key, self)
+
+        if result is self:
+            result = self.func(*args, **kwargs)
+            self.cache.put(key, result)
+
+        return result
+
+    def info(self):
+        """Statistics of the cache (see LRUCache.info)."""
+        return self.cache.info()
+
+    def clear(self):
+        """Remove all cached results."""
+        self.cache.clear()
+
+
+def memoize(func=None, max_bytes=2 ** 27, max_entries=None, cache=None):
+    """
+    Cache the results of a model or function for repeated inputs.
+
+    The inputs are hashed with freeze, thus arrays are compared by content. The cached results are returned as they
+    are (e.g. the same PROSPECT instance for the same parameters) and must not be modified.
+
+    Parameters
+    ----------
+    func : callable, optional
+        Model class (e.g. PROSPECT, SAIL, I2EM or Mie) or function. If None, a decorator is returned.
+    max_bytes, max_entries :
+        See LRUCache.
+    cache : LRUCache, optional
+        Cache which is shared with other memoized models. If None, a new LRUCache is created.
+
+    Returns
+    -------
+    Memoized
+
+    Examples
+    --------
+    >>> from pyrism import PROSPECT
+    >>> from pyrism.cache import memoize
+    >>> prospect = memoize(PROSPECT)
+    >>> leaf = prospect(N=1.5, Cab=40, Cxc=8, Cbr=0, Cw=0.01, Cm=0.009)
+    >>> leaf is prospect(N=1.5, Cab=40, Cxc=8, Cbr=0, Cw=0.01, Cm=0.009)
+    True
+    >>> prospect.info().hits
+    1
+    """
+    if func is None:
+        return functools.partial(memoize, max_bytes=max_bytes, max_entries=max_entries, cache=cache)
+
+    return Memoized(func, cache if cache is not None else LRUCache(max_bytes, max_entries))
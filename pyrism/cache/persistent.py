@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import io
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+
+class PersistentCache(object):
+    """
+    Persistent cache of numpy arrays in a sqlite database.
+
+    The cache is meant for expensive intermediate results which only depend on a few scalar inputs (e.g. the slope
+    averaged reflection coefficients of I2EM). The keys are built from the inputs rounded to `digits` significant
+    digits (see key). The database is opened in WAL mode with a busy timeout, so that several processes (e.g. the
+    workers of the batch runner or restarted batch jobs) can read and write the same file concurrently. Each process
+    opens its own connection, thus instances can be pickled.
+
+    If the stored values exceed `max_bytes`, the least recently used entries are evicted until the cache is below
+    90 % of `max_bytes`.
+
+    Parameters
+    ----------
+    filename : str
+        File name of the sqlite database. The file is created if it does not exist.
+    max_bytes : int, optional
+        Maximal size of the stored values in bytes. Default is 256 MB.
+    digits : int, optional
+        Number of significant digits of the inputs in the keys. Default is 10.
+    timeout : float, optional
+        Seconds to wait for the lock of a concurrent writer. Default is 60.
+
+    Returns
+    -------
+    All returns are attributes!
+    hits, misses : int
+        Number of successful and failed look ups in the current process.
+
+    See Also
+    --------
+    PersistentCache.key
+    PersistentCache.get
+    PersistentCache.put
+    """
+
+    def __init__(self, filename, max_bytes=2 ** 28, digits=10, timeout=60.):
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.digits = digits
+        self.timeout = timeout
+
+        self.hits = 0
+        self.misses = 0
+
+        self.__connection = None
+        self.__pid = None
+        self.__connect()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state['_PersistentCache__connection'] = None
+        state['_PersistentCache__pid'] = None
+
+        return state
+
+    def __connect(self):
+        if self.__connection is None or self.__pid != os.getpid():
+            connection = sqlite3.connect(self.filename, timeout=self.timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+
+            connection.execute("BEGIN IMMEDIATE")
+            connection.execute("CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                               "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+            connection.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            connection.execute("CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY, bytes INTEGER NOT NULL)")
+            connection.execute("INSERT OR IGNORE INTO meta (id, bytes) VALUES (0, 0)")
+            connection.execute("COMMIT")
+
+            self.__connection = connection
+            self.__pid = os.getpid()
+
+        return self.__connection
+
+    def key(self, namespace, *values):
+        """
+        Key of rounded inputs.
+
+        Parameters
+        ----------
+        namespace : str
+            Name of the cached quantity (and version of its calculation).
+        values : int, float or complex
+            Inputs. Complex values are split in to their real and imaginary part.
+
+        Returns
+        -------
+        key : str
+        """
+        parts = [namespace]
+
+        for value in values:
+            for item in np.atleast_1d(value).ravel():
+                if np.iscomplexobj(item):
+                    parts.extend(['{0:.{1}g}'.format(float(np.real(item)), self.digits),
+                                  '{0:.{1}g}'.format(float(np.imag(item)), self.digits)])
+                else:
+                    parts.append('{0:.{1}g}'.format(float(item), self.digits))
+
+        return '|'.join(parts)
+
+    def get(self, key):
+        """
+        Look up a value.
+
+        Parameters
+        ----------
+        key : str
+            Key (see key).
+
+        Returns
+        -------
+        value : ndarray or None
+            Stored array or None if the key is not in the cache.
+        """
+        connection = self.__connect()
+        row = connection.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        connection.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+
+        return np.load(io.BytesIO(row[0]), allow_pickle=False)
+
+    def put(self, key, value):
+        """
+        Store a value and evict the least recently used entries if the cache is full.
+
+        Parameters
+        ----------
+        key : str
+            Key (see key).
+        value : array_like
+            Numeric array.
+        """
+        buffer = io.BytesIO()
+        np.save(buffer, np.asarray(value), allow_pickle=False)
+        blob = buffer.getvalue()
+
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+
+        try:
+            row = connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            connection.execute("INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                               (key, sqlite3.Binary(blob), len(blob), time.time()))
+            connection.execute("UPDATE meta SET bytes = bytes + ? WHERE id = 0",
+                               (len(blob) - (row[0] if row is not None else 0),))
+
+            self.__evict(connection)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    def __evict(self, connection):
+        nbytes = connection.execute("SELECT bytes FROM meta WHERE id = 0").fetchone()[0]
+
+        if nbytes <= self.max_bytes:
+            return
+
+        excess = nbytes - 0.9 * self.max_bytes
+        keys = []
+        freed = 0
+
+        for key, size in connection.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            keys.append(key)
+            freed += size
+
+            if freed >= excess:
+                break
+
+        connection.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+        connection.execute("UPDATE meta SET bytes = bytes - ? WHERE id = 0", (freed,))
+
+    def clear(self):
+        """Remove all entries."""
+        connection = self.__connect()
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("DELETE FROM entries")
+        connection.execute("UPDATE meta SET bytes = 0 WHERE id = 0")
+        connection.execute("COMMIT")
+
+    @property
+    def nbytes(self):
+        """Size of the stored values in bytes."""
+        return self.__connect().execute("SELECT bytes FROM meta WHERE id = 0").fetchone()[0]
+
+    def __len__(self):
+        return self.__connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def __contains__(self, key):
+        return self.__connect().execute("SELECT 1 FROM entries WHERE key = ?", (key,)).fetchone() is not None
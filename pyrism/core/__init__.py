@@ -1,3 +1,5 @@
-from ._core import Kernel, Scattering
-from .auxiliary import (ReflectanceResult, EmissivityResult, SailResult, BRF, BSC, BRDF, dB, sec,
-                        cot, rad, align_all, load_param, linear)
+from ._core import Kernel, Geometry, Scattering
+from .auxiliary import (ReflectanceResult, EmissivityResult, SailResult, SensitivityResult, InversionResult,
+                        ValidationResult, ProfileResult, AlbedoResult, BRF, BSC, BRDF, dB, sec, cot, rad, align_all,
+                        load_param, linear)
+from .parallel import (imap_blocks, imap_chunks, evaluate)
@@ -5,7 +5,7 @@ import sys
 
 import numpy as np
 
-from .auxiliary import (rad, deg, sec, align_all, asarrays)
+from .auxiliary import (deg, sec, asarrays)
 
 # python 3.6 comparability
 if sys.version_info < (3, 0):
@@ -14,14 +14,186 @@ else:
     srange = range
 
 
+class cached_property(object):
+    """Read-only attribute which is computed on first access and then stored in the instance."""
+
+    def __init__(self, func):
+        self.func = func
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = instance.__dict__[self.func.__name__] = self.func(instance)
+        return value
+
+
+class Geometry(object):
+    """
+    Acquisition geometry with precomputed trigonometric terms.
+
+    A Geometry can be passed to every model in place of iza (the arguments vza and raa are ignored in this case), so
+    that repeated model calls over a fixed geometry (e.g. a time series) share the angle preprocessing and all
+    trigonometric terms. The trigonometric terms are computed on first access.
+
+    Parameters
+    ----------
+    iza, vza, raa, normalize, nbar, angle_unit, align :
+        See Kernel. The normalization (normalize and nbar) must agree with the one of the models.
+
+    Returns
+    -------
+    All returns are attributes!
+    iza, vza, raa, izaDeg, vzaDeg, raaDeg, phi :
+        See Kernel.
+    cos_iza, sin_iza, tan_iza : ndarray
+        Cosine, sine and tangent of the incidence zenith angle.
+    cos_vza, sin_vza, tan_vza : ndarray
+        Cosine, sine and tangent of the scattering zenith angle.
+    cos_raa, sin_raa : ndarray
+        Cosine and sine of the relative azimuth angle.
+
+    See Also
+    --------
+    Kernel
+    Geometry.cos_sin_iza
+    """
+
+    def __init__(self, iza, vza, raa, normalize=False, nbar=0.0, angle_unit='DEG', align=True):
+        self.normalize = normalize
+        self.nbar = nbar
+        self.angle_unit = angle_unit
+
+        # Assertions
+        if self.angle_unit != 'DEG' and self.angle_unit != 'RAD':
+            raise AssertionError(
+                "angle_unit must be 'DEG' or 'RAD', but angle_unit is: {}".format(str(self.angle_unit)))
+
+        self.__incidence = {}
+
+        # Initialize angle information
+        self.__pre_process(iza, vza, raa, align)
+        self.__set_angle()
+
+    def __pre_process(self, iza, vza, raa, align):
+        iza, vza, raa = [np.asarray(item).ravel() for item in (iza, vza, raa)]
+        lengths = [len(iza), len(vza), len(raa)]
+
+        if not align and len(set(lengths)) > 1:
+            raise AssertionError("Input dimensions must agree. "
+                                 "The actual dimensions are "
+                                 "iza: {0}, vza: {1} and raa: {2}".format(*[str(item) for item in lengths]))
+
+        # One preallocated block for the aligned angles and the nadir term
+        n = max(lengths)
+        self.__geometry = np.empty((3, n + 1 if self.normalize else n),
+                                   dtype=np.result_type(iza, vza, raa, np.float64))
+
+        for row, item in zip(self.__geometry, (iza, vza, raa)):
+            row[:len(item)] = item
+            row[len(item):n] = item[-1]
+
+        if self.normalize:
+            self.__geometry[:, n] = (self.nbar, 0.0, 0.0)
+
+    def __set_angle(self):
+        """
+        A method to store and organize the input angle data. This also convert
+        all angle data in degrees to radians.
+        """
+        n = self.__geometry.shape[1] - 1 if self.normalize else self.__geometry.shape[1]
+
+        if self.angle_unit == 'DEG':
+            # The degrees are the aligned input angles, the radians are computed in one pass
+            self.izaDeg, self.vzaDeg, self.raaDeg = self.__geometry
+            geometry = np.radians(self.__geometry)
+        else:
+            # The degrees are computed on demand (see izaDeg, vzaDeg and raaDeg)
+            geometry = self.__geometry
+
+        self.B = sec(np.mean(geometry[0, :n])) + sec(np.mean(geometry[1, :n]))
+
+        # Check if there are negative angle values
+        negative = geometry[0:2] < 0
+        np.abs(geometry[0:2], out=geometry[0:2])
+        geometry[2] += np.pi * np.count_nonzero(negative, axis=0)
+
+        self.iza, self.vza, self.raa = geometry
+
+        # Turn the raa values in to a range between 0 and 2*pi
+        self.phi = np.abs(self.raa % (2. * np.pi))
+
+    def cos_sin_iza(self, offset=0.0):
+        """
+        Cosine and sine of the incidence zenith angle plus an offset in [RAD]. The values are cached per offset.
+
+        Returns
+        -------
+        cos, sin : ndarray
+        """
+        if offset == 0.0:
+            return self.cos_iza, self.sin_iza
+
+        if offset not in self.__incidence:
+            self.__incidence[offset] = (np.cos(self.iza + offset), np.sin(self.iza + offset))
+
+        return self.__incidence[offset]
+
+    @cached_property
+    def izaDeg(self):
+        return deg(self.iza)
+
+    @cached_property
+    def vzaDeg(self):
+        return deg(self.vza)
+
+    @cached_property
+    def raaDeg(self):
+        return deg(self.raa)
+
+    @cached_property
+    def cos_iza(self):
+        return np.cos(self.iza)
+
+    @cached_property
+    def sin_iza(self):
+        return np.sin(self.iza)
+
+    @cached_property
+    def tan_iza(self):
+        return np.tan(self.iza)
+
+    @cached_property
+    def cos_vza(self):
+        return np.cos(self.vza)
+
+    @cached_property
+    def sin_vza(self):
+        return np.sin(self.vza)
+
+    @cached_property
+    def tan_vza(self):
+        return np.tan(self.vza)
+
+    @cached_property
+    def cos_raa(self):
+        return np.cos(self.raa)
+
+    @cached_property
+    def sin_raa(self):
+        return np.sin(self.raa)
+
+
 class Kernel(object):
     """
     The kernel object defines the different models.
 
     Parameters
     ----------
-    iza, vza, raa : int, float or ndarray
-        Incidence (iza) and scattering (vza) zenith angle, as well as relative azimuth (raa) angle.
+    iza, vza, raa : int, float, ndarray or Geometry
+        Incidence (iza) and scattering (vza) zenith angle, as well as relative azimuth (raa) angle. If iza is a
+        Geometry, vza and raa are ignored and the geometry is shared with the model.
     normalize : boolean, optional
         Set to 'True' to make kernels 0 at nadir view illumination. Since all implemented kernels are normalized
         the default value is False.
@@ -51,6 +223,8 @@ class Kernel(object):
         Relative azimuth angle in [DEG].
     phi : ndarray
         Relative azimuth angle in a range between 0 and 2pi.
+    geometry : Geometry
+        Geometry with the trigonometric terms of the angles.
 
     Note
     ----
@@ -59,23 +233,27 @@ class Kernel(object):
     """
     def __init__(self, iza, vza, raa, normalize=False, nbar=0.0, angle_unit='DEG', align=True):
 
-        # Initialize values
-        self.vza = vza
-        self.iza = iza
-        self.raa = raa
+        if isinstance(iza, Geometry):
+            if iza.normalize != normalize or (normalize and iza.nbar != nbar):
+                raise ValueError("The normalization of the geometry (normalize={0}, nbar={1}) and the model "
+                                 "(normalize={2}, nbar={3}) must agree".format(str(iza.normalize), str(iza.nbar),
+                                                                               str(normalize), str(nbar)))
+            self.geometry = iza
+        else:
+            self.geometry = Geometry(iza, vza, raa, normalize=normalize, nbar=nbar, angle_unit=angle_unit,
+                                     align=align)
 
+        # Initialize values
         self.normalize = normalize
         self.nbar = nbar
-        self.angle_unit = angle_unit
-
-        # Assertions
-        if self.angle_unit != 'DEG' and self.angle_unit != 'RAD':
-            raise AssertionError(
-                "angle_unit must be 'DEG' or 'RAD', but angle_unit is: {}".format(str(self.angle_unit)))
+        self.angle_unit = self.geometry.angle_unit
 
         # Initialize angle information
-        self.__pre_process(align)
-        self.__set_angle()
+        self.iza = self.geometry.iza
+        self.vza = self.geometry.vza
+        self.raa = self.geometry.raa
+        self.phi = self.geometry.phi
+        self.B = self.geometry.B
 
     def normalization(self, kernel=None, args=None):
         if args is None and kernel is None:
@@ -95,88 +273,17 @@ class Kernel(object):
                 args = tuple(list_args)
                 return [item[0:-1] for item in args]
 
-    def __pre_process(self, align):
-        self.iza, self.vza, self.raa = asarrays((self.iza, self.vza, self.raa))
+    @cached_property
+    def izaDeg(self):
+        return self.geometry.izaDeg
 
-        if align:
-            self.iza, self.vza, self.raa = align_all((self.iza, self.vza, self.raa))
-
-        else:
-            try:
-                if len(self.vza) != len(self.iza) or len(self.vza) != len(self.raa):
-                    raise AssertionError("Input dimensions must agree. "
-                                         "The actual dimensions are "
-                                         "iza: {0}, vza: {1} and raa: {2}".format(str(len(self.iza)),
-                                                                                  str(len(self.vza)),
-                                                                                  str(len(self.raa))))
+    @cached_property
+    def vzaDeg(self):
+        return self.geometry.vzaDeg
 
-            except (AttributeError, TypeError):
-                pass
-
-    def __set_angle(self):
-        """
-        A method to store and organize the input angle data. This also convert
-        all angle data in degrees to radians.
-        """
-
-        if self.angle_unit is 'DEG':
-            self.vzaDeg = self.vza.flatten()
-            self.izaDeg = self.iza.flatten()
-            self.raaDeg = self.raa.flatten()
-
-            if self.normalize:
-                # calculate nadir term by extending array
-                self.vzaDeg = np.array(list(self.vzaDeg) + [0.0]).flatten()
-                self.izaDeg = np.array(list(self.izaDeg) + [self.nbar]).flatten()
-                self.raaDeg = np.array(list(self.raaDeg) + [0.0]).flatten()
-                self.B = (sec(np.mean(rad(self.izaDeg[0:-1]))) + sec(np.mean(rad(self.vzaDeg[0:-1]))))
-            else:
-                self.B = (sec(np.mean(rad(self.izaDeg))) + sec(np.mean(rad(self.vzaDeg))))
-
-            self.vza = rad(self.vzaDeg)
-            self.iza = rad(self.izaDeg)
-            self.raa = rad(self.raaDeg)
-
-            # Check if there are negative angle values
-            w = np.where(self.vza < 0)[0]
-            self.vza[w] = -self.vza[w]
-            self.raa[w] = self.raa[w] + np.pi
-            w = np.where(self.iza < 0)[0]
-            self.iza[w] = -self.iza[w]
-            self.raa[w] = self.raa[w] + np.pi
-
-            # Turn the raa values in to a range between 0 and 2*pi
-            self.phi = np.abs((self.raa % (2. * np.pi)))
-
-        if self.angle_unit is 'RAD':
-            self.vza = self.vza.flatten()
-            self.iza = self.iza.flatten()
-            self.raa = self.raa.flatten()
-
-            if self.normalize:
-                # calculate nadir term by extending array
-                self.vza = np.array(list(self.vza) + [0.0]).flatten()
-                self.iza = np.array(list(self.iza) + [self.nbar]).flatten()
-                self.raa = np.array(list(self.raa) + [0.0]).flatten()
-                self.B = (sec(np.mean(self.iza[0:-1])) + sec(np.mean(self.vza[0:-1])))
-
-            else:
-                self.B = (sec(np.mean(self.iza)) + sec(np.mean(self.vza)))
-
-            # Check if there are negative angle values
-            w = np.where(self.vza < 0)[0]
-            self.vza[w] = -self.vza[w]
-            self.raa[w] = self.raa[w] + np.pi
-            w = np.where(self.iza < 0)[0]
-            self.iza[w] = -self.iza[w]
-            self.raa[w] = self.raa[w] + np.pi
-
-            self.vzaDeg = deg(self.vza)
-            self.izaDeg = deg(self.iza)
-            self.raaDeg = deg(self.raa)
-
-            # Turn the raa values in to a range between 0 and 2 pi
-            self.phi = np.abs((self.raa % (2. * np.pi)))
+    @cached_property
+    def raaDeg(self):
+        return self.geometry.raaDeg
 
 
 class Scattering(object):
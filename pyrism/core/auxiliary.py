@@ -179,6 +179,223 @@ class EmissivityResult(dict):
         return list(self.keys())
 
 
+class SensitivityResult(dict):
+    """ Represents the sensitivity analysis result.
+
+    Returns
+    -------
+    All returns are attributes!
+    names : list
+        Names of the parameters.
+    S1, S1_conf : array_like
+        First-order Sobol indices and the half width of their bootstrap confidence intervals with shape
+        (n_params, ...).
+    ST, ST_conf : array_like
+        Total Sobol indices and the half width of their bootstrap confidence intervals with shape (n_params, ...).
+
+    Notes
+    -----
+    There may be additional attributes not listed above depending of the
+    specific solver. Since this class is essentially a subclass of dict
+    with attribute accessors, one can see which attributes are available
+    using the `keys()` method.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+    def __repr__(self):
+        if self.keys():
+            m = max(map(len, list(self.keys()))) + 1
+            return '\n'.join([k.rjust(m) + ': ' + repr(v)
+                              for k, v in sorted(self.items())])
+        else:
+            return self.__class__.__name__ + "()"
+
+    def __dir__(self):
+        return list(self.keys())
+
+
+class InversionResult(dict):
+    """ Represents the inversion result.
+
+    Returns
+    -------
+    All returns are attributes!
+    names : list
+        Names of the parameters.
+    params : array_like
+        Estimated parameters with shape (n_observations, n_params).
+    std : array_like
+        Weighted standard deviation of the parameters of the nearest solutions with shape (n_observations, n_params).
+    cost : array_like
+        Cost (mean squared difference between observation and simulation) of the best solution.
+
+    Notes
+    -----
+    There may be additional attributes not listed above depending of the
+    specific solver. Since this class is essentially a subclass of dict
+    with attribute accessors, one can see which attributes are available
+    using the `keys()` method.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+    def __repr__(self):
+        if self.keys():
+            m = max(map(len, list(self.keys()))) + 1
+            return '\n'.join([k.rjust(m) + ': ' + repr(v)
+                              for k, v in sorted(self.items())])
+        else:
+            return self.__class__.__name__ + "()"
+
+    def __dir__(self):
+        return list(self.keys())
+
+
+class ValidationResult(dict):
+    """ Represents the validation result of an emulator.
+
+    Returns
+    -------
+    All returns are attributes!
+    rmse, mae, max_error : array_like
+        Root mean squared, mean absolute and maximal absolute error of each output.
+    r2 : array_like
+        Coefficient of determination of each output.
+    N : int
+        Number of validation samples.
+
+    Notes
+    -----
+    There may be additional attributes not listed above depending of the
+    specific solver. Since this class is essentially a subclass of dict
+    with attribute accessors, one can see which attributes are available
+    using the `keys()` method.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+    def __repr__(self):
+        if self.keys():
+            m = max(map(len, list(self.keys()))) + 1
+            return '\n'.join([k.rjust(m) + ': ' + repr(v)
+                              for k, v in sorted(self.items())])
+        else:
+            return self.__class__.__name__ + "()"
+
+    def __dir__(self):
+        return list(self.keys())
+
+
+class ProfileResult(dict):
+    """ Represents the profile of a model run.
+
+    Returns
+    -------
+    All returns are attributes!
+    stages : OrderedDict
+        Wall time in seconds of each stage of the model in the order of execution.
+    total : float
+        Sum of the wall times of all stages.
+    evaluations : int
+        Number of integrand evaluations made by the numerical quadrature.
+
+    Notes
+    -----
+    There may be additional attributes not listed above depending of the
+    specific solver. Since this class is essentially a subclass of dict
+    with attribute accessors, one can see which attributes are available
+    using the `keys()` method.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+    def __repr__(self):
+        if self.keys():
+            m = max(map(len, list(self.keys()))) + 1
+            return '\n'.join([k.rjust(m) + ': ' + repr(v)
+                              for k, v in sorted(self.items())])
+        else:
+            return self.__class__.__name__ + "()"
+
+    def __dir__(self):
+        return list(self.keys())
+
+
+class AlbedoResult(dict):
+    """ Represents the albedo of a canopy.
+
+    Returns
+    -------
+    All returns are attributes!
+    black_sky : array_like
+        Spectral directional-hemispherical reflectance (albedo under direct illumination).
+    white_sky : array_like
+        Spectral bi-hemispherical reflectance (albedo under isotropic diffuse illumination).
+    blue_sky : array_like
+        Spectral albedo under the actual mixture of direct and diffuse illumination.
+    skyl : array_like
+        Fraction of diffuse illumination.
+    broadband : AlbedoResult
+        Black-, white- and blue-sky albedo weighted with the solar spectra and integrated over the wavelengths.
+
+    Notes
+    -----
+    There may be additional attributes not listed above depending of the
+    specific solver. Since this class is essentially a subclass of dict
+    with attribute accessors, one can see which attributes are available
+    using the `keys()` method.
+    """
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    __setattr__ = dict.__setitem__
+    __delattr__ = dict.__delitem__
+
+    def __repr__(self):
+        if self.keys():
+            m = max(map(len, list(self.keys()))) + 1
+            return '\n'.join([k.rjust(m) + ': ' + repr(v)
+                              for k, v in sorted(self.items())])
+        else:
+            return self.__class__.__name__ + "()"
+
+    def __dir__(self):
+        return list(self.keys())
+
+
 def rad(angle):
     """
     Convert degrees to radians.
@@ -331,13 +548,13 @@ def BSC(BRDF, iza, vza, angle_unit='RAD'):
 
 def align_all(data, constant_values='default'):
     max_len = max_length(data)
+    aligned = np.empty((len(data), max_len), dtype=np.result_type(*data))
 
-    if constant_values == 'default':
-        return np.asarray(
-            [np.pad(item, (0, max_len - len(item)), 'constant', constant_values=item[-1]) for item in data])
-    else:
-        return np.asarray(
-            [np.pad(item, (0, max_len - len(item)), 'constant', constant_values=constant_values) for item in data])
+    for row, item in zip(aligned, data):
+        row[:len(item)] = item
+        row[len(item):] = item[-1] if constant_values == 'default' else constant_values
+
+    return aligned
 
 
 def max_length(data):
@@ -348,6 +565,16 @@ def asarrays(data):
     return [np.asarray(item).flatten() for item in data]
 
 
+def float_dtype(dtype):
+    """Check the floating point precision (float32 or float64) of a model."""
+    dtype = np.dtype(dtype)
+
+    if dtype not in (np.float32, np.float64):
+        raise ValueError("dtype must be float32 or float64. The actual dtype is: {}".format(str(dtype)))
+
+    return dtype
+
+
 def load_param():
     sensing = Memorize(freq=1.26,
                        iza=35,
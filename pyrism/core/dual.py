@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+"""
+Forward-mode automatic differentiation with dual numbers over numpy arrays.
+
+A Dual carries a value array and the derivatives of that value with respect to independent variables. The derivatives
+are stored sparse in a dict, which maps the index of a variable to an array that broadcasts against the value, so
+that structural zeros and broadcast dimensions (e.g. a leaf area index with shape (n, 1) against spectra with shape
+(n, 2101)) cost nothing. The functions of this module (exp, log, sqrt, power, expi, erfc, kv, real, conj, sum, where,
+isnan, chain) accept both Dual objects and plain arrays, so that the same model code can evaluate values or values and
+Jacobians. Values may be complex, the variables are always real.
+"""
+from __future__ import division
+
+import numpy as np
+from scipy import special
+
+
+def _parts(x):
+    if isinstance(x, Dual):
+        return x.value, x.deriv, x.n_variables
+
+    # Python scalars stay weakly typed, so that they do not promote float32 arrays to float64
+    if isinstance(x, (int, float, complex)):
+        return x, {}, 0
+
+    return np.asarray(x), {}, 0
+
+
+def _scale(deriv, factor):
+    return dict((key, item * factor) for key, item in deriv.items())
+
+
+def _add(first, second):
+    deriv = dict(first)
+
+    for key, item in second.items():
+        deriv[key] = deriv[key] + item if key in deriv else item
+
+    return deriv
+
+
+def _make(value, deriv, n_variables):
+    if not n_variables:
+        return value
+
+    return Dual(value, deriv, n_variables)
+
+
+class Dual(object):
+    """
+    Dual number with array valued value and derivatives.
+
+    Parameters
+    ----------
+    value : array_like
+        Value.
+    deriv : dict
+        Derivatives of value. The keys are the indices of the variables and the items are arrays which broadcast
+        against value. Missing variables have a derivative of zero.
+    n_variables : int
+        Number of independent variables.
+
+    See Also
+    --------
+    Dual.variables
+    Dual.jacobian
+    """
+
+    # Let numpy defer binary operations with ndarrays to the reflected methods of Dual
+    __array_ufunc__ = None
+    __hash__ = None
+
+    def __init__(self, value, deriv, n_variables):
+        self.value = np.asarray(value)
+        self.deriv = deriv
+        self.n_variables = n_variables
+
+    @classmethod
+    def variables(cls, *values):
+        """
+        Create independent variables with unit derivatives.
+
+        Parameters
+        ----------
+        values : array_like
+            Values of the variables. Float32 values keep their precision, all other values are converted to float64.
+
+        Returns
+        -------
+        variables : list of Dual
+        """
+        values = [np.asarray(value) for value in values]
+        values = [value if value.dtype == np.float32 else value.astype(np.float64) for value in values]
+
+        return [cls(value, {i: np.ones_like(value)}, len(values)) for i, value in enumerate(values)]
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    @property
+    def ndim(self):
+        return self.value.ndim
+
+    def jacobian(self):
+        """
+        Derivatives with the variables on the last axis.
+
+        Returns
+        -------
+        jacobian : ndarray
+            Array with shape value.shape + (n_variables,).
+        """
+        dtype = np.result_type(self.value.dtype, np.float32, *self.deriv.values())
+        jacobian = np.zeros(self.value.shape + (self.n_variables,), dtype=dtype)
+
+        for key, item in self.deriv.items():
+            jacobian[..., key] = item
+
+        return jacobian
+
+    def __getitem__(self, item):
+        return Dual(self.value[item],
+                    dict((key, np.broadcast_to(deriv, self.value.shape)[item]) for key, deriv in self.deriv.items()),
+                    self.n_variables)
+
+    def __repr__(self):
+        return "Dual(value={0}, deriv={1})".format(repr(self.value), repr(self.deriv))
+
+    # Arithmetic
+    def __add__(self, other):
+        ov, od, on = _parts(other)
+        return Dual(self.value + ov, _add(self.deriv, od), max(self.n_variables, on))
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        ov, od, on = _parts(other)
+        return Dual(self.value - ov, _add(self.deriv, _scale(od, -1.)), max(self.n_variables, on))
+
+    def __rsub__(self, other):
+        ov, od, on = _parts(other)
+        return Dual(ov - self.value, _add(od, _scale(self.deriv, -1.)), max(self.n_variables, on))
+
+    def __mul__(self, other):
+        ov, od, on = _parts(other)
+        return Dual(self.value * ov, _add(_scale(self.deriv, ov), _scale(od, self.value)), max(self.n_variables, on))
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        ov, od, on = _parts(other)
+        value = self.value / ov
+        return Dual(value, _add(_scale(self.deriv, 1. / ov), _scale(od, -value / ov)), max(self.n_variables, on))
+
+    def __rtruediv__(self, other):
+        ov, od, on = _parts(other)
+        value = ov / self.value
+        return Dual(value, _add(_scale(od, 1. / self.value), _scale(self.deriv, -value / self.value)),
+                    max(self.n_variables, on))
+
+    __div__ = __truediv__
+    __rdiv__ = __rtruediv__
+
+    def __pow__(self, other):
+        return power(self, other)
+
+    def __rpow__(self, other):
+        return power(other, self)
+
+    def __neg__(self):
+        return Dual(-self.value, _scale(self.deriv, -1.), self.n_variables)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return Dual(np.abs(self.value), _scale(self.deriv, np.sign(self.value)), self.n_variables)
+
+    # Comparisons act on the value
+    def __lt__(self, other):
+        return self.value < _parts(other)[0]
+
+    def __le__(self, other):
+        return self.value <= _parts(other)[0]
+
+    def __gt__(self, other):
+        return self.value > _parts(other)[0]
+
+    def __ge__(self, other):
+        return self.value >= _parts(other)[0]
+
+    def __eq__(self, other):
+        return self.value == _parts(other)[0]
+
+    def __ne__(self, other):
+        return self.value != _parts(other)[0]
+
+
+# ---- Functions ----
+def exp(x):
+    """Exponential of an array or Dual."""
+    if not isinstance(x, Dual):
+        return np.exp(x)
+
+    value = np.exp(x.value)
+    return Dual(value, _scale(x.deriv, value), x.n_variables)
+
+
+def log(x):
+    """Natural logarithm of an array or Dual."""
+    if not isinstance(x, Dual):
+        return np.log(x)
+
+    return Dual(np.log(x.value), _scale(x.deriv, 1. / x.value), x.n_variables)
+
+
+def sqrt(x):
+    """Square root of an array or Dual."""
+    if not isinstance(x, Dual):
+        return np.sqrt(x)
+
+    value = np.sqrt(x.value)
+    return Dual(value, _scale(x.deriv, 0.5 / value), x.n_variables)
+
+
+def power(x, y):
+    """First array or Dual raised to powers from the second array or Dual."""
+    xv, xd, xn = _parts(x)
+    yv, yd, yn = _parts(y)
+
+    value = np.power(xv, yv)
+    deriv = {}
+
+    if xd:
+        deriv = _scale(xd, yv * np.power(xv, yv - 1))
+    if yd:
+        deriv = _add(deriv, _scale(yd, value * np.log(xv)))
+
+    return _make(value, deriv, max(xn, yn))
+
+
+def expi(x):
+    """Exponential integral Ei of an array or Dual."""
+    if not isinstance(x, Dual):
+        return special.expi(x)
+
+    return Dual(special.expi(x.value), _scale(x.deriv, np.exp(x.value) / x.value), x.n_variables)
+
+
+def erfc(x):
+    """Complementary error function of an array or Dual."""
+    if not isinstance(x, Dual):
+        return special.erfc(x)
+
+    return Dual(special.erfc(x.value), _scale(x.deriv, -2 / np.sqrt(np.pi) * np.exp(-x.value ** 2)), x.n_variables)
+
+
+def kv(v, x):
+    """Modified Bessel function of the second kind of real order v of an array or Dual."""
+    if not isinstance(x, Dual):
+        return special.kv(v, x)
+
+    return Dual(special.kv(v, x.value), _scale(x.deriv, special.kvp(v, x.value)), x.n_variables)
+
+
+def real(x):
+    """Real part of an array or Dual."""
+    if not isinstance(x, Dual):
+        return np.real(x)
+
+    return Dual(np.real(x.value), dict((key, np.real(item)) for key, item in x.deriv.items()), x.n_variables)
+
+
+def conj(x):
+    """Complex conjugate of an array or Dual."""
+    if not isinstance(x, Dual):
+        return np.conj(x)
+
+    return Dual(np.conj(x.value), dict((key, np.conj(item)) for key, item in x.deriv.items()), x.n_variables)
+
+
+def sum(x, axis=None):
+    """Sum of the elements of an array or Dual over a given axis."""
+    if not isinstance(x, Dual):
+        return np.sum(x, axis=axis)
+
+    return Dual(np.sum(x.value, axis=axis),
+                dict((key, np.sum(np.broadcast_to(item, x.value.shape), axis=axis)) for key, item in x.deriv.items()),
+                x.n_variables)
+
+
+def where(condition, x, y):
+    """Elements from x or y (arrays or Duals) depending on condition."""
+    xv, xd, xn = _parts(x)
+    yv, yd, yn = _parts(y)
+
+    value = np.where(condition, xv, yv)
+    deriv = dict((key, np.where(condition, xd.get(key, 0.), yd.get(key, 0.))) for key in set(xd) | set(yd))
+
+    return _make(value, deriv, max(xn, yn))
+
+
+def chain(func, *args):
+    """
+    Evaluate a function with local variables for its Dual arguments and apply the chain rule afterwards.
+
+    If func depends on the independent variables only through a few arguments, the derivatives are propagated
+    through func with respect to these arguments only. This is cheaper than the propagation of all variables, e.g. a
+    canopy model with five Dual inputs in a PROSAIL setup with eleven variables.
+
+    Parameters
+    ----------
+    func : callable
+        Function of arrays or Duals which returns an array, a Dual or a tuple of them.
+    args :
+        Arguments of func. Only the Dual arguments are replaced by local variables.
+
+    Returns
+    -------
+    Output of func with the derivatives with respect to the variables of the Dual arguments.
+    """
+    index = [i for i, item in enumerate(args) if isinstance(item, Dual)]
+
+    if not index:
+        return func(*args)
+
+    local = list(args)
+    for i, variable in zip(index, Dual.variables(*[args[i].value for i in index])):
+        local[i] = variable
+
+    n_variables = max(args[i].n_variables for i in index)
+    outputs = func(*local)
+    single = not isinstance(outputs, tuple)
+
+    result = []
+    for output in ((outputs,) if single else outputs):
+        if isinstance(output, Dual):
+            deriv = {}
+            for j, item in output.deriv.items():
+                deriv = _add(deriv, _scale(args[index[j]].deriv, item))
+
+            output = Dual(output.value, deriv, n_variables)
+
+        result.append(output)
+
+    return result[0] if single else tuple(result)
+
+
+def isnan(x):
+    """Test the value of an array or Dual for NaN."""
+    return np.isnan(_parts(x)[0])
+
+
+def value(x):
+    """Value of an array or Dual."""
+    return _parts(x)[0]
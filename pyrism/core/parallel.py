@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import sys
+from collections import deque
+from multiprocessing import Pool
+
+import numpy as np
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+def chunks(n, chunk_size):
+    """
+    Split the range 0...n in to consecutive slices.
+
+    Parameters
+    ----------
+    n : int
+        Total number of elements.
+    chunk_size : int
+        Maximal number of elements per slice.
+
+    Returns
+    -------
+    slices : generator
+        Consecutive slice objects which cover 0...n.
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be greater than 0. The actual value is: {}".format(str(chunk_size)))
+
+    for start in srange(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def imap_blocks(func, blocks, processes=None):
+    """
+    Evaluate a batched model for an iterable of parameter blocks.
+
+    Parameters
+    ----------
+    func : callable
+        Batched model. `func(block)` must accept an array with shape (n, n_params) and return an array with
+        shape (n, ...). If `processes` is not None, `func` must be picklable (e.g. a module level function or an
+        instance of a module level class).
+    blocks : iterable
+        Parameter blocks with shape (n, n_params). The blocks are consumed lazily: at most 2 * processes + 1 blocks
+        are pending in the worker processes, so that the memory is bounded by the block size and not by the number of
+        blocks.
+    processes : int or None, optional
+        Number of worker processes. If None (default) all blocks are evaluated in the current process.
+
+    Returns
+    -------
+    results : generator
+        Model outputs in the order of the blocks.
+    """
+    if processes is None:
+        for block in blocks:
+            yield np.asarray(func(block))
+    else:
+        pool = Pool(processes)
+        try:
+            pending = deque()
+
+            for block in blocks:
+                pending.append(pool.apply_async(func, (block,)))
+
+                if len(pending) > 2 * processes:
+                    yield np.asarray(pending.popleft().get())
+
+            while pending:
+                yield np.asarray(pending.popleft().get())
+        finally:
+            pool.terminate()
+
+
+def imap_chunks(func, params, chunk_size=1024, processes=None):
+    """
+    Evaluate a batched model chunk by chunk.
+
+    The parameter matrix is split in to blocks of `chunk_size` rows. Each block is passed to `func` and the results
+    are yielded in the order of the rows, so that the caller only holds one block of outputs at a time.
+
+    Parameters
+    ----------
+    func : callable
+        Batched model. See `imap_blocks`.
+    params : array_like
+        Parameter matrix with shape (n_samples, n_params).
+    chunk_size : int, optional
+        Number of rows per block. Default is 1024.
+    processes : int or None, optional
+        Number of worker processes. If None (default) all blocks are evaluated in the current process.
+
+    Returns
+    -------
+    results : generator
+        Tuples of (slice, output) where slice are the rows of `params` that belong to the output block.
+    """
+    params = np.asarray(params)
+
+    if params.ndim == 1:
+        params = params.reshape(-1, 1)
+
+    slices = list(chunks(len(params), chunk_size))
+    results = imap_blocks(func, (params[item] for item in slices), processes)
+
+    for item, result in zip(slices, results):
+        yield item, result
+
+
+def evaluate(func, params, chunk_size=1024, processes=None, out=None):
+    """
+    Evaluate a batched model for all rows of a parameter matrix.
+
+    Parameters
+    ----------
+    func, params, chunk_size, processes :
+        See `imap_chunks`.
+    out : ndarray, optional
+        Array (e.g. a numpy.memmap) in to which the results are written. If None, a new array is allocated.
+
+    Returns
+    -------
+    out : ndarray
+        Model output with shape (n_samples, ...).
+    """
+    params = np.asarray(params)
+
+    if params.ndim == 1:
+        params = params.reshape(-1, 1)
+
+    for item, result in imap_chunks(func, params, chunk_size, processes):
+        if out is None:
+            out = np.empty((len(params),) + result.shape[1:], dtype=result.dtype)
+        out[item] = result
+
+    return out
@@ -0,0 +1,4 @@
+from .base import Emulator
+from .polynomial import (PolynomialChaos, multi_indices, legendre)
+from .gaussian_process import GaussianProcess
+from .table import I2EMTable
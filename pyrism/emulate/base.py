@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import sys
+
+import numpy as np
+
+from ..core import ValidationResult
+from ..core.parallel import chunks, evaluate
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+class Emulator(object):
+    """
+    Base class of the emulators (fast surrogates) of batched models over a box of parameters.
+
+    Parameters
+    ----------
+    bounds : array_like
+        Lower and upper bounds of the parameters with shape (D, 2).
+    names : list of str, optional
+        Names of the parameters.
+
+    Returns
+    -------
+    All returns are attributes!
+    validation : ValidationResult or None
+        Errors of the emulator on the held-out samples of the last fit.
+
+    See Also
+    --------
+    PolynomialChaos
+    GaussianProcess
+    pyrism.core.ValidationResult
+    """
+
+    kind = None
+
+    def __init__(self, bounds, names=None):
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.D = len(self.bounds)
+
+        if names is None:
+            names = ['x{}'.format(i + 1) for i in srange(self.D)]
+
+        if len(names) != self.D:
+            raise AssertionError("The number of names ({0}) and bounds ({1}) must agree".format(str(len(names)),
+                                                                                             str(self.D)))
+        self.names = list(names)
+        self.output_shape = None
+        self.validation = None
+
+    # ---- Interface of the subclasses ----
+    def _train(self, x, y):
+        raise NotImplementedError("Subclass must implement abstract method")
+
+    def _predict(self, x):
+        raise NotImplementedError("Subclass must implement abstract method")
+
+    def _state(self):
+        raise NotImplementedError("Subclass must implement abstract method")
+
+    def _load_state(self, data):
+        raise NotImplementedError("Subclass must implement abstract method")
+
+    # ---- Public ----
+    def scale(self, params):
+        """Map parameters from the bounds to the unit box [-1, 1]."""
+        params = np.asarray(params, dtype=np.float64).reshape(-1, self.D)
+        return 2 * (params - self.bounds[:, 0]) / (self.bounds[:, 1] - self.bounds[:, 0]) - 1
+
+    def fit(self, func, n_samples, validation=0.2, chunk_size=1024, processes=None, seed=None):
+        """
+        Sample a batched model uniformly within the bounds, train the emulator and validate it on held-out samples.
+
+        Parameters
+        ----------
+        func : callable
+            Batched model function which maps a parameter matrix with shape (n, D) to outputs with shape (n, ...), e.g.
+            pyrism.models.PROSAILFunction or pyrism.models.I2EMFunction.
+        n_samples : int
+            Number of model evaluations.
+        validation : float, optional
+            Fraction of the samples which are held out for the validation. Default is 0.2.
+        chunk_size : int, optional
+            Number of samples per block of the batch runner. Default is 1024.
+        processes : int or None, optional
+            Number of worker processes. If None (default) all blocks are evaluated in the current process.
+        seed : int, optional
+            Seed of the random number generator.
+
+        Returns
+        -------
+        self
+        """
+        rng = np.random.RandomState(seed)
+        params = self.bounds[:, 0] + rng.random_sample((n_samples, self.D)) * (self.bounds[:, 1] - self.bounds[:, 0])
+        outputs = evaluate(func, params, chunk_size, processes)
+
+        n_validation = int(round(validation * n_samples))
+        self.train(params[n_validation:], outputs[n_validation:])
+
+        if n_validation > 0:
+            self.validation = self.validate(params[:n_validation], outputs[:n_validation])
+
+        return self
+
+    def train(self, params, outputs):
+        """
+        Train the emulator with given model evaluations.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameters with shape (n_samples, D).
+        outputs : array_like
+            Model outputs with shape (n_samples, ...).
+
+        Returns
+        -------
+        self
+        """
+        outputs = np.asarray(outputs, dtype=np.float64)
+        self.output_shape = outputs.shape[1:]
+        self._train(self.scale(params), outputs.reshape(len(outputs), -1))
+
+        return self
+
+    def predict(self, params, chunk_size=65536):
+        """
+        Evaluate the emulator.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameters with shape (n_samples, D).
+        chunk_size : int, optional
+            Number of samples which are evaluated at once. Default is 65536.
+
+        Returns
+        -------
+        outputs : ndarray
+            Emulated outputs with shape (n_samples, ...).
+        """
+        if self.output_shape is None:
+            raise ValueError("The emulator is not trained")
+
+        x = self.scale(params)
+        outputs = np.empty((len(x), int(np.prod(self.output_shape))))
+
+        for item in chunks(len(x), chunk_size):
+            outputs[item] = self._predict(x[item])
+
+        return outputs.reshape((len(x),) + tuple(self.output_shape))
+
+    def __call__(self, params):
+        return self.predict(params)
+
+    def validate(self, params, outputs):
+        """
+        Compare the emulator with model outputs.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameters with shape (n_samples, D).
+        outputs : array_like
+            Model outputs with shape (n_samples, ...).
+
+        Returns
+        -------
+        ValidationResult
+        """
+        outputs = np.asarray(outputs, dtype=np.float64)
+        error = self.predict(params) - outputs
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r2 = 1 - np.sum(error ** 2, axis=0) / np.sum((outputs - outputs.mean(axis=0)) ** 2, axis=0)
+
+        return ValidationResult(rmse=np.sqrt(np.mean(error ** 2, axis=0)), mae=np.mean(np.abs(error), axis=0),
+                                max_error=np.max(np.abs(error), axis=0), r2=r2, N=len(outputs))
+
+    def save(self, filename):
+        """
+        Store the emulator in a numpy .npz file.
+
+        Parameters
+        ----------
+        filename : str
+            File name.
+        """
+        if self.output_shape is None:
+            raise ValueError("The emulator is not trained")
+
+        data = dict(kind=np.array(self.kind), bounds=self.bounds, names=np.array(self.names),
+                    output_shape=np.array(self.output_shape, dtype=np.int64))
+
+        if self.validation is not None:
+            data.update(dict(('validation_' + key, np.asarray(value)) for key, value in self.validation.items()))
+
+        data.update(self._state())
+        np.savez(filename, **data)
+
+    @staticmethod
+    def load(filename):
+        """
+        Load an emulator which was stored with save.
+
+        Parameters
+        ----------
+        filename : str
+            File name.
+
+        Returns
+        -------
+        Emulator
+        """
+        with np.load(filename) as data:
+            kinds = dict((item.kind, item) for item in Emulator.__subclasses__())
+            kind = str(data['kind'])
+
+            if kind not in kinds:
+                raise ValueError("Unknown emulator: {}".format(kind))
+
+            emulator = kinds[kind](data['bounds'], names=[str(item) for item in data['names']])
+            emulator.output_shape = tuple(int(item) for item in data['output_shape'])
+
+            validation = dict((key[len('validation_'):], data[key][()]) for key in data.files
+                              if key.startswith('validation_'))
+            if validation:
+                emulator.validation = ValidationResult(**validation)
+
+            emulator._load_state(data)
+
+        return emulator
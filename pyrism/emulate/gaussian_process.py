@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import numpy as np
+from scipy.linalg import solve
+from scipy.spatial.distance import cdist
+
+from .base import Emulator
+
+
+class GaussianProcess(Emulator):
+    """
+    Sparse Gaussian process with a squared exponential kernel and inducing points (subset of regressors). The inducing
+    points are a random subset of the training samples, so that the cost of the training grows linearly with the
+    number of samples and the cost of the prediction only depends on the number of inducing points.
+
+    Parameters
+    ----------
+    bounds : array_like
+        Lower and upper bounds of the parameters with shape (D, 2).
+    n_inducing : int, optional
+        Number of inducing points. Default is 256.
+    lengthscale : float, array_like or None, optional
+        Length scale of the kernel in units of the half width of the bounds, either one value or one value per
+        parameter. If None (default), the length scale is selected from `candidates` with a held-out part of the
+        training samples.
+    noise : float, optional
+        Noise variance relative to the variance of the outputs. Default is 1e-6.
+    candidates : sequence of float, optional
+        Candidates of the length scale. Default is (0.25, 0.5, 1, 2).
+    names : list of str, optional
+        Names of the parameters.
+    seed : int, optional
+        Seed of the random selection of the inducing points.
+
+    Returns
+    -------
+    All returns are attributes!
+    inducing : ndarray
+        Inducing points (scaled to [-1, 1]) with shape (n_inducing, D).
+    weights : ndarray
+        Weights of the inducing points with shape (n_inducing, n_out).
+    validation : ValidationResult or None
+        See Emulator.
+
+    See Also
+    --------
+    Emulator
+    PolynomialChaos
+    """
+
+    kind = 'gaussian_process'
+
+    def __init__(self, bounds, n_inducing=256, lengthscale=None, noise=1e-6, candidates=(0.25, 0.5, 1., 2.),
+                 names=None, seed=None):
+        super(GaussianProcess, self).__init__(bounds, names)
+
+        self.n_inducing = n_inducing
+        self.lengthscale = lengthscale
+        self.noise = noise
+        self.candidates = tuple(candidates)
+        self.seed = seed
+
+        self.inducing = None
+        self.weights = None
+
+    def __kernel(self, a, b, lengthscale):
+        return np.exp(-0.5 * cdist(a / lengthscale, b / lengthscale, 'sqeuclidean'))
+
+    def __solve(self, x, y, inducing, lengthscale):
+        Kux = self.__kernel(inducing, x, lengthscale)
+        Kuu = self.__kernel(inducing, inducing, lengthscale)
+
+        A = np.dot(Kux, Kux.T) + self.noise * Kuu
+        A += 1e-10 * np.trace(A) / len(A) * np.eye(len(A))
+
+        return solve(A, np.dot(Kux, y), assume_a='pos')
+
+    def _train(self, x, y):
+        rng = np.random.RandomState(self.seed)
+
+        self.mean = y.mean(axis=0)
+        self.std = y.std(axis=0)
+        self.std[self.std == 0] = 1.
+        y = (y - self.mean) / self.std
+
+        self.inducing = x[rng.choice(len(x), min(self.n_inducing, len(x)), replace=False)]
+
+        if self.lengthscale is None:
+            # Select the length scale with a held-out fifth of the training samples
+            index = rng.permutation(len(x))
+            test, train = index[:len(x) // 5], index[len(x) // 5:]
+
+            errors = []
+            for lengthscale in self.candidates:
+                weights = self.__solve(x[train], y[train], self.inducing, lengthscale)
+                errors.append(np.mean((np.dot(self.__kernel(x[test], self.inducing, lengthscale), weights) -
+                                       y[test]) ** 2))
+
+            self.lengthscale = self.candidates[int(np.argmin(errors))]
+
+        self.lengthscale = np.asarray(self.lengthscale, dtype=np.float64)
+        self.weights = self.__solve(x, y, self.inducing, self.lengthscale)
+
+    def _predict(self, x):
+        return np.dot(self.__kernel(x, self.inducing, self.lengthscale), self.weights) * self.std + self.mean
+
+    def _state(self):
+        return dict(n_inducing=np.array(self.n_inducing), lengthscale=self.lengthscale, noise=np.array(self.noise),
+                    inducing=self.inducing, weights=self.weights, mean=self.mean, std=self.std)
+
+    def _load_state(self, data):
+        self.n_inducing = int(data['n_inducing'])
+        self.lengthscale = data['lengthscale']
+        self.noise = float(data['noise'])
+        self.inducing = data['inducing']
+        self.weights = data['weights']
+        self.mean = data['mean']
+        self.std = data['std']
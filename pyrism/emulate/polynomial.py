@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import sys
+
+import numpy as np
+
+from .base import Emulator
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+def multi_indices(D, degree):
+    """
+    Multi-indices of all polynomials in D variables with a total degree of at most `degree`.
+
+    Returns
+    -------
+    indices : ndarray
+        Integer array with shape (n_terms, D), ordered by the total degree.
+    """
+    def build(D, degree):
+        if D == 1:
+            return [(i,) for i in srange(degree + 1)]
+        return [(i,) + rest for i in srange(degree + 1) for rest in build(D - 1, degree - i)]
+
+    indices = np.asarray(build(D, degree), dtype=np.int64).reshape(-1, D)
+
+    return indices[np.argsort(indices.sum(axis=1), kind='mergesort')]
+
+
+def legendre(x, degree):
+    """
+    Orthonormal Legendre polynomials for uniform variables on [-1, 1].
+
+    Parameters
+    ----------
+    x : array_like
+        Values with shape (n, D).
+    degree : int
+        Maximal degree.
+
+    Returns
+    -------
+    values : ndarray
+        Polynomial values with shape (n, D, degree + 1).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    values = np.empty(x.shape + (degree + 1,))
+    values[..., 0] = 1.
+
+    if degree > 0:
+        values[..., 1] = x
+
+    for k in srange(1, degree):
+        values[..., k + 1] = ((2 * k + 1) * x * values[..., k] - k * values[..., k - 1]) / (k + 1)
+
+    return values * np.sqrt(2 * np.arange(degree + 1) + 1)
+
+
+class PolynomialChaos(Emulator):
+    """
+    Polynomial chaos expansion with orthonormal Legendre polynomials of a total degree up to `degree`. The coefficients
+    are fitted with (ridge regularized) least squares.
+
+    Parameters
+    ----------
+    bounds : array_like
+        Lower and upper bounds of the parameters with shape (D, 2).
+    degree : int, optional
+        Maximal total degree of the polynomials. Default is 3.
+    ridge : float, optional
+        Ridge (Tikhonov) regularization of the least squares problem. Default is 0.
+    names : list of str, optional
+        Names of the parameters.
+
+    Returns
+    -------
+    All returns are attributes!
+    indices : ndarray
+        Multi-indices of the polynomials with shape (n_terms, D).
+    coef : ndarray
+        Coefficients with shape (n_terms, n_out).
+    validation : ValidationResult or None
+        See Emulator.
+
+    See Also
+    --------
+    Emulator
+    GaussianProcess
+    """
+
+    kind = 'polynomial_chaos'
+
+    def __init__(self, bounds, degree=3, ridge=0., names=None):
+        super(PolynomialChaos, self).__init__(bounds, names)
+
+        self.degree = degree
+        self.ridge = ridge
+        self.indices = multi_indices(self.D, self.degree)
+        self.coef = None
+
+    def __design(self, x):
+        values = legendre(x, self.degree)
+        return np.prod(values[:, np.arange(self.D), self.indices], axis=-1)
+
+    def _train(self, x, y):
+        if len(x) < len(self.indices):
+            raise ValueError("A polynomial chaos expansion of degree {0} in {1} variables needs at least {2} samples. "
+                             "The actual number is {3}".format(str(self.degree), str(self.D), str(len(self.indices)),
+                                                               str(len(x))))
+
+        design = self.__design(x)
+
+        if self.ridge > 0:
+            self.coef = np.linalg.solve(np.dot(design.T, design) + self.ridge * np.eye(len(self.indices)),
+                                        np.dot(design.T, y))
+        else:
+            self.coef = np.linalg.lstsq(design, y, rcond=None)[0]
+
+    def _predict(self, x):
+        return np.dot(self.__design(x), self.coef)
+
+    def _state(self):
+        return dict(degree=np.array(self.degree), ridge=np.array(self.ridge), coef=self.coef)
+
+    def _load_state(self, data):
+        self.degree = int(data['degree'])
+        self.ridge = float(data['ridge'])
+        self.indices = multi_indices(self.D, self.degree)
+        self.coef = data['coef']
@@ -0,0 +1,387 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import itertools
+import json
+import os
+import sys
+
+import numpy as np
+
+from ..core import ReflectanceResult, ValidationResult, linear
+from ..core.parallel import chunks, imap_chunks
+from ..models import I2EMFunction
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+def interval_error(axis, values, dim):
+    """
+    Estimate of the error of a linear interpolation on each interval of an axis.
+
+    The error on the interval [x_j, x_j+1] is about h_j ** 2 / 8 * |f''|, where the second derivative is approximated
+    with finite differences at the interior nodes of the axis. Non finite values are ignored.
+
+    Parameters
+    ----------
+    axis : array_like
+        Nodes of the axis with shape (n,).
+    values : array_like
+        Tabulated values with the axis in dimension `dim`.
+    dim : int
+        Dimension of the axis in `values`.
+
+    Returns
+    -------
+    error : ndarray
+        Maximal estimated error of each interval with shape (n - 1,). The error can not be estimated with less than
+        three nodes and is zero then.
+    """
+    axis = np.asarray(axis, dtype=np.float64)
+    h = np.diff(axis)
+
+    if len(axis) < 3:
+        return np.zeros_like(h)
+
+    values = np.moveaxis(np.asarray(values, dtype=np.float64), dim, 0)
+    shape = (-1,) + (1,) * (values.ndim - 1)
+    h0, h1 = h[:-1].reshape(shape), h[1:].reshape(shape)
+
+    with np.errstate(invalid='ignore', over='ignore'):
+        curvature = np.abs(2 * (h0 * values[2:] - (h0 + h1) * values[1:-1] + h1 * values[:-2]) /
+                           (h0 * h1 * (h0 + h1)))
+
+    curvature = np.where(np.isfinite(curvature), curvature, 0).reshape(len(axis) - 2, -1).max(axis=1)
+
+    # each interval takes the larger curvature of its nodes
+    nodes = np.concatenate([curvature[:1], curvature, curvature[-1:]])
+
+    return h ** 2 / 8 * np.maximum(nodes[:-1], nodes[1:])
+
+
+class I2EMTable(object):
+    """
+    Lookup table of the I2EM backscatter with a multilinear interpolation.
+
+    The backscatter coefficients VV and HH in [dB] are tabulated on a regular (not necessarily equidistant) grid of
+    the incidence angle, the real and imaginary part of the dielectric constant and the roughness ks = k * sigma and
+    kl = k * corrlength, where k is the wavenumber. I2EM depends on frequency, sigma and corrlength only through ks
+    and kl, so that a table is valid for all frequencies. The values may be a numpy.memmap, queries only read the
+    grid cells they need.
+
+    Parameters
+    ----------
+    axes : sequence of array_like
+        Ascending nodes of the axes iza [DEG], eps_real, eps_imag, ks and kl with at least two nodes each.
+    values : array_like
+        VV and HH in [dB] with shape (n_iza, n_eps_real, n_eps_imag, n_ks, n_kl, 2). This may be a numpy.memmap.
+    n, corrfunc, monostatic :
+        See I2EM. If monostatic is False, the table is calculated with vza = iza and raa = 180.
+    error : float, optional
+        Estimated maximal error of the interpolation in [dB] (see I2EMTable.build).
+
+    Returns
+    -------
+    All returns are attributes!
+    axes : list of ndarray
+        Nodes of the axes.
+    values : array_like
+        The table.
+    error : float or None
+        Estimated maximal error of the interpolation in [dB].
+
+    See Also
+    --------
+    I2EMTable.build
+    I2EMTable.load
+    I2EMTable.interpolate
+    pyrism.models.I2EM
+    """
+
+    names = ('iza', 'eps_real', 'eps_imag', 'ks', 'kl')
+
+    # with this frequency the wavenumber is 1 and sigma and corrlength are ks and kl
+    frequency = 15 / np.pi
+
+    def __init__(self, axes, values, n=10, corrfunc='exponential', monostatic=True, error=None):
+        self.axes = [np.asarray(axis, dtype=np.float64) for axis in axes]
+        self.values = values
+
+        if len(self.axes) != len(self.names):
+            raise AssertionError("The number of axes ({0}) must be {1}".format(str(len(self.axes)),
+                                                                            str(len(self.names))))
+
+        for name, axis in zip(self.names, self.axes):
+            if axis.ndim != 1 or len(axis) < 2 or np.any(np.diff(axis) <= 0):
+                raise ValueError("The axis {} must be ascending with at least two nodes".format(name))
+
+        shape = tuple(len(axis) for axis in self.axes) + (2,)
+        if self.values.shape != shape:
+            raise AssertionError("The shape of values {0} must be {1}".format(str(self.values.shape), str(shape)))
+
+        self.n = n
+        self.corrfunc = corrfunc
+        self.monostatic = monostatic
+        self.error = error
+
+    @classmethod
+    def build(cls, iza, eps_real, eps_imag, ks, kl, accuracy=None, max_iterations=5, max_size=2 ** 24,
+              filename=None, n=10, corrfunc='exponential', monostatic=True, dtype=np.float32, chunk_size=64,
+              processes=None):
+        """
+        Calculate a table with I2EM.
+
+        If an accuracy is given, the axes are refined: a node is inserted in the middle of each interval whose
+        estimated interpolation error (see interval_error) exceeds the accuracy, and only the new grid nodes are
+        calculated. This is repeated until the estimated error meets the accuracy, the table would exceed `max_size`
+        grid nodes or after `max_iterations` refinements. The estimate needs at least three nodes per axis.
+
+        Parameters
+        ----------
+        iza, eps_real, eps_imag, ks, kl : array_like
+            Initial nodes of the axes (see I2EMTable).
+        accuracy : float, optional
+            Target of the maximal interpolation error in [dB]. If None (default), the axes are not refined.
+        max_iterations : int, optional
+            Maximal number of refinements. Default is 5.
+        max_size : int, optional
+            Maximal number of grid nodes. Default is 2 ** 24.
+        filename : str, optional
+            Directory in which the table is stored as memory-mapped array (values.npy and table.json). If None
+            (default), the table is kept in memory.
+        n, corrfunc, monostatic :
+            See I2EM.
+        dtype : numpy.dtype, optional
+            Type of the stored values. Default is float32.
+        chunk_size : int, optional
+            Number of (eps_real, eps_imag, ks, kl) combinations per block of the batch runner. Default is 64.
+        processes : int or None, optional
+            Number of worker processes. If None (default) all blocks are evaluated in the current process.
+
+        Returns
+        -------
+        I2EMTable
+        """
+        axes = [np.unique(np.asarray(axis, dtype=np.float64)) for axis in (iza, eps_real, eps_imag, ks, kl)]
+        table = cls(axes, np.full(tuple(len(axis) for axis in axes) + (2,), np.nan), n, corrfunc, monostatic)
+        table.__fill(np.ones(table.values.shape[1:-1], dtype=bool), chunk_size, processes)
+
+        for iteration in srange(max_iterations + 1):
+            errors = [interval_error(axis, table.values, dim) for dim, axis in enumerate(table.axes)]
+            table.error = float(max(error.max() for error in errors))
+
+            if accuracy is None or table.error <= accuracy or iteration == max_iterations:
+                break
+
+            refined = [np.union1d(axis, ((axis[:-1] + axis[1:]) / 2)[error > accuracy])
+                       for axis, error in zip(table.axes, errors)]
+
+            if np.prod([len(axis) for axis in refined]) > max_size:
+                break
+
+            table = table.__refine(refined, chunk_size, processes)
+
+        values = table.values.astype(dtype)
+
+        if filename is not None:
+            if not os.path.isdir(filename):
+                os.makedirs(filename)
+
+            table.values = np.lib.format.open_memmap(os.path.join(filename, 'values.npy'), mode='w+', dtype=dtype,
+                                                     shape=values.shape)
+            table.values[:] = values
+            table.values.flush()
+
+            with open(os.path.join(filename, 'table.json'), 'w') as stream:
+                json.dump(dict(axes=[axis.tolist() for axis in table.axes], n=n, corrfunc=corrfunc,
+                               monostatic=monostatic, error=table.error), stream)
+        else:
+            table.values = values
+
+        return table
+
+    @classmethod
+    def load(cls, filename, mmap_mode='r'):
+        """
+        Load a table which was stored with I2EMTable.build.
+
+        Parameters
+        ----------
+        filename : str
+            Directory of the table.
+        mmap_mode : {None, 'r', 'r+', 'c'}, optional
+            Memory-map mode of the values (see numpy.load). Default is 'r'.
+
+        Returns
+        -------
+        I2EMTable
+        """
+        with open(os.path.join(filename, 'table.json')) as stream:
+            meta = json.load(stream)
+
+        values = np.load(os.path.join(filename, 'values.npy'), mmap_mode=mmap_mode)
+
+        return cls(meta['axes'], values, meta['n'], meta['corrfunc'], meta['monostatic'], meta['error'])
+
+    def function(self, iza):
+        """
+        I2EM as batched model function of the parameters eps_real, eps_imag, ks and kl (see
+        pyrism.models.I2EMFunction) with the settings of the table. The output are VV and HH in [dB].
+        """
+        return I2EMFunction(iza, iza, 180., names=('eps_real', 'eps_imag', 'sigma', 'corrlength'),
+                            fixed=dict(frequency=self.frequency), output=('VVdB', 'HHdB'), n=self.n,
+                            corrfunc=self.corrfunc, normalize=False, monostatic=self.monostatic)
+
+    def __fill(self, missing, chunk_size, processes):
+        """Calculate all angles of the (eps_real, eps_imag, ks, kl) combinations where missing is True."""
+        index = np.nonzero(missing)
+        params = np.column_stack([axis[item] for axis, item in zip(self.axes[1:], index)])
+        func = self.function(self.axes[0])
+
+        for item, result in imap_chunks(func, params, chunk_size, processes):
+            result = result.reshape(len(result), 2, len(self.axes[0]))
+            rows = tuple(dim[item] for dim in index)
+            self.values[(slice(None),) + rows] = np.transpose(result, (2, 0, 1))
+
+    def __refine(self, axes, chunk_size, processes):
+        """Table on refined axes which keeps the calculated nodes of this table."""
+        table = type(self)(axes, np.full(tuple(len(axis) for axis in axes) + (2,), np.nan), self.n, self.corrfunc,
+                           self.monostatic)
+
+        # the positions of the old nodes in the new axes
+        positions = [np.searchsorted(new, old) for new, old in zip(axes, self.axes)]
+
+        if len(axes[0]) == len(self.axes[0]):
+            table.values[np.ix_(*positions)] = self.values
+            known = np.zeros(table.values.shape[1:-1], dtype=bool)
+            known[np.ix_(*positions[1:])] = True
+        else:
+            # all combinations need the new angles
+            known = np.zeros(table.values.shape[1:-1], dtype=bool)
+
+        table.__fill(~known, chunk_size, processes)
+
+        return table
+
+    def interpolate(self, params, chunk_size=16384):
+        """
+        Interpolate the table.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameters iza [DEG], eps_real, eps_imag, ks and kl with shape (n_samples, 5).
+        chunk_size : int, optional
+            Number of samples which are interpolated at once. Default is 16384.
+
+        Returns
+        -------
+        values : ndarray
+            VV and HH in [dB] with shape (n_samples, 2). Samples outside of the table are NaN.
+        """
+        params = np.asarray(params, dtype=np.float64).reshape(-1, len(self.names))
+        n_samples = len(params)
+
+        shape = self.values.shape[:-1]
+        strides = [int(np.prod(shape[dim + 1:])) for dim in srange(len(shape))]
+        offsets = np.dot(list(itertools.product((0, 1), repeat=len(shape))), strides)
+
+        # VV and HH of a grid node are read at once as real and imaginary part of a complex number
+        values = np.ascontiguousarray(self.values)
+        values = values.view(np.result_type(values.dtype, np.complex64)).reshape(-1)
+
+        output = np.empty((n_samples, 2))
+
+        for item in chunks(n_samples, chunk_size):
+            x = params[item].T.copy()  # one contiguous row per axis
+            index = np.zeros(x.shape[1], dtype=np.intp)
+            fractions = []
+
+            for dim, (axis, stride) in enumerate(zip(self.axes, strides)):
+                # position in units of the nodes, NaN outside of the axis
+                position = np.interp(x[dim], axis, np.arange(len(axis)), left=np.nan, right=np.nan)
+                lower = np.fmax(np.fmin(np.floor(position), len(axis) - 2), 0)
+
+                index += lower.astype(np.intp) * stride
+                fractions.append(position - lower)
+
+            # the corners of the cells are reduced axis by axis, starting with the last axis
+            result = values[offsets[:, np.newaxis] + index]
+
+            for fraction in fractions[::-1]:
+                result = result.reshape(-1, 2, x.shape[1])
+                result = result[:, 0] + (result[:, 1] - result[:, 0]) * fraction
+
+            output[item, 0] = result[0].real
+            output[item, 1] = result[0].imag
+
+        return output
+
+    def __call__(self, iza, frequency, diel_constant, sigma, corrlength, chunk_size=16384):
+        """
+        Interpolate the backscatter of I2EM.
+
+        Parameters
+        ----------
+        iza : int, float or array_like
+            Incidence zenith angle in [DEG].
+        frequency : int, float or array_like
+            Frequency (GHz).
+        diel_constant : int, float, complex or array_like
+            Complex dielectric constant of soil.
+        sigma, corrlength : int, float or array_like
+            RMS height and correlation length of the surface (cm).
+        chunk_size : int, optional
+            See interpolate.
+
+        The parameters are broadcast against each other.
+
+        Returns
+        -------
+        ReflectanceResult
+            VV, HH, VVdB and HHdB with the broadcast shape of the parameters.
+        """
+        k = 2 * np.pi * np.asarray(frequency, dtype=np.float64) / 30
+        diel_constant = np.asarray(diel_constant, dtype=np.complex128)
+
+        params = np.broadcast_arrays(iza, diel_constant.real, diel_constant.imag, k * np.asarray(sigma),
+                                     k * np.asarray(corrlength))
+        shape = params[0].shape
+
+        values = self.interpolate(np.column_stack([np.ravel(item) for item in params]), chunk_size)
+        VVdB, HHdB = values[:, 0].reshape(shape), values[:, 1].reshape(shape)
+
+        return ReflectanceResult(VV=linear(VVdB), HH=linear(HHdB), VVdB=VVdB, HHdB=HHdB)
+
+    def validate(self, n_samples=100, seed=None):
+        """
+        Compare the interpolation with I2EM at random points of the table.
+
+        Parameters
+        ----------
+        n_samples : int, optional
+            Number of random points. Default is 100.
+        seed : int, optional
+            Seed of the random number generator.
+
+        Returns
+        -------
+        ValidationResult
+            Errors of VV and HH in [dB].
+        """
+        rng = np.random.RandomState(seed)
+        bounds = np.array([(axis[0], axis[-1]) for axis in self.axes])
+        params = bounds[:, 0] + rng.random_sample((n_samples, len(bounds))) * (bounds[:, 1] - bounds[:, 0])
+
+        outputs = np.concatenate([self.function(row[0])(row[1:]) for row in params])
+        error = self.interpolate(params) - outputs
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r2 = 1 - np.sum(error ** 2, axis=0) / np.sum((outputs - outputs.mean(axis=0)) ** 2, axis=0)
+
+        return ValidationResult(rmse=np.sqrt(np.mean(error ** 2, axis=0)), mae=np.mean(np.abs(error), axis=0),
+                                max_error=np.max(np.abs(error), axis=0), r2=r2, N=n_samples)
@@ -0,0 +1 @@
+from .lut import LUT
@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import os
+import sys
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from ..core import InversionResult
+from ..core.parallel import imap_chunks
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+class LUT(object):
+    """
+    Lookup table (LUT) inversion of a model with a k-nearest-neighbour search.
+
+    The simulated observables of the LUT are indexed with a KD-tree. Each observation is inverted with a query of the
+    k nearest simulations and the parameters of these simulations are averaged with the inverse of their cost as
+    weights.
+
+    Parameters
+    ----------
+    params : array_like
+        Parameters of the LUT with shape (n_samples, n_params). This may be a numpy.memmap.
+    observables : array_like
+        Simulated observables of the LUT with shape (n_samples, n_obs). This may be a numpy.memmap.
+    names : list of str, optional
+        Names of the parameters.
+    scale : boolean, optional
+        If True, all observables are divided by their standard deviation in the LUT before the index is built, so
+        that each observable has the same weight. Default is False.
+
+    Returns
+    -------
+    All returns are attributes!
+    params, observables : array_like
+        The LUT.
+    tree : scipy.spatial.cKDTree
+        Spatial index over the (scaled) observables.
+
+    See Also
+    --------
+    LUT.generate
+    LUT.load
+    LUT.invert
+    pyrism.core.InversionResult
+    """
+
+    def __init__(self, params, observables, names=None, scale=False):
+        self.params = params
+        self.observables = observables
+
+        if len(self.params) != len(self.observables):
+            raise AssertionError("The length of params ({0}) and observables ({1}) must agree".format(
+                str(len(self.params)), str(len(self.observables))))
+
+        self.n_params = self.params.shape[1]
+        self.n_obs = self.observables.shape[1]
+
+        if names is None:
+            names = ['x{}'.format(i + 1) for i in srange(self.n_params)]
+        self.names = list(names)
+
+        if scale:
+            self.scale = np.std(self.observables, axis=0)
+            self.scale[self.scale == 0] = 1.
+        else:
+            self.scale = np.ones(self.n_obs)
+
+        self.tree = cKDTree(self.observables / self.scale)
+
+    @classmethod
+    def generate(cls, func, bounds, n_samples, filename=None, names=None, scale=False, chunk_size=1024,
+                 processes=None, seed=None):
+        """
+        Generate a LUT from a batched model function.
+
+        The parameters are drawn uniformly within the bounds. The model is evaluated with the batch runner
+        (pyrism.core.parallel) and the outputs are written chunk by chunk.
+
+        Parameters
+        ----------
+        func : callable
+            Batched model function which maps a parameter matrix with shape (n, n_params) to observables with shape
+            (n, n_obs), e.g. pyrism.models.PROSAILFunction or pyrism.models.I2EMFunction.
+        bounds : array_like
+            Lower and upper bounds of the parameters with shape (n_params, 2).
+        n_samples : int
+            Number of LUT entries.
+        filename : str, optional
+            Directory in which the LUT is stored as memory-mapped arrays (params.npy, observables.npy and names.txt).
+            If None (default), the LUT is kept in memory.
+        names : list of str, optional
+            Names of the parameters. If func has an attribute `names`, these are used by default.
+        scale : boolean, optional
+            See LUT.
+        chunk_size : int, optional
+            Number of samples per block. Default is 1024.
+        processes : int or None, optional
+            Number of worker processes. If None (default) all blocks are evaluated in the current process.
+        seed : int, optional
+            Seed of the random number generator.
+
+        Returns
+        -------
+        LUT
+        """
+        bounds = np.asarray(bounds, dtype=np.float64)
+        rng = np.random.RandomState(seed)
+
+        if names is None:
+            names = getattr(func, 'names', None)
+
+        sample = bounds[:, 0] + rng.random_sample((n_samples, len(bounds))) * (bounds[:, 1] - bounds[:, 0])
+
+        if filename is not None:
+            if not os.path.isdir(filename):
+                os.makedirs(filename)
+
+            params = np.lib.format.open_memmap(os.path.join(filename, 'params.npy'), mode='w+',
+                                               dtype=np.float64, shape=sample.shape)
+            params[:] = sample
+        else:
+            params = sample
+
+        observables = None
+        for item, result in imap_chunks(func, params, chunk_size, processes):
+            result = result.reshape(len(result), -1)
+
+            if observables is None:
+                shape = (n_samples, result.shape[1])
+                if filename is not None:
+                    observables = np.lib.format.open_memmap(os.path.join(filename, 'observables.npy'), mode='w+',
+                                                            dtype=result.dtype, shape=shape)
+                else:
+                    observables = np.empty(shape, dtype=result.dtype)
+
+            observables[item] = result
+
+        if filename is not None:
+            if names is not None:
+                with open(os.path.join(filename, 'names.txt'), 'w') as names_file:
+                    names_file.write('\n'.join(names))
+
+            params.flush()
+            observables.flush()
+
+        return cls(params, observables, names, scale)
+
+    @classmethod
+    def load(cls, filename, scale=False, mmap_mode='r'):
+        """
+        Load a LUT which was stored with LUT.generate.
+
+        Parameters
+        ----------
+        filename : str
+            Directory of the LUT.
+        scale : boolean, optional
+            See LUT.
+        mmap_mode : {None, 'r', 'r+', 'c'}, optional
+            Memory-map mode of the arrays (see numpy.load). Default is 'r'.
+
+        Returns
+        -------
+        LUT
+        """
+        params = np.load(os.path.join(filename, 'params.npy'), mmap_mode=mmap_mode)
+        observables = np.load(os.path.join(filename, 'observables.npy'), mmap_mode=mmap_mode)
+
+        names = None
+        if os.path.exists(os.path.join(filename, 'names.txt')):
+            with open(os.path.join(filename, 'names.txt')) as names_file:
+                names = names_file.read().split('\n')
+
+        return cls(params, observables, names, scale)
+
+    def invert(self, observations, k=10, chunk_size=65536):
+        """
+        Invert observations with the LUT.
+
+        Parameters
+        ----------
+        observations : array_like
+            Observations with shape (n_observations, n_obs).
+        k : int, optional
+            Number of nearest simulations which are averaged. Default is 10.
+        chunk_size : int, optional
+            Number of observations which are queried at once. Default is 65536.
+
+        Returns
+        -------
+        InversionResult
+
+        See Also
+        --------
+        pyrism.core.InversionResult
+        """
+        observations = np.asarray(observations, dtype=np.float64)
+        observations = observations.reshape(-1, self.n_obs)
+
+        n = len(observations)
+        k = min(k, len(self.params))
+
+        estimate = np.empty((n, self.n_params))
+        std = np.empty((n, self.n_params))
+        cost = np.empty(n)
+
+        for start in srange(0, n, chunk_size):
+            stop = min(start + chunk_size, n)
+            distance, index = self.tree.query(observations[start:stop] / self.scale, k=k)
+
+            distance = distance.reshape(stop - start, k)
+            index = index.reshape(stop - start, k)
+
+            # cost is the mean squared difference between observation and simulation
+            costs = distance ** 2 / self.n_obs
+
+            with np.errstate(divide='ignore'):
+                weights = 1. / costs
+            exact = np.isinf(weights)
+            weights = np.where(exact.any(axis=1)[:, np.newaxis], exact.astype(np.float64), weights)
+            weights /= weights.sum(axis=1)[:, np.newaxis]
+
+            values = np.asarray(self.params[index.flatten()]).reshape(stop - start, k, self.n_params)
+            mean = np.einsum('ij,ijk->ik', weights, values)
+
+            estimate[start:stop] = mean
+            std[start:stop] = np.sqrt(np.einsum('ij,ijk->ik', weights, (values - mean[:, np.newaxis]) ** 2))
+            cost[start:stop] = costs[:, 0]
+
+        return InversionResult(names=self.names, params=estimate, std=std, cost=cost)
@@ -1,6 +1,8 @@
 from .library import get_data_one, get_data_two
 from .models import (VolScatt, LIDF, PROSPECT, Rayleigh, Mie, DielConstant, CorrFunc, exponential, gaussian, xpower,
                      I2EM, LSM, SAIL)
+from .batch import (PROSAILFunction, I2EMFunction, Workspace, band_mean)
+from . import batch
 
 try:
     lib = get_data_two()
@@ -0,0 +1,1478 @@
+# -*- coding: utf-8 -*-
+"""
+Batched (vectorized) versions of the optical models and model functions for the batch runner.
+
+The functions in this module evaluate many parameter states in one call. All parameters are broadcast to a sample
+axis, so that the continuous spectra are returned with shape (n_samples, 2101).
+"""
+from __future__ import division
+
+import sys
+
+import numpy as np
+from scipy.special import expi
+
+from .library import get_data_one, get_data_two
+from .models import VolScatt, LIDF, I2EM, _sail, _hotspot_calculations
+from ..core import Geometry, ReflectanceResult, SailResult, AlbedoResult
+from ..core import dual
+from ..core.auxiliary import float_dtype
+from ..core.dual import Dual
+
+try:
+    lib = get_data_two()
+except IOError:
+    lib = get_data_one()
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+# Wavelength ranges (nm) of the ASTER (B1 - B9) and LANDSAT 8 (B2 - B7) bands
+ASTER = ((520, 600), (630, 690), (760, 860), (1600, 1700), (2145, 2185), (2185, 2225), (2235, 2285), (2295, 2365),
+         (2360, 2430))
+L8 = ((452, 452 + 60), (533, 533 + 57), (636, 636 + 37), (851, 851 + 28), (1566, 1566 + 85), (2107, 2107 + 187))
+
+# Differentiable parameters of the jacobian mode
+PROSPECT_PARAMETERS = ('N', 'Cab', 'Cxc', 'Cbr', 'Cw', 'Cm', 'Can')
+SAIL_PARAMETERS = ('lai', 'hotspot')
+
+
+def _column(value, dtype=np.float64):
+    """Convert a parameter to a column vector with shape (n, 1)."""
+    return np.asarray(value, dtype=dtype).reshape(-1, 1)
+
+
+def _states(states, names):
+    """Convert states (a parameter matrix or a dict of parameter arrays) to a parameter matrix."""
+    if isinstance(states, dict):
+        missing = [name for name in names if name not in states]
+        if missing:
+            raise ValueError("The states of the parameters {} are missing".format(str(missing)))
+
+        return np.column_stack([np.asarray(states[name], dtype=np.float64).ravel() for name in names])
+
+    return states
+
+
+class Workspace(object):
+    """
+    Scratch buffers of the batched models which are reused across calls.
+
+    A buffer is allocated on its first request and again only if the requested shape or dtype changes, so that the
+    repeated evaluation of equally sized parameter blocks (e.g. the iterations of an inversion) does not allocate the
+    intermediate spectra. Together with the `out` arguments of prospect, lsm, sail and the model functions, a call does
+    not allocate any array with the size of the spectra. A workspace must not be shared by concurrent calls.
+
+    Returns
+    -------
+    All returns are attributes!
+    buffers : dict
+        Scratch buffers by name.
+    nbytes : int
+        Memory of the scratch buffers in bytes.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.constants = {}
+
+    def __call__(self, name, shape, dtype=np.float64):
+        """
+        Scratch buffer with uninitialized values.
+
+        Parameters
+        ----------
+        name : str
+            Name of the buffer. Buffers with different names never share memory.
+        shape : tuple
+            Shape of the buffer.
+        dtype : data-type, optional
+            Data type of the buffer. Default is float64.
+
+        Returns
+        -------
+        buffer : ndarray
+        """
+        buffer = self.buffers.get(name)
+
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = self.buffers[name] = np.empty(shape, dtype=dtype)
+
+        return buffer
+
+    def constant(self, key, func, *args):
+        """Value of func(*args), which is calculated once per key."""
+        if key not in self.constants:
+            self.constants[key] = func(*args)
+
+        return self.constants[key]
+
+    @property
+    def nbytes(self):
+        return sum(item.nbytes for item in self.buffers.values())
+
+
+def _outputs(out, names, shape, dtype):
+    """Check the arrays of a result (out) which are overwritten or allocate them."""
+    if out is None:
+        return dict((name, np.empty(shape, dtype=dtype)) for name in names)
+
+    for name in names:
+        if out[name].shape != shape or out[name].dtype != dtype:
+            raise ValueError("out.{0} must have the shape {1} and the dtype {2}. The actual shape is {3} and the "
+                             "actual dtype is {4}".format(name, str(shape), str(dtype), str(out[name].shape),
+                                                          str(out[name].dtype)))
+
+    return out
+
+
+def _bands(bands):
+    if isinstance(bands, str):
+        if bands == 'ASTER':
+            return ASTER
+        elif bands == 'L8':
+            return L8
+        else:
+            raise ValueError("bands must be 'ASTER', 'L8' or a sequence of wavelength ranges")
+
+    return tuple(tuple(item) for item in bands)
+
+
+def band_mean(spectra, bands, out=None):
+    """
+    Average continuous spectra from 400 until 2500 nm over bands.
+
+    Parameters
+    ----------
+    spectra : array_like
+        Spectra with shape (..., 2101).
+    bands : {'ASTER', 'L8'} or sequence of tuple
+        Sensor name or lower and upper bounds of the bands in nm.
+    out : ndarray, optional
+        C-contiguous array with shape (..., n_bands) and the dtype of the result in to which the band values are
+        written.
+
+    Returns
+    -------
+    Band values : ndarray
+        Array with shape (..., n_bands) in the precision of the spectra (float32 or float64).
+    """
+    bands = _bands(bands)
+
+    spectra = np.asarray(spectra)
+
+    return np.dot(spectra, _band_weights(bands, np.result_type(spectra.dtype, np.float32)).T, out=out)
+
+
+def _band_weights(bands, dtype):
+    """Weights of the continuous spectra in the band means with shape (n_bands, 2101)."""
+    l = np.arange(400, 2501)
+    weights = np.asarray([(l >= mins) & (l <= maxs) for mins, maxs in bands], dtype=np.float64)
+    weights /= weights.sum(axis=1)[:, np.newaxis]
+
+    return weights.astype(dtype, copy=False)
+
+
+# ---- LSM ----
+def lsm(reflectance, moisture, bands=None, dtype=np.float64, out=None, workspace=None):
+    """
+    Batched LSM model. The soil brightness and moisture may be scalars or arrays with a length of n_samples. Arrays
+    with more dimensions (e.g. fields of pixels) are flattened.
+
+    Parameters
+    ----------
+    reflectance, moisture : int, float or array_like
+        Surface (Lambertian) reflectance and surface moisture content between 0 and 1. See LSM.
+    bands : {None, 'ASTER', 'L8'} or sequence of tuple, optional
+        If not None, only the band means (see band_mean) are calculated and the continuous spectra are never built.
+        Default is None.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of all returns. Default is float64.
+    out : ReflectanceResult, optional
+        Result of a previous call with the same number of samples, bands and dtype. Its reflectance is overwritten and
+        it is returned.
+    workspace : Workspace, optional
+        Cache of the soil spectra, which is reused across calls.
+
+    Returns
+    -------
+    ReflectanceResult with the attributes l and ref. The spectra have the shape (n_samples, 2101) and can be used as
+    rho_surface of sail. If bands is not None, ref has the shape (n_samples, n_bands) and l is replaced by bands.
+
+    See Also
+    --------
+    LSM
+    """
+    dtype = float_dtype(dtype)
+    reflectance, moisture = _column(reflectance, dtype), _column(moisture, dtype)
+
+    if bands is None:
+        result = ReflectanceResult(l=np.arange(400, 2501))
+        n_out = 2101
+    else:
+        bands = _bands(bands)
+        result = ReflectanceResult(bands=bands)
+        n_out = len(bands)
+
+    if out is not None or workspace is not None:
+        result.update(_outputs(out, ('ref',), (max(len(reflectance), len(moisture)), n_out), dtype))
+        _soil_into(reflectance, moisture, workspace or Workspace(), result['ref'], bands)
+
+        if out is None:
+            return result
+
+        out.update(result)
+        return out
+
+    result.ref = _soil(reflectance, moisture, dtype, bands)
+
+    return result
+
+
+# ---- PROSPECT ----
+def _calctav(alpha, KN):
+    """
+    Transmission of isotropic radiation across an interface between two dielectrics (Stern F. (1964), Allen W.A.
+    (1973)).
+    """
+    n2 = KN * KN
+    npx = n2 + 1
+    nm = n2 - 1
+    a = (KN + 1) * (KN + 1) / 2.
+    k = -(n2 - 1) * (n2 - 1) / 4.
+    # In the precision of the spectra (a float64 scalar would promote float32 spectra)
+    sa = np.sin(np.deg2rad(alpha)).astype(np.result_type(KN, np.float32))
+
+    if alpha != 90:
+        b1 = np.sqrt((sa * sa - npx / 2) * (sa * sa - npx / 2) + k)
+    else:
+        b1 = 0.
+    b2 = sa * sa - npx / 2
+    b = b1 - b2
+    b3 = b ** 3
+    a3 = a ** 3
+    ts = (k ** 2 / (6 * b3) + k / b - b / 2) - (k ** 2. / (6 * a3) + k / a - a / 2)
+
+    tp1 = -2 * n2 * (b - a) / (npx ** 2)
+    tp2 = -2 * n2 * npx * np.log(b / a) / (nm ** 2)
+    tp3 = n2 * (1 / b - 1 / a) / 2
+    tp4 = 16 * n2 ** 2 * (n2 ** 2 + 1) * np.log((2 * npx * b - nm ** 2) / (2 * npx * a - nm ** 2)) / (
+            npx ** 3 * nm ** 2)
+    tp5 = 16 * n2 ** 3 * (1. / (2 * npx * b - nm ** 2) - 1 / (2 * npx * a - nm ** 2)) / (npx ** 3)
+    tp = tp1 + tp2 + tp3 + tp4 + tp5
+
+    return (ts + tp) / (2 * sa ** 2)
+
+
+def _spectra(version, dtype=np.float64):
+    if version == '5':
+        spectra = lib.p5.KN, lib.p5.Kab, lib.p5.Kxc, lib.p5.Kbr, lib.p5.Kw, lib.p5.Km, np.zeros_like(lib.p5.Km)
+    elif version == 'D':
+        spectra = lib.pd.KN, lib.pd.Kab, lib.pd.Kxc, lib.pd.Kbr, lib.pd.Kw, lib.pd.Km, lib.pd.Kan
+    else:
+        raise ValueError("version must be '5' for PROSPECT 5 or 'D' for PROSPECT D. "
+                         "The actual version is: {}".format(str(version)))
+
+    # The spectral library is stored in float32
+    return [item.astype(dtype, copy=False) for item in spectra]
+
+
+def _soil_spectra(dtype, bands=None):
+    """Dry and wet soil spectra or, if bands is not None, their band means (the LSM is linear in the spectra)."""
+    if bands is None:
+        return [item.astype(dtype, copy=False) for item in lib.soil]
+
+    return [band_mean(item.astype(dtype, copy=False), bands) for item in lib.soil]
+
+
+def _soil(reflectance, moisture, dtype=np.float64, bands=None):
+    rsoil1, rsoil2 = _soil_spectra(dtype, bands)
+
+    return reflectance * (moisture * rsoil1 + (1 - moisture) * rsoil2)
+
+
+def _soil_into(reflectance, moisture, workspace, out, bands=None):
+    """In-place version of _soil for arrays."""
+    rsoil1, rsoil2 = workspace.constant(('soil', bands, out.dtype.str), _soil_spectra, out.dtype, bands)
+    x = workspace('soil.x', out.shape, out.dtype)
+
+    np.multiply(moisture, rsoil1, out=out)
+    np.multiply(1 - moisture, rsoil2, out=x)
+    out += x
+    out *= reflectance
+
+    return out
+
+
+def _prospect(N, Cab, Cxc, Cbr, Cw, Cm, Can, alpha, version, dtype=np.float64):
+    """Leaf reflectance and transmittance. The parameters may be arrays or Dual numbers (see pyrism.core.dual)."""
+    KN, Kab, Kxc, Kbr, Kw, Km, Kan = _spectra(version, dtype)
+
+    if version == 'D' and np.any(Can == 0):
+        raise AssertionError("For PROSPECT version D is the Anthocyanins value mandatory (!=0)")
+
+    kall = (Cab * Kab + Cxc * Kxc + Can * Kan + Cbr * Kbr + Cw * Kw + Cm * Km) / N
+
+    # The leaf optics depend on the parameters only through N and kall
+    return dual.chain(_plates, N, kall, alpha, KN)
+
+
+def _interfaces(alpha, KN):
+    """Transmission and reflection of the leaf surface for the incidence cone alpha and isotropic radiation."""
+    talf = _calctav(alpha, KN)
+    ralf = 1.0 - talf
+    t12 = _calctav(90, KN)
+    r12 = 1. - t12
+    t21 = t12 / (KN * KN)
+    r21 = 1 - t21
+
+    return talf, ralf, t12, r12, t21, r21
+
+
+def _plates(N, kall, alpha, KN):
+    """Reflectance and transmittance of a leaf with N layers and the absorption coefficient kall."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = dual.where(kall > 0, (1 - kall) * dual.exp(-kall) + kall ** 2 * (-dual.expi(-kall)), 1.)
+
+    # reflectance and transmittance of one layer
+    talf, ralf, t12, r12, t21, r21 = _interfaces(alpha, KN)
+
+    denom = 1. - r21 * r21 * tau * tau
+    Ta = talf * tau * t21 / denom
+    Ra = ralf + r21 * tau * Ta
+    t = t12 * tau * t21 / denom
+    r = r12 + r21 * tau * t
+
+    # reflectance and transmittance of N layers
+    with np.errstate(divide='ignore', invalid='ignore'):
+        D = dual.sqrt((1 + r + t) * (1 + r - t) * (1. - r + t) * (1. - r - t))
+        rq = r * r
+        tq = t * t
+        a = (1 + rq - tq + D) / (2 * r)
+        b = (1 - rq + tq + D) / (2 * t)
+
+        bNm1 = dual.power(b, N - 1)
+        bN2 = bNm1 * bNm1
+        a2 = a * a
+        denom = a2 * bN2 - 1
+        Rsub = a * (bN2 - 1) / denom
+        Tsub = bNm1 * (a2 - 1) / denom
+
+        # Case of zero absorption
+        j = r + t >= 1.
+        Tsub = dual.where(j, t / (t + (1 - t) * (N - 1)), Tsub)
+        Rsub = dual.where(j, 1 - Tsub, Rsub)
+
+    denom = 1 - Rsub * r
+
+    kt = Ta * Tsub / denom
+    ks = Ra + Ta * Rsub * t / denom
+
+    return ks, kt
+
+
+def _prospect_constants(alpha, version, dtype):
+    """Spectra and parameter independent terms of the in-place PROSPECT (see _prospect_into)."""
+    spectra = _spectra(version, dtype)
+    talf, ralf, t12, r12, t21, r21 = _interfaces(alpha, spectra[0])
+
+    return spectra, (ralf, r12, r21, r21 * r21, talf * t21, t12 * t21)
+
+
+def _prospect_into(N, Cab, Cxc, Cbr, Cw, Cm, Can, alpha, version, workspace, ks, kt):
+    """
+    In-place version of _prospect for arrays. The leaf reflectance and transmittance are written in to ks and kt and
+    the intermediate spectra use the buffers of the workspace.
+    """
+    dtype = ks.dtype
+    (KN, Kab, Kxc, Kbr, Kw, Km, Kan), interfaces = workspace.constant(('prospect', alpha, version, dtype.str),
+                                                                      _prospect_constants, alpha, version, dtype)
+
+    if version == 'D' and np.any(Can == 0):
+        raise AssertionError("For PROSPECT version D is the Anthocyanins value mandatory (!=0)")
+
+    kall = workspace('prospect.kall', ks.shape, dtype)
+    x = workspace('prospect.x', ks.shape, dtype)
+
+    np.multiply(Cab, Kab, out=kall)
+    for C, K in ((Cxc, Kxc), (Can, Kan), (Cbr, Kbr), (Cw, Kw), (Cm, Km)):
+        np.multiply(C, K, out=x)
+        kall += x
+    kall /= N
+
+    _plates_into(N, kall, interfaces, workspace, ks, kt)
+
+
+def _plates_into(N, kall, interfaces, workspace, ks, kt):
+    """In-place version of _plates (see _prospect_into)."""
+    ralf, r12, r21, r21_2, talf_t21, t12_t21 = interfaces
+    shape, dtype = kall.shape, kall.dtype
+    tau, x, y, denom, Ta, Ra, t, r, rq, tq, a, b, bNm1 = [
+        workspace('prospect.' + name, shape, dtype) for name in ('tau', 'x', 'y', 'denom', 'Ta', 'Ra', 't', 'r',
+                                                                 'rq', 'tq', 'a', 'b', 'bNm1')]
+    mask = workspace('prospect.mask', shape, bool)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # tau = (1 - kall) * exp(-kall) + kall ** 2 * (-expi(-kall)) if kall > 0 else 1
+        np.negative(kall, out=x)
+        expi(x, out=tau)
+        np.multiply(kall, kall, out=y)
+        tau *= y
+        np.negative(tau, out=tau)
+        np.exp(x, out=x)
+        np.subtract(1., kall, out=y)
+        y *= x
+        tau += y
+        np.greater(kall, 0, out=mask)
+        np.logical_not(mask, out=mask)
+        np.copyto(tau, 1., where=mask)
+
+        # reflectance and transmittance of one layer
+        np.multiply(tau, tau, out=denom)
+        denom *= r21_2
+        np.subtract(1., denom, out=denom)
+        np.multiply(tau, talf_t21, out=Ta)
+        Ta /= denom
+        np.multiply(tau, Ta, out=Ra)
+        Ra *= r21
+        Ra += ralf
+        np.multiply(tau, t12_t21, out=t)
+        t /= denom
+        np.multiply(tau, t, out=r)
+        r *= r21
+        r += r12
+
+        # reflectance and transmittance of N layers, D = sqrt((1 + r + t) * (1 + r - t) * (1 - r + t) * (1 - r - t))
+        D = tau
+        np.add(1., r, out=x)
+        np.add(x, t, out=D)
+        x -= t
+        D *= x
+        np.subtract(1., r, out=x)
+        np.add(x, t, out=y)
+        D *= y
+        x -= t
+        D *= x
+        np.sqrt(D, out=D)
+
+        np.multiply(r, r, out=rq)
+        np.multiply(t, t, out=tq)
+        np.add(1., rq, out=a)
+        a -= tq
+        a += D
+        a /= r
+        a /= 2
+        np.subtract(1., rq, out=b)
+        b += tq
+        b += D
+        b /= t
+        b /= 2
+
+        np.power(b, N - 1, out=bNm1)
+        bN2, a2 = x, y
+        np.multiply(bNm1, bNm1, out=bN2)
+        np.multiply(a, a, out=a2)
+        np.multiply(a2, bN2, out=denom)
+        denom -= 1
+
+        Rsub, Tsub = rq, tq
+        np.subtract(bN2, 1., out=Rsub)
+        Rsub *= a
+        Rsub /= denom
+        np.subtract(a2, 1., out=Tsub)
+        Tsub *= bNm1
+        Tsub /= denom
+
+        # Case of zero absorption
+        np.add(r, t, out=x)
+        np.greater_equal(x, 1., out=mask)
+
+        if mask.any():
+            tj = t[mask]
+            Tsub[mask] = tj / (tj + (1 - tj) * (np.broadcast_to(N, shape)[mask] - 1))
+            Rsub[mask] = 1 - Tsub[mask]
+
+    # Reflectance and transmittance of the leaf: combine top layer with next N-1 layers
+    np.multiply(Rsub, r, out=denom)
+    np.subtract(1., denom, out=denom)
+
+    np.multiply(Ta, Tsub, out=kt)
+    kt /= denom
+    np.multiply(Ta, Rsub, out=ks)
+    ks *= t
+    ks /= denom
+    ks += Ra
+
+
+def prospect(N, Cab, Cxc, Cbr, Cw, Cm, Can=0, alpha=40, version='5', jacobian=False, dtype=np.float64, out=None,
+             workspace=None):
+    """
+    Batched PROSPECT D and 5 model. All leaf parameters may be scalars or arrays with a length of n_samples.
+
+    Parameters
+    ----------
+    N, Cab, Cxc, Cbr, Cw, Cm, Can : int, float or array_like
+        Leaf structure parameter, chlorophyll a+b, carotenoids, brown pigments, equivalent water thickness, dry matter
+        and anthocyanins content. See PROSPECT.
+    alpha : int
+        Mean leaf angle (degrees). Default is 40.
+    version : {'5', 'D'}
+        PROSPECT version. Default is '5'.
+    jacobian : bool
+        If True, the derivatives of the spectra with respect to the leaf parameters are calculated in the same pass
+        with forward-mode dual numbers (see pyrism.core.dual). Default is False.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of all returns. Default is float64.
+    out : ReflectanceResult, optional
+        Result of a previous call with the same number of samples and dtype. Its spectra are overwritten and it is
+        returned. Not available with jacobian.
+    workspace : Workspace, optional
+        Scratch buffers of the intermediate spectra, which are reused across calls. Not available with jacobian.
+
+    Returns
+    -------
+    ReflectanceResult with the attributes l, ks, kt, ka, ke and om. The spectra have the shape (n_samples, 2101).
+    If jacobian is True, the attribute jacobian is a ReflectanceResult with the attributes names, ks, kt, ka, ke and
+    om. The derivatives have the shape (n_samples, 2101, 7) and the last axis is ordered like names
+    (N, Cab, Cxc, Cbr, Cw, Cm, Can).
+
+    See Also
+    --------
+    PROSPECT
+    """
+    dtype = float_dtype(dtype)
+    params = [_column(item, dtype) for item in (N, Cab, Cxc, Cbr, Cw, Cm, Can)]
+
+    if out is not None or workspace is not None:
+        if jacobian:
+            raise ValueError("out and workspace are not available with jacobian")
+
+        shape = (max(len(item) for item in params), 2101)
+        result = ReflectanceResult(l=np.arange(400, 2501))
+        result.update(_outputs(out, ('ks', 'kt', 'ka', 'ke', 'om'), shape, dtype))
+
+        _prospect_into(*params, alpha=alpha, version=version, workspace=workspace or Workspace(), ks=result['ks'],
+                       kt=result['kt'])
+
+        np.subtract(1, result['ks'], out=result['ka'])
+        result['ka'] -= result['kt']
+        np.add(result['ks'], result['ka'], out=result['ke'])
+        np.divide(result['ks'], result['ke'], out=result['om'])
+
+        if out is None:
+            return result
+
+        out.update(result)
+        return out
+
+    if jacobian:
+        params = Dual.variables(*params)
+
+    ks, kt = _prospect(*params, alpha=alpha, version=version, dtype=dtype)
+    ka = 1 - ks - kt
+    ke = ks + ka
+    om = ks / ke
+
+    result = ReflectanceResult(l=np.arange(400, 2501), ks=dual.value(ks), kt=dual.value(kt), ka=dual.value(ka),
+                               ke=dual.value(ke), om=dual.value(om))
+
+    if jacobian:
+        result.jacobian = ReflectanceResult(names=list(PROSPECT_PARAMETERS), ks=ks.jacobian(), kt=kt.jacobian(),
+                                            ka=ka.jacobian(), ke=ke.jacobian(), om=om.jacobian())
+
+    return result
+
+
+# ---- SAIL ----
+def _volscatt(iza, vza, raa, lidf_type, a, b, angle_unit):
+    VollScat = VolScatt(iza, vza, raa, angle_unit)
+
+    if isinstance(lidf_type, str) and lidf_type not in LIDF.distributions:
+        raise AssertionError("The lidf_type must be {} or an array of weights".format(
+            ", ".join("'{}'".format(item) for item in LIDF.distributions)))
+
+    VollScat.coef(lidf_type=lidf_type, a=a, b=b)
+
+    return VollScat
+
+
+def _jfunc1_into(k, l, t, ekt, elt, workspace, out):
+    """In-place version of the J1 function of _jfunctions for arrays, ekt and elt are exp(-k * t) and exp(-l * t)."""
+    x, y, delta = [workspace('sail.' + name, out.shape, out.dtype) for name in ('jx', 'jy', 'jdelta')]
+    mask = workspace('sail.jmask', out.shape, bool)
+
+    np.subtract(k, l, out=y)
+    np.multiply(y, t, out=delta)
+    np.copyto(x, elt)
+
+    # (exp(-l * t) - exp(-k * t)) / (k - l)
+    np.subtract(x, ekt, out=out)
+    out /= y
+
+    # 0.5 * t * (exp(-k * t) + exp(-l * t)) * (1. - (del_ ** 2.) / 12.) if abs(del_) <= 1e-3
+    x += ekt
+    x *= 0.5 * t
+    np.multiply(delta, delta, out=y)
+    y /= -12.
+    y += 1.
+    x *= y
+
+    np.abs(delta, out=delta)
+    np.greater(delta, 1e-3, out=mask)
+    np.logical_not(mask, out=mask)
+    np.copyto(out, x, where=mask)
+
+    return out
+
+
+def _jfunc2_into(k, l, ekt, elt, workspace, out):
+    """In-place version of the J2 function of _jfunctions for arrays, ekt and elt are exp(-k * t) and exp(-l * t)."""
+    y = workspace('sail.jy', out.shape, out.dtype)
+
+    # (1 - exp(-(k + l) * t)) / (k + l)
+    np.multiply(ekt, elt, out=out)
+    np.subtract(1., out, out=out)
+    np.add(k, l, out=y)
+    out /= y
+
+    return out
+
+
+def _sail_into(VollScat, ks, kt, lai, hotspot, rho_surface, workspace, rsot, rddt, rsdt, rdot):
+    """
+    In-place version of _sail for arrays. The reflectance factors are written in to rsot, rddt, rsdt and rdot and the
+    intermediate spectra use the buffers of the workspace.
+    """
+    shape, dtype = rsot.shape, rsot.dtype
+
+    # Volume scattering coefficients in the precision of the spectra
+    vks, vko, bf, Fs, Ft = [np.asarray(item, dtype=dtype) for item in (
+        VollScat.ks, VollScat.ko, VollScat.bf, VollScat.Fs, VollScat.Ft)]
+
+    sdb = 0.5 * (vks + bf)
+    sdf = 0.5 * (vks - bf)
+    dob = 0.5 * (vko + bf)
+    dof = 0.5 * (vko - bf)
+    ddb = 0.5 * (1.0 + bf)
+    ddf = 0.5 * (1.0 - bf)
+
+    # The terms of the leaf spectra have the shape of the leaf spectra, all other terms the shape of the output
+    leaf_shape = np.broadcast(ks, kt).shape
+    sigb, sigf, att, m, rinf, rinf2, Ps, Qs, Pv, Qv, w, lx, lc = [
+        workspace('sail.' + name, leaf_shape, dtype) for name in ('sigb', 'sigf', 'att', 'm', 'rinf', 'rinf2', 'Ps',
+                                                                  'Qs', 'Pv', 'Qv', 'w', 'lx', 'lc')]
+    e1, e2, re, denom, J1ks, J2ks, J1ko, J2ko, Pss, Qss, Pvv, Qvv, tdd, rdd, tsd, rsd, tdo, rdo, x, y, rsod = [
+        workspace('sail.' + name, shape, dtype) for name in ('e1', 'e2', 're', 'denom', 'J1ks', 'J2ks', 'J1ko',
+                                                             'J2ko', 'Pss', 'Qss', 'Pvv', 'Qvv', 'tdd', 'rdd', 'tsd',
+                                                             'rsd', 'tdo', 'rdo', 'x', 'y', 'rsod')]
+    leaf_mask = workspace('sail.leaf_mask', leaf_shape, bool)
+
+    def combine(a, b, out):
+        # a * ks + b * kt
+        np.multiply(a, ks, out=out)
+        np.multiply(b, kt, out=lc)
+        out += lc
+
+    combine(ddb, ddf, sigb)
+    combine(ddf, ddb, sigf)
+    for item in (sigf, sigb):
+        np.equal(item, 0., out=leaf_mask)
+        np.copyto(item, 1.e-36, where=leaf_mask)
+
+    np.subtract(1., sigf, out=att)
+    np.multiply(att, att, out=m)
+    np.multiply(sigb, sigb, out=lx)
+    m -= lx
+    np.sqrt(m, out=m)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        np.subtract(att, m, out=rinf)
+        rinf /= sigb
+        np.multiply(rinf, rinf, out=rinf2)
+
+        # Ps = sf + sb * rinf, Qs = sf * rinf + sb, Pv = vf + vb * rinf and Qv = vf * rinf + vb
+        for a, b, out in ((sdb, sdf, Ps), (sdf, sdb, Qs), (dob, dof, Pv), (dof, dob, Qv)):
+            combine(a, b, out)
+            out *= rinf
+            combine(b, a, lx)
+            out += lx
+
+        combine(Fs, Ft, w)
+
+        tss = np.exp(-vks * lai)
+        too = np.exp(-vko * lai)
+
+        np.multiply(m, lai, out=e1)
+        np.negative(e1, out=e1)
+        np.exp(e1, out=e1)
+        np.multiply(e1, e1, out=e2)
+        np.multiply(rinf, e1, out=re)
+        np.multiply(rinf2, e2, out=denom)
+        np.subtract(1., denom, out=denom)
+
+        _jfunc1_into(vks, m, lai, tss, e1, workspace, J1ks)
+        _jfunc2_into(vks, m, tss, e1, workspace, J2ks)
+        _jfunc1_into(vko, m, lai, too, e1, workspace, J1ko)
+        _jfunc2_into(vko, m, too, e1, workspace, J2ko)
+
+        np.multiply(Ps, J1ks, out=Pss)
+        np.multiply(Qs, J2ks, out=Qss)
+        np.multiply(Pv, J1ko, out=Pvv)
+        np.multiply(Qv, J2ko, out=Qvv)
+
+        np.subtract(1., rinf2, out=tdd)
+        tdd *= e1
+        tdd /= denom
+        np.subtract(1., e2, out=rdd)
+        rdd *= rinf
+        rdd /= denom
+
+        for P, Q, t, r in ((Pss, Qss, tsd, rsd), (Pvv, Qvv, tdo, rdo)):
+            # t = (P - re * Q) / denom and r = (Q - re * P) / denom
+            np.multiply(re, Q, out=t)
+            np.subtract(P, t, out=t)
+            t /= denom
+            np.multiply(re, P, out=r)
+            np.subtract(Q, r, out=r)
+            r /= denom
+
+        z = (1. - tss * too) / (vks + vko)
+
+        # Multiple scattering contribution to bidirectional canopy reflectance
+        # rsod = (Qv * g1 * Ps + Pv * g2 * Qs - (rdo * Qss + tdo * Pss) * rinf) / (1 - rinf2)
+        np.multiply(J1ks, too, out=x)
+        np.subtract(z, x, out=x)
+        np.add(vko, m, out=lx)
+        x /= lx
+        x *= Qv
+        x *= Ps
+        np.copyto(rsod, x)
+
+        np.multiply(J1ko, tss, out=x)
+        np.subtract(z, x, out=x)
+        np.add(vks, m, out=lx)
+        x /= lx
+        x *= Pv
+        x *= Qs
+        rsod += x
+
+        np.multiply(rdo, Qss, out=x)
+        np.multiply(tdo, Pss, out=y)
+        x += y
+        x *= rinf
+        rsod -= x
+        np.subtract(1., rinf2, out=lx)
+        rsod /= lx
+
+        # Treatment of the hotspot-effect
+        tants = VollScat.geometry.tan_iza
+        tanto = VollScat.geometry.tan_vza
+        cospsi = VollScat.geometry.cos_raa
+        dso = np.sqrt(tants ** 2. + tanto ** 2. - 2. * tants * tanto * cospsi).astype(dtype)
+
+        # Apply correction 2/(K+k) suggested by F.-M. Breon
+        alf = np.where(hotspot > 0., (dso / hotspot) * 2. / (vks + vko), 1e36)
+
+        tsstoo, sumint = _hotspot_calculations(alf, lai, vko, vks)
+
+        # The pure hotspot
+        tsstoo = np.where(alf == 0., tss, tsstoo)
+        sumint = np.where(alf == 0., (1. - tss) / (vks * lai), sumint)
+
+        # Bidirectional reflectance rso = w * lai * sumint + rsod
+        rso = rsod
+        np.multiply(w, lai * sumint, out=x)
+        rso += x
+
+        # Interaction with the soil, rho_dn = rho_surface / max(1 - rho_surface * rdd, 1e-36)
+        rho_dn = denom
+        np.multiply(rho_surface, rdd, out=rho_dn)
+        np.subtract(1., rho_dn, out=rho_dn)
+        np.maximum(rho_dn, 1e-36, out=rho_dn)
+        np.divide(rho_surface, rho_dn, out=rho_dn)
+
+        # rddt = rdd + tdd * rho_surface * tdd / dn
+        np.multiply(tdd, tdd, out=rddt)
+        rddt *= rho_dn
+        rddt += rdd
+
+        # rsdt = rsd + (tsd + tss) * rho_surface * tdd / dn
+        np.add(tsd, tss, out=x)
+        np.multiply(x, tdd, out=rsdt)
+        rsdt *= rho_dn
+        rsdt += rsd
+
+        # rdot = rdo + tdd * rho_surface * (tdo + too) / dn
+        np.add(tdo, too, out=y)
+        np.multiply(y, tdd, out=rdot)
+        rdot *= rho_dn
+        rdot += rdo
+
+        # rsot = rso + tsstoo * rho_surface + ((tss + tsd) * tdo + (tsd + tss * rho_surface * rdd) * too) * rho_dn
+        x *= tdo
+        np.multiply(rho_surface, rdd, out=y)
+        y *= tss
+        y += tsd
+        y *= too
+        x += y
+        x *= rho_dn
+        np.multiply(tsstoo, rho_surface, out=rsot)
+        rsot += rso
+        rsot += x
+
+        # No canopy
+        no_canopy = np.broadcast_to(np.logical_not(lai > 0), shape)
+        for item in (rsot, rddt, rsdt, rdot):
+            np.copyto(item, np.broadcast_to(rho_surface, shape), where=no_canopy)
+
+
+def sail(iza, vza, raa, ks, kt, lai, hotspot, rho_surface, lidf_type='campbell', a=57, b=0, angle_unit='DEG',
+         jacobian=False, dtype=np.float64, out=None, workspace=None):
+    """
+    Batched SAIL model for one sensing geometry and many canopy states.
+
+    Parameters
+    ----------
+    iza, vza, raa : int or float
+        Incidence (iza) and scattering (vza) zenith angle, as well as relative azimuth (raa) angle.
+    ks, kt : array_like
+        Leaf reflection (ks) and leaf transmission (kt) values with shape (2101,) or (n_samples, 2101). One can use the
+        output from the batched prospect function.
+    lai, hotspot : int, float or array_like
+        Leaf area index and hotspot parameter, scalars or arrays with a length of n_samples.
+    rho_surface : array_like
+        Surface reflectance values with shape (2101,) or (n_samples, 2101).
+    lidf_type, a, b, angle_unit :
+        See SAIL.
+    jacobian : bool
+        If True, the derivatives of the spectra with respect to lai and hotspot are calculated in the same pass with
+        forward-mode dual numbers (see pyrism.core.dual). Default is False.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of all returns. ks, kt and rho_surface are converted to dtype.
+        Default is float64.
+    out : SailResult, optional
+        Result of a previous call with the same number of samples and dtype. Its spectra are overwritten and it is
+        returned. Not available with jacobian.
+    workspace : Workspace, optional
+        Scratch buffers of the intermediate spectra, which are reused across calls. Not available with jacobian.
+
+    Returns
+    -------
+    SailResult with the attributes BRF, BRDF, BHR, DHR and HDR. The spectra have the shape (n_samples, 2101).
+    If jacobian is True, the attribute jacobian is a SailResult with the attributes names, BRF, BRDF, BHR, DHR and
+    HDR. The derivatives have the shape (n_samples, 2101, 2) and the last axis is ordered like names (lai, hotspot).
+
+    See Also
+    --------
+    SAIL
+    PROSAILFunction.jacobian
+    """
+    dtype = float_dtype(dtype)
+    VollScat = _volscatt(iza, vza, raa, lidf_type, a, b, angle_unit)
+
+    ks = np.atleast_2d(np.asarray(ks, dtype=dtype))
+    kt = np.atleast_2d(np.asarray(kt, dtype=dtype))
+    rho_surface = np.atleast_2d(np.asarray(rho_surface, dtype=dtype))
+    lai = _column(lai, dtype)
+    hotspot = _column(hotspot, dtype)
+
+    for name, item in (('ks', ks), ('kt', kt), ('rho_surface', rho_surface)):
+        if item.shape[-1] != 2101:
+            raise AssertionError(
+                "{0} must contain continuous values from from 400 until 2500 nm with a length of 2101. "
+                "The actual length of {0} is {1}".format(name, str(item.shape[-1])))
+
+    if out is not None or workspace is not None:
+        if jacobian:
+            raise ValueError("out and workspace are not available with jacobian")
+
+        result = SailResult(l=np.arange(400, 2501))
+        result.update(_outputs(out, ('BRF', 'BRDF', 'BHR', 'DHR', 'HDR'), np.broadcast(ks, kt, rho_surface, lai).shape,
+                               dtype))
+
+        _sail_into(VollScat, ks, kt, lai, hotspot, rho_surface, workspace or Workspace(), result['BRF'],
+                   result['BHR'], result['DHR'], result['HDR'])
+        np.divide(result['BRF'], np.pi, out=result['BRDF'])
+
+        if out is None:
+            return result
+
+        out.update(result)
+        return out
+
+    if jacobian:
+        lai, hotspot = Dual.variables(lai, hotspot)
+
+    rsot, rddt, rsdt, rdot = dual.chain(_sail, VollScat, ks, kt, lai, hotspot, rho_surface, dtype)
+    rsot_pi = rsot / np.pi
+
+    result = SailResult(l=np.arange(400, 2501), BRF=dual.value(rsot), BRDF=dual.value(rsot_pi),
+                        BHR=dual.value(rddt), DHR=dual.value(rsdt), HDR=dual.value(rdot))
+
+    if jacobian:
+        result.jacobian = SailResult(names=list(SAIL_PARAMETERS), BRF=rsot.jacobian(), BRDF=rsot_pi.jacobian(),
+                                     BHR=rddt.jacobian(), DHR=rsdt.jacobian(), HDR=rdot.jacobian())
+
+    return result
+
+
+def _hemisphere_quadrature(n_vza, n_raa):
+    """
+    Gauss-Legendre nodes of the view zenith (vza) and relative azimuth (raa) angles in [RAD] of the upper hemisphere
+    and the weights of the directional-hemispherical integral (1 / pi) * integral(BRF * cos(vza) d_omega). The
+    azimuth is sampled between 0 and pi, because SAIL is symmetric in raa.
+    """
+    x, w = np.polynomial.legendre.leggauss(n_vza)
+    mu, mu_weights = 0.5 * (x + 1.), 0.5 * w
+
+    x, w = np.polynomial.legendre.leggauss(n_raa)
+    raa, raa_weights = 0.5 * np.pi * (x + 1.), 0.5 * np.pi * w
+
+    return np.arccos(mu), raa, (2. / np.pi) * np.outer(mu * mu_weights, raa_weights)
+
+
+def albedo(iza, ks, kt, lai, hotspot, rho_surface, skyl=None, lidf_type='campbell', a=57, b=0, n_vza=16, n_raa=16,
+           angle_unit='DEG', dtype=np.float64, chunk_size=2048):
+    """
+    Black-, white- and blue-sky albedo of the SAIL model for one sun position and many canopy states.
+
+    The black-sky albedo is the BRF integrated over the view directions of the upper hemisphere with a Gauss-Legendre
+    quadrature of n_vza view zenith and n_raa relative azimuth angles, which are evaluated together by a single SAIL
+    run. The white-sky albedo is the bi-hemispherical reflectance (BHR) of SAIL. The broadband albedos are weighted
+    with the direct (lib.light.es) and diffuse (lib.light.ed) solar spectra.
+
+    Parameters
+    ----------
+    iza : int or float
+        Sun zenith angle.
+    ks, kt, lai, hotspot, rho_surface :
+        See sail.
+    skyl : int, float or array_like, optional
+        Fraction of diffuse illumination, a scalar or an array with a length of n_samples. If None (default) skyl is
+        calculated from the sun zenith angle like in PROSAIL: 0.847 - 1.61 * sin(90 - iza) + 1.04 * sin(90 - iza)^2.
+    lidf_type, a, b, angle_unit :
+        See SAIL.
+    n_vza, n_raa : int, optional
+        Number of quadrature nodes of the view zenith and relative azimuth angle. Default is 16.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of the spectral returns. Default is float64.
+    chunk_size : int, optional
+        Approximate number of spectra (view directions times samples) which are calculated at once. Default is 2048.
+
+    Returns
+    -------
+    AlbedoResult with the attributes black_sky, white_sky, blue_sky, skyl and broadband. The spectra have the shape
+    (n_samples, 2101) and broadband is an AlbedoResult with the broadband black_sky, white_sky and blue_sky with
+    the shape (n_samples,).
+
+    See Also
+    --------
+    sail
+    SAIL
+    """
+    dtype = float_dtype(dtype)
+
+    if angle_unit != 'DEG' and angle_unit != 'RAD':
+        raise ValueError("angle_unit must be 'DEG' or 'RAD', but angle_unit is: {}".format(str(angle_unit)))
+
+    tts = np.radians(iza) if angle_unit == 'DEG' else np.asarray(iza, dtype=np.float64)
+
+    ks = np.atleast_2d(np.asarray(ks, dtype=dtype))
+    kt = np.atleast_2d(np.asarray(kt, dtype=dtype))
+    rho_surface = np.atleast_2d(np.asarray(rho_surface, dtype=dtype))
+    lai = _column(lai, dtype)
+    hotspot = _column(hotspot, dtype)
+
+    for name, item in (('ks', ks), ('kt', kt), ('rho_surface', rho_surface)):
+        if item.shape[-1] != 2101:
+            raise AssertionError(
+                "{0} must contain continuous values from from 400 until 2500 nm with a length of 2101. "
+                "The actual length of {0} is {1}".format(name, str(item.shape[-1])))
+
+    shape = np.broadcast(ks, kt, rho_surface, lai, hotspot).shape
+    vza, raa, weights = _hemisphere_quadrature(n_vza, n_raa)
+
+    # The view zenith angles are evaluated in chunks, each with all azimuth angles
+    step = max(1, chunk_size // (shape[0] * n_raa))
+    black_sky = np.zeros(shape, dtype=dtype)
+
+    for start in srange(0, n_vza, step):
+        index = slice(start, start + step)
+        rows = len(vza[index])
+
+        VollScat = _volscatt(tts, np.repeat(vza[index], n_raa), np.tile(raa, rows), lidf_type, a, b, 'RAD')
+        rsot, rddt, _, _ = _sail(VollScat, ks, kt, lai, hotspot, rho_surface, dtype, directions=(rows, n_raa))
+
+        black_sky += np.tensordot(weights[index].astype(dtype), rsot.astype(dtype, copy=False), axes=2)
+
+    # The BHR does not depend on the view directions
+    white_sky = np.array(np.broadcast_to(rddt, shape), dtype=dtype)
+
+    if skyl is None:
+        skyl = 0.847 - 1.61 * np.sin(np.pi / 2 - tts) + 1.04 * np.sin(np.pi / 2 - tts) ** 2.
+
+    skyl = _column(skyl, dtype)
+    es, ed = [np.asarray(item, dtype=dtype) for item in (lib.light.es, lib.light.ed)]
+
+    # Direct and diffuse irradiance
+    direct = (1. - skyl) * es
+    diffuse = skyl * ed
+    irradiance = direct + diffuse
+    reflected = black_sky * direct + white_sky * diffuse
+
+    # The diffuse spectrum contains no energy in the water absorption bands around 1900 nm
+    with np.errstate(divide='ignore', invalid='ignore'):
+        blue_sky = np.where(irradiance > 0, reflected / irradiance, (1. - skyl) * black_sky + skyl * white_sky)
+
+    broadband = AlbedoResult(black_sky=np.dot(black_sky, es) / es.sum(), white_sky=np.dot(white_sky, ed) / ed.sum(),
+                             blue_sky=reflected.sum(axis=-1) / irradiance.sum(axis=-1))
+
+    return AlbedoResult(l=np.arange(400, 2501), black_sky=black_sky, white_sky=white_sky,
+                        blue_sky=blue_sky, skyl=skyl.ravel(), broadband=broadband)
+
+
+# ---- Model Functions ----
+class PROSAILFunction(object):
+    """
+    PROSAIL as a batched model function for the batch runner (pyrism.core.parallel).
+
+    An instance maps a parameter matrix with shape (n_samples, n_params) to the PROSAIL spectra with shape
+    (n_samples, 2101).
+
+    An instance is a prepared model: the parts which do not depend on the parameters in `names` (the volume
+    scattering of the geometry and LIDF, as well as the leaf and soil spectra if all of their parameters are fixed)
+    are calculated once in prepare, so that the evaluation of many states (e.g. a time series of LAI and soil
+    moisture over a fixed geometry, see evaluate) only repeats the parameter dependent part.
+
+    Parameters
+    ----------
+    iza, vza, raa : int or float
+        Incidence (iza) and scattering (vza) zenith angle, as well as relative azimuth (raa) angle.
+    names : sequence of str
+        Names of the parameters in the columns of the parameter matrix. Possible names are 'N', 'Cab', 'Cxc', 'Cbr',
+        'Cw', 'Cm', 'Can' (PROSPECT), 'lai', 'hotspot' (SAIL), 'reflectance' and 'moisture' (LSM).
+    fixed : dict, optional
+        Values of all parameters which are not in `names`. Can defaults to 0.
+    output : {'BRF', 'BRDF', 'BHR', 'DHR', 'HDR'}, optional
+        Returned quantity of the SAIL model. Default is 'BRF'.
+    bands : {None, 'ASTER', 'L8'} or sequence of tuple, optional
+        If not None, the spectra are averaged over the bands (see band_mean) and the output has the shape
+        (n_samples, n_bands). Default is None.
+    version, alpha :
+        See PROSPECT.
+    lidf_type, a, b, angle_unit :
+        See SAIL.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of the output. Default is float64.
+    """
+
+    parameters = ('N', 'Cab', 'Cxc', 'Cbr', 'Cw', 'Cm', 'Can', 'lai', 'hotspot', 'reflectance', 'moisture')
+
+    def __init__(self, iza, vza, raa, names, fixed=None, output='BRF', bands=None, version='5', alpha=40,
+                 lidf_type='campbell', a=57, b=0, angle_unit='DEG', dtype=np.float64):
+
+        self.iza = iza
+        self.vza = vza
+        self.raa = raa
+        self.names = tuple(names)
+        self.fixed = dict(Can=0)
+        self.fixed.update(fixed or {})
+        self.output = output
+        self.bands = bands
+        self.version = version
+        self.alpha = alpha
+        self.lidf_type = lidf_type
+        self.a = a
+        self.b = b
+        self.angle_unit = angle_unit
+        self.dtype = float_dtype(dtype)
+
+        unknown = [item for item in self.names + tuple(self.fixed) if item not in self.parameters]
+        if unknown:
+            raise ValueError("Unknown PROSAIL parameters: {}".format(str(unknown)))
+
+        missing = [item for item in self.parameters if item not in self.names and item not in self.fixed]
+        if missing:
+            raise ValueError("The PROSAIL parameters {} must be in names or fixed".format(str(missing)))
+
+        self.prepare()
+
+    def prepare(self):
+        """
+        Calculate the parts of the model which do not depend on the parameters in `names`. This is called by
+        __init__ and must be called again if the attributes are changed afterwards.
+
+        Returns
+        -------
+        self
+        """
+        self.VollScat = _volscatt(self.iza, self.vza, self.raa, self.lidf_type, self.a, self.b, self.angle_unit)
+
+        if set(PROSPECT_PARAMETERS) & set(self.names):
+            self.leaf = None
+        else:
+            self.leaf = _prospect(*[_column(self.fixed[name], self.dtype) for name in PROSPECT_PARAMETERS],
+                                  alpha=self.alpha, version=self.version, dtype=self.dtype)
+
+        if 'reflectance' in self.names or 'moisture' in self.names:
+            self.rho_surface = None
+        else:
+            self.rho_surface = _soil(_column(self.fixed['reflectance'], self.dtype),
+                                     _column(self.fixed['moisture'], self.dtype), self.dtype)
+
+        return self
+
+    def values(self, params):
+        """Map the columns of a parameter matrix to a dict of parameter values."""
+        params = np.atleast_2d(params)
+        values = dict(self.fixed)
+        values.update(dict((name, params[:, i]) for i, name in enumerate(self.names)))
+
+        return values
+
+    def __evaluate(self, params, jacobian):
+        p = dict((name, _column(value, self.dtype)) for name, value in self.values(params).items())
+
+        if jacobian:
+            p.update(zip(self.names, Dual.variables(*[p[name] for name in self.names])))
+
+        if self.leaf is None:
+            ks, kt = _prospect(p['N'], p['Cab'], p['Cxc'], p['Cbr'], p['Cw'], p['Cm'], p['Can'], alpha=self.alpha,
+                               version=self.version, dtype=self.dtype)
+        else:
+            ks, kt = self.leaf
+
+        if self.rho_surface is None:
+            rho_surface = _soil(p['reflectance'], p['moisture'], self.dtype)
+        else:
+            rho_surface = self.rho_surface
+
+        rsot, rddt, rsdt, rdot = dual.chain(_sail, self.VollScat, ks, kt, p['lai'], p['hotspot'], rho_surface,
+                                            self.dtype)
+
+        return dict(BRF=rsot, BRDF=rsot / np.pi, BHR=rddt, DHR=rsdt, HDR=rdot)[self.output]
+
+    def __evaluate_into(self, params, out, workspace):
+        p = dict((name, _column(value, self.dtype)) for name, value in self.values(params).items())
+        shape = (max(len(item) for item in p.values()), 2101)
+
+        if self.leaf is None:
+            ks, kt = workspace('prosail.ks', shape, self.dtype), workspace('prosail.kt', shape, self.dtype)
+            _prospect_into(p['N'], p['Cab'], p['Cxc'], p['Cbr'], p['Cw'], p['Cm'], p['Can'], alpha=self.alpha,
+                           version=self.version, workspace=workspace, ks=ks, kt=kt)
+        else:
+            ks, kt = self.leaf
+
+        if self.rho_surface is None:
+            rho_surface = _soil_into(p['reflectance'], p['moisture'], workspace,
+                                     workspace('prosail.rho_surface', shape, self.dtype))
+        else:
+            rho_surface = self.rho_surface
+
+        rsot, rddt, rsdt, rdot = [workspace('prosail.' + name, shape, self.dtype) for name in ('rsot', 'rddt', 'rsdt',
+                                                                                               'rdot')]
+        _sail_into(self.VollScat, ks, kt, p['lai'], p['hotspot'], rho_surface, workspace, rsot, rddt, rsdt, rdot)
+
+        output = dict(BRF=rsot, BRDF=rsot, BHR=rddt, DHR=rsdt, HDR=rdot)[self.output]
+        if self.output == 'BRDF':
+            output /= np.pi
+
+        if self.bands is None:
+            n_out = shape[1]
+        else:
+            weights = workspace.constant(('bands', _bands(self.bands), self.dtype.str), _band_weights,
+                                         _bands(self.bands), self.dtype)
+            n_out = len(weights)
+
+        if out is None:
+            out = np.empty((shape[0], n_out), dtype=self.dtype)
+        elif out.shape != (shape[0], n_out) or out.dtype != self.dtype:
+            raise ValueError("out must have the shape {0} and the dtype {1}. The actual shape is {2} and the actual "
+                             "dtype is {3}".format(str((shape[0], n_out)), str(self.dtype), str(out.shape),
+                                                   str(out.dtype)))
+
+        if self.bands is None:
+            np.copyto(out, output)
+        else:
+            np.dot(output, weights.T, out=out)
+
+        return out
+
+    def __call__(self, params, out=None, workspace=None):
+        """
+        Evaluate the model.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameter matrix with shape (n_samples, len(names)).
+        out : ndarray, optional
+            Array with shape (n_samples, n_out) and the dtype of the model in to which the output is written.
+        workspace : Workspace, optional
+            Scratch buffers of the intermediate spectra, which are reused across calls (e.g. the iterations of an
+            inversion).
+
+        Returns
+        -------
+        output : ndarray
+            Model output with shape (n_samples, n_out). This is `out` if given.
+        """
+        if out is not None or workspace is not None:
+            return self.__evaluate_into(params, out, workspace or Workspace())
+
+        output = self.__evaluate(params, jacobian=False)
+
+        if self.bands is None:
+            return output
+        else:
+            return band_mean(output, self.bands)
+
+    def evaluate(self, states, out=None, workspace=None):
+        """
+        Evaluate the prepared model for many states of the parameters in `names`.
+
+        Parameters
+        ----------
+        states : array_like or dict
+            Parameter matrix with shape (n_states, len(names)) or a dict which maps each name to an array with
+            n_states values.
+        out, workspace :
+            See __call__.
+
+        Returns
+        -------
+        output : ndarray
+            Model output with shape (n_states, n_out).
+        """
+        return self(_states(states, self.names), out=out, workspace=workspace)
+
+    def jacobian(self, params):
+        """
+        Evaluate the model and its derivatives with respect to the parameters in `names`.
+
+        The derivatives are calculated in the same pass with forward-mode dual numbers (see pyrism.core.dual), so that
+        the cost is about one model evaluation instead of one per parameter. The memory of the intermediate results
+        grows with n_samples * len(names), thus large parameter matrices should be evaluated in chunks.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameter matrix with shape (n_samples, len(names)).
+
+        Returns
+        -------
+        output : ndarray
+            Model output with shape (n_samples, n_out), like __call__.
+        jacobian : ndarray
+            Derivatives of the output with shape (n_samples, n_out, len(names)).
+        """
+        output = self.__evaluate(params, jacobian=True)
+        value, jacobian = output.value, output.jacobian()
+
+        if self.bands is None:
+            return value, jacobian
+        else:
+            return band_mean(value, self.bands), np.moveaxis(band_mean(np.moveaxis(jacobian, -1, -2), self.bands),
+                                                             -1, -2)
+
+
+class I2EMFunction(object):
+    """
+    I2EM as a batched model function for the batch runner (pyrism.core.parallel).
+
+    An instance maps a parameter matrix with shape (n_samples, n_params) to the backscatter coefficients with shape
+    (n_samples, n_pol * n_angles). The samples are evaluated one after another, so the speed up of the batch runner
+    comes from the multi-process evaluation.
+
+    An instance is a prepared model: if the angles are not in `names`, the geometry with its trigonometric terms (see
+    pyrism.core.Geometry) is calculated once in prepare and shared by all evaluations (see evaluate). If in addition
+    the dielectric constant, the rms height and the correlation length are fixed, the slope averaged reflection
+    coefficients (the numerical quadrature, see I2EM) are calculated once in prepare as well. Otherwise each sample
+    integrates them again (a cache avoids this for repeated values), which dominates the time per sample.
+
+    Parameters
+    ----------
+    iza, vza, raa : int, float or ndarray
+        Incidence (iza) and scattering (vza) zenith angle, as well as relative azimuth (raa) angle.
+    names : sequence of str
+        Names of the parameters in the columns of the parameter matrix. Possible names are 'frequency', 'eps_real',
+        'eps_imag' (real and imaginary part of the dielectric constant), 'corrlength' and 'sigma'. The angles 'iza',
+        'vza' and 'raa' may be columns as well (e.g. per pixel geometry), they replace the arguments of the same name.
+    fixed : dict, optional
+        Values of all parameters which are not in `names`. A fixed frequency may be an array (see I2EM), the output
+        of each polarization is then ordered by frequency and angle.
+    output : sequence of {'VV', 'HH', 'VVdB', 'HHdB'}, optional
+        Returned polarizations of I2EM.BSC. Default is ('VV', 'HH').
+    n, corrfunc, normalize, nbar, angle_unit, cache, monostatic :
+        See I2EM. In the monostatic mode vza and raa are ignored.
+    """
+
+    parameters = ('frequency', 'eps_real', 'eps_imag', 'corrlength', 'sigma')
+    geometry = ('iza', 'vza', 'raa')
+
+    def __init__(self, iza, vza, raa, names, fixed=None, output=('VV', 'HH'), n=10, corrfunc='exponential',
+                 normalize=True, nbar=0.0, angle_unit='DEG', cache=None, monostatic=False):
+
+        self.iza = iza
+        self.vza = vza
+        self.raa = raa
+        self.names = tuple(names)
+        self.fixed = dict(fixed or {})
+        self.output = tuple(output)
+        self.n = n
+        self.corrfunc = corrfunc
+        self.normalize = normalize
+        self.nbar = nbar
+        self.angle_unit = angle_unit
+        self.cache = cache
+        self.monostatic = monostatic
+
+        unknown = [item for item in self.names + tuple(self.fixed) if item not in self.parameters + self.geometry]
+        if unknown:
+            raise ValueError("Unknown I2EM parameters: {}".format(str(unknown)))
+
+        missing = [item for item in self.parameters if item not in self.names and item not in self.fixed]
+        if missing:
+            raise ValueError("The I2EM parameters {} must be in names or fixed".format(str(missing)))
+
+        self.prepare()
+
+    def prepare(self):
+        """
+        Calculate the parts of the model which do not depend on the parameters in `names`. This is called by
+        __init__ and must be called again if the attributes are changed afterwards.
+
+        Returns
+        -------
+        self
+        """
+        if set(self.geometry) & set(self.names):
+            self.prepared_geometry = None
+        else:
+            p = dict(iza=self.iza, vza=self.vza, raa=self.raa)
+            p.update(self.fixed)
+
+            if self.monostatic:
+                p['vza'], p['raa'] = p['iza'], 180. if self.angle_unit == 'DEG' else np.pi
+
+            self.prepared_geometry = Geometry(p['iza'], p['vza'], p['raa'], normalize=self.normalize, nbar=self.nbar,
+                                              angle_unit=self.angle_unit)
+
+        if self.prepared_geometry is None or set(('eps_real', 'eps_imag', 'corrlength', 'sigma')) & set(self.names):
+            self.slope_average = None
+        else:
+            # The slope averages do not depend on the frequency, thus any frequency is fine if it is in names
+            model = I2EM(self.prepared_geometry, None, None, normalize=self.normalize, nbar=self.nbar,
+                         angle_unit=self.angle_unit, frequency=np.ravel(self.fixed.get('frequency', 1.))[0],
+                         diel_constant=complex(self.fixed['eps_real'], self.fixed['eps_imag']),
+                         corrlength=self.fixed['corrlength'], sigma=self.fixed['sigma'], n=self.n,
+                         corrfunc=self.corrfunc, cache=self.cache, monostatic=self.monostatic)
+            self.slope_average = (model.Rav, model.Rah)
+
+        return self
+
+    def __models(self, params, jacobian):
+        for row in np.atleast_2d(params):
+            p = dict(iza=self.iza, vza=self.vza, raa=self.raa)
+            p.update(self.fixed)
+            p.update(zip(self.names, row))
+
+            if self.prepared_geometry is not None:
+                p['iza'] = self.prepared_geometry
+
+            yield I2EM(p['iza'], p['vza'], p['raa'], normalize=self.normalize, nbar=self.nbar,
+                       angle_unit=self.angle_unit, frequency=p['frequency'],
+                       diel_constant=complex(p['eps_real'], p['eps_imag']), corrlength=p['corrlength'],
+                       sigma=p['sigma'], n=self.n, corrfunc=self.corrfunc, jacobian=jacobian, cache=self.cache,
+                       monostatic=self.monostatic, slope_average=self.slope_average)
+
+    def __call__(self, params, out=None):
+        """
+        Evaluate the model.
+
+        Parameters
+        ----------
+        params : array_like
+            Parameter matrix with shape (n_samples, len(names)).
+        out : ndarray, optional
+            Array with shape (n_samples, n_out) in to which the output is written row by row.
+
+        Returns
+        -------
+        output : ndarray
+            Model output with shape (n_samples, n_out). This is `out` if given.
+        """
+        if out is not None:
+            for row, model in zip(out, self.__models(params, jacobian=False)):
+                offset = 0
+
+                for item in self.output:
+                    value = np.ravel(model.BSC[item])
+                    row[offset:offset + len(value)] = value
+                    offset += len(value)
+
+            return out
+
+        result = []
+
+        for model in self.__models(params, jacobian=False):
+            result.append(np.concatenate([np.asarray(model.BSC[item], dtype=np.float64).flatten()
+                                          for item in self.output]))
+
+        return np.asarray(result)
+
+    def evaluate(self, states, out=None):
+        """
+        Evaluate the prepared model for many states of the parameters in `names`.
+
+        Parameters
+        ----------
+        states : array_like or dict
+            Parameter matrix with shape (n_states, len(names)) or a dict which maps each name to an array with
+            n_states values.
+        out : ndarray, optional
+            See __call__.
+
+        Returns
+        -------
+        output : ndarray
+            Model output with shape (n_states, n_out).
+        """
+        return self(_states(states, self.names), out=out)
+
+    def jacobian(self, params):
+        """
+        Evaluate the model and its derivatives with respect to the parameters in `names`.
+
+        The derivatives are calculated in the same pass as the backscatter (see the jacobian option of I2EM).
+
+        Parameters
+        ----------
+        params : array_like
+            Parameter matrix with shape (n_samples, len(names)).
+
+        Returns
+        -------
+        output : ndarray
+            Model output with shape (n_samples, n_out), like __call__.
+        jacobian : ndarray
+            Derivatives of the output with shape (n_samples, n_out, len(names)).
+        """
+        if 'frequency' in self.names or set(self.geometry) & set(self.names):
+            raise ValueError("The derivatives with respect to the frequency and the angles are not available")
+
+        result = []
+        jacobian = []
+
+        for model in self.__models(params, jacobian=True):
+            index = [model.jacobian.names.index(name) for name in self.names]
+
+            result.append(np.concatenate([np.asarray(model.BSC[item], dtype=np.float64).flatten()
+                                          for item in self.output]))
+            jacobian.append(np.concatenate([model.jacobian[item][:, index] for item in self.output]))
+
+        return np.asarray(result), np.asarray(jacobian)
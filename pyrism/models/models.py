@@ -3,15 +3,20 @@ from __future__ import division
 
 import sys
 import warnings
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
+from timeit import default_timer
 
 import numpy as np
-from scipy.integrate import (quad, dblquad)
+from scipy.integrate import dblquad
 from scipy.misc import factorial
-from scipy.special import expi
+from scipy.special import expi, gamma, betainc
 
 from .library import get_data_one, get_data_two
-from ..core import (Kernel, Scattering, ReflectanceResult, EmissivityResult, SailResult, cot, rad, dB, BRDF, BRF)
+from ..core import (Kernel, Geometry, Scattering, ReflectanceResult, EmissivityResult, SailResult, ProfileResult, cot,
+                    rad, dB, BRDF, BRF)
+from ..core import dual
+from ..core.auxiliary import float_dtype
+from ..core.dual import Dual
 
 try:
     lib = get_data_two()
@@ -86,10 +91,12 @@ class VolScatt(Kernel):
 
         Parameters
         ----------
-        lidf_type : {'verhoef', 'campbell'}
-            Define with which method the LIDF is calculated
+        lidf_type : str or array_like
+            Define with which method the LIDF is calculated. This is the name of a registered distribution (see
+            LIDF.distributions, e.g. 'verhoef', 'campbell', 'nilson' or 'beta') or the weights of equally spaced
+            leaf inclination angles between 0 and 90 degrees with any length (e.g. a measured LIDF).
         n_elements : int, optional
-            Total number of equally spaced inclination angles. Default is 18.
+            Total number of equally spaced inclination angles of a registered distribution. Default is 18.
         kwargs : dict
             Possible **kwargs from campbell method:
                 * a : Mean leaf angle (degrees) use 57 for a spherical LIDF.
@@ -99,6 +106,13 @@ class VolScatt(Kernel):
                 * b : Parameter b influences the shape of the distribution (bimodality), but has no effect on the
                       average leaf inclination.
 
+            Possible **kwargs from nilson method:
+                * a : Modal leaf angle in [DEG].
+                * b : Eccentricity of the distribution in (0, 1]. None or 0 select 0.5.
+
+            Possible **kwargs from beta method:
+                * a, b : Parameters mu and nu of the beta distribution.
+
         Returns
         -------
         All returns are attributes!
@@ -115,9 +129,11 @@ class VolScatt(Kernel):
 
         See Also
         --------
+        LIDF.weights
         LIDF.campbell
         LIDF.verhoef
         LIDF.nilson
+        LIDF.beta
 
         """
         a = kwargs.pop('a', None)
@@ -126,53 +142,35 @@ class VolScatt(Kernel):
         if kwargs:
             raise TypeError('Unexpected **kwargs: %r' % kwargs)
 
-        if lidf_type == 'verhoef':
-            if a is None or b is None:
-                raise ValueError("for the verhoef function the parameter a and b must defined.")
-            else:
-                lidf = LIDF.verhoef(a, b, n_elements)
-
-        elif lidf_type == 'campbell':
-            if a is None:
-                raise ValueError("for the campbell function the parameter alpha must defined.")
-            else:
-                lidf = LIDF.campbell(a, n_elements)
-
-        else:
-            raise AttributeError("lad_method must be verhoef, nilson or campbell")
-
-        self.ks = 0.
-        self.ko = 0.
-        self.bf = 0.
-        self.Fs = 0.
-        self.Ft = 0.
+        lidf = LIDF.weights(lidf_type, a, b, n_elements)
 
         n_angles = len(lidf)
         angle_step = float(90.0 / n_angles)
         litab = np.arange(n_angles) * angle_step + (angle_step * 0.5)
 
-        for i, ili in enumerate(litab):
-            ttl = 1. * ili
-            cttl = np.cos(np.radians(ttl))
-            # SAIL volume scattering phase function gives interception and portions to be multiplied by rho
-            # and tau
-            self.chi_s, self.chi_o, self.frho, self.ftau = self.volume(ttl)
-
-            # Extinction coefficients
-            ksli = self.chi_s / np.cos(self.iza)
-            koli = self.chi_o / np.cos(self.vza)
-
-            # Area scattering coefficient fractions
-            sobli = self.frho * np.pi / (np.cos(self.iza) * np.cos(self.vza))
-            sofli = self.ftau * np.pi / (np.cos(self.iza) * np.cos(self.vza))
-            bfli = cttl ** 2.
-            self.ks += ksli * float(lidf[i])
-            self.ko += koli * float(lidf[i])
-            self.bf += bfli * float(lidf[i])
-            self.Fs += sobli * float(lidf[i])
-            self.Ft += sofli * float(lidf[i])
-
-            self.Fst = self.Fs + self.Ft
+        # All leaf inclinations at once along the first axis
+        lza = litab.reshape((-1,) + (1,) * np.ndim(self.geometry.cos_iza))
+
+        # SAIL volume scattering phase function gives interception and portions to be multiplied by rho
+        # and tau
+        self.chi_s, self.chi_o, self.frho, self.ftau = self.volume(lza)
+
+        # Extinction coefficients
+        ksli = self.chi_s / self.geometry.cos_iza
+        koli = self.chi_o / self.geometry.cos_vza
+
+        # Area scattering coefficient fractions
+        sobli = self.frho * np.pi / (self.geometry.cos_iza * self.geometry.cos_vza)
+        sofli = self.ftau * np.pi / (self.geometry.cos_iza * self.geometry.cos_vza)
+        bfli = np.cos(np.radians(litab)) ** 2.
+
+        self.ks = np.tensordot(lidf, ksli, axes=1)
+        self.ko = np.tensordot(lidf, koli, axes=1)
+        self.bf = np.dot(lidf, bfli)
+        self.Fs = np.tensordot(lidf, sobli, axes=1)
+        self.Ft = np.tensordot(lidf, sofli, axes=1)
+
+        self.Fst = self.Fs + self.Ft
 
     def volume(self, lza):
         """
@@ -180,80 +178,66 @@ class VolScatt(Kernel):
         for given solar zenith, viewing zenith, azimuth and leaf inclination angle (:cite:`Verhoef.1998`,
         :cite:`Campbell.1990`).
 
+        Parameters
+        ----------
+        lza : int, float or array_like
+            Leaf inclination angle in [DEG]. An array is broadcast against the geometry.
+
         Returns
         -------
         All returns are attributes!
-        chi_s : float
+        chi_s : float or array_like
             Interception function  in the solar path.
-        chi_o : float
+        chi_o : float or array_like
             Interception function  in the view path.
-        frho : float
+        frho : float or array_like
             Function to be multiplied by leaf reflectance to obtain the volume scattering.
-        ftau : float
+        ftau : float or array_like
             Function to be multiplied by leaf transmittance to obtain the volume scattering.
 
         """
-        cts = np.cos(self.iza)
-        cto = np.cos(self.vza)
-        sts = np.sin(self.iza)
-        sto = np.sin(self.vza)
-        cospsi = np.cos(self.raa)
-        psir = self.raa
+        cts = self.geometry.cos_iza
+        cto = self.geometry.cos_vza
+        sts = self.geometry.sin_iza
+        sto = self.geometry.sin_vza
+        cospsi = self.geometry.cos_raa
+        # The relative azimuth angle folded in to [0, pi] as in PROSAIL (the functions are symmetric in raa)
+        psir = np.abs(self.raa - 2. * np.pi * np.round(self.raa / (2. * np.pi)))
         clza = np.cos(np.radians(lza))
         slza = np.sin(np.radians(lza))
         cs = clza * cts
         co = clza * cto
         ss = slza * sts
         so = slza * sto
-        cosbts = 5.
-        if np.abs(ss) > 1e-6:
-            cosbts = -cs / ss
-        cosbto = 5.
-        if np.abs(so) > 1e-6:
-            cosbto = -co / so
-        if np.abs(cosbts) < 1.0:
-            bts = np.arccos(cosbts)
-            ds = ss
-        else:
-            bts = np.pi
-            ds = cs
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cosbts = np.where(np.abs(ss) > 1e-6, -cs / ss, 5.)
+            cosbto = np.where(np.abs(so) > 1e-6, -co / so, 5.)
+
+        crossed = np.abs(cosbts) < 1.0
+        bts = np.where(crossed, np.arccos(np.clip(cosbts, -1., 1.)), np.pi)
+        ds = np.where(crossed, ss, cs)
         chi_s = 2. / np.pi * ((bts - np.pi * 0.5) * cs + np.sin(bts) * ss)
-        if abs(cosbto) < 1.0:
-            bto = np.arccos(cosbto)
-            do_ = so
-        else:
-            if self.vza < rad(90.):
-                bto = np.pi
-                do_ = co
-            else:
-                bto = 0.0
-                do_ = -co
+
+        crossed = np.abs(cosbto) < 1.0
+        forward = self.vza < rad(90.)
+        bto = np.where(crossed, np.arccos(np.clip(cosbto, -1., 1.)), np.where(forward, np.pi, 0.0))
+        do_ = np.where(crossed, so, np.where(forward, co, -co))
         chi_o = 2.0 / np.pi * ((bto - np.pi * 0.5) * co + np.sin(bto) * so)
+
         btran1 = np.abs(bts - bto)
         btran2 = np.pi - np.abs(bts + bto - np.pi)
-        if psir <= btran1:
-            bt1 = psir
-            bt2 = btran1
-            bt3 = btran2
-        else:
-            bt1 = btran1
-            if psir <= btran2:
-                bt2 = psir
-                bt3 = btran2
-            else:
-                bt2 = btran2
-                bt3 = psir
+
+        # psir sorted in to the transition angles: bt1 <= bt2 <= bt3
+        bt1 = np.minimum(psir, btran1)
+        bt2 = np.where(psir <= btran1, btran1, np.minimum(psir, btran2))
+        bt3 = np.where(psir <= btran2, btran2, psir)
+
         t1 = 2. * cs * co + ss * so * cospsi
-        t2 = 0.
-        if bt2 > 0.:
-            t2 = np.sin(bt2) * (2. * ds * do_ + ss * so * np.cos(bt1) * np.cos(bt3))
+        t2 = np.where(bt2 > 0., np.sin(bt2) * (2. * ds * do_ + ss * so * np.cos(bt1) * np.cos(bt3)), 0.)
         denom = 2. * np.pi ** 2
-        frho = ((np.pi - bt2) * t1 + t2) / denom
-        ftau = (-bt2 * t1 + t2) / denom
-        if frho < 0.:
-            frho = 0.
-        if ftau < 0.:
-            ftau = 0.
+        frho = np.maximum(((np.pi - bt2) * t1 + t2) / denom, 0.)
+        ftau = np.maximum((-bt2 * t1 + t2) / denom, 0.)
 
         return chi_s, chi_o, frho, ftau
 
@@ -269,6 +253,8 @@ class LIDF:
     LIDF.campell
     LIDF.verhoef
     LIDF.nilson
+    LIDF.beta
+    LIDF.weights
 
     Note
     ----
@@ -276,6 +262,9 @@ class LIDF:
 
     """
 
+    # Registered distributions as functions of the parameters a, b and n_elements (see LIDF.register)
+    distributions = OrderedDict()
+
     def __init__(self):
         pass
 
@@ -392,83 +381,397 @@ class LIDF:
         return lidf
 
     @staticmethod
-    def nilson(self, lza, mla=None, eccentricity=0.5, scaling_factor=0.5, distribution='random'):
+    def nilson(lza, mla=None, eccentricity=0.5, scaling_factor=0.5, distribution='random'):
         """
-        Leaf Angle Distributions (LAD) from Nilson and Kuusk.
+        Elliptical Leaf Angle Distributions (LAD) from Nilson and Kuusk (:cite:`Nilson.1989`).
+
+        The distribution g(lza) = scaling_factor / sqrt(1 - eccentricity ** 2 * cos(lza - mla) ** 2) has its maximum
+        at the modal leaf angle mla.
 
         Note
         ----
         If mla is None, the default values are alculated by following distributions:
-                * 'erectophile': 0
-                * 'planophile': pi/2
-                * 'plagiophile': pi/4
-                * 'erectophile': 0
+                * 'erectophile': 90
+                * 'planophile': 0
+                * 'plagiophile': 45
                 * 'random' : This determines the output to 1
                 * 'uniform' : This determines the output to 0.5
 
         Parameters
         ----------
         lza : int, float or ndarray
-            Leaf zenith angle (lza).
+            Leaf zenith angle (lza) in [Deg].
         mla : int or float, optional
             Modal leaf angle in [Deg], Default is None (See Note).
         eccentricity : int or float (default = 0.5), optional
             Zero eccentricity is a spherical leaf angle distribution. An eccentricity
             of 1 is a 'needle'.
         scaling_factor : int or float (default = 0.5), optional
-            Scaling factor (reflectance if lza = 0)
+            Scaling factor (value of a zero eccentricity)
         distribution : {'erectophile', 'planophile', 'plagiophile', 'random', 'uniform'}, optional
             Default distribution which set the mla. Default is 'random'
 
         Returns
         -------
         LAD : int, float or array_like
-            LAD integrated over a sphere (0 - pi/2)
+            LAD at the leaf zenith angles.
         """
 
         if eccentricity > 1 or eccentricity < 0:
             raise AssertionError("eccentricity must between 0 and 1")
 
+        if distribution == 'random':
+            return 1
+        elif distribution == 'uniform':
+            return 0.5
+
         if mla is None:
             if distribution == 'erectophile':
-                if np.any(lza != np.pi / 2):
+                if np.any(lza != 90):
                     warnings.warn("Leaf normals should be mainly horizontal = 90°")
-                mla = 0
+                mla = 90
 
             elif distribution == 'planophile':
-                if lza != 0:
+                if np.any(lza != 0):
                     warnings.warn("Leaf normals should be mainly vertical = 0°")
 
-                mla = np.pi / 2
+                mla = 0
 
             elif distribution == 'plagiophile':
-                if lza != np.pi / 4:
+                if np.any(lza != 45):
                     warnings.warn("Leaf normals should be mainly at = 45°")
 
-                mla = np.pi / 4
+                mla = 45
 
             else:
                 raise ValueError("distribution must be erectophile, planophile, plagiophile, random or uniform")
 
-        def __gfunc(lza, mla, e, b):
-            return b / (1 - e ** 2 * np.sin((lza + mla) * np.pi / 180.0)) ** (1 / 2)
+        lad = scaling_factor / np.sqrt(1 - eccentricity ** 2 * np.cos(np.deg2rad(np.asarray(lza) - mla)) ** 2)
 
-        def __integrant(x, lza, mla, e, b):
-            return __gfunc(lza, mla, e, b) * np.cos(x) * np.sin(x)
+        return lad if isinstance(lza, np.ndarray) else float(lad)
 
-        if distribution == 'random':
-            return 1
-        elif distribution == 'uniform':
-            return 0.5
+    @staticmethod
+    def beta(mu, nu, n_elements=18):
+        """
+        Calculate the Leaf Inclination Distribution Function based on the beta distribution of Goel and Strebel.
+
+        Parameters
+        ----------
+        mu, nu : float
+            Parameters of the beta distribution of the leaf inclination t = 2 * lza / pi. Some possible distributions
+            are [mu, nu]:
+                * Planophile: [2.770, 1.172].
+                * Erectophile: [1.172, 2.770].
+                * Plagiophile: [3.326, 3.326].
+                * Extremophile: [0.433, 0.433].
+                * Spherical: [1.101, 1.930].
+                * Uniform: [1, 1].
+        n_elements : int
+            Total number of equally spaced inclination angles.
+
+        Returns
+        -------
+        lidf : ndarray
+            Leaf Inclination Distribution Function at equally spaced angles.
+        """
+        edges = np.linspace(0., 1., n_elements + 1)
+
+        return np.diff(betainc(nu, mu, edges))
+
+    @staticmethod
+    def register(name, func):
+        """
+        Register a Leaf Inclination Distribution Function, which can be used by name in VolScatt.coef and SAIL.
+
+        Parameters
+        ----------
+        name : str
+            Name of the distribution.
+        func : callable
+            Function func(a, b, n_elements) which returns the weights of n_elements equally spaced inclination
+            angles between 0 and 90 degrees. The parameters a and b are the ones of VolScatt.coef and SAIL.
+        """
+        LIDF.distributions[name] = func
+
+    @staticmethod
+    def weights(lidf_type, a=None, b=None, n_elements=18):
+        """
+        Weights of equally spaced leaf inclination angles between 0 and 90 degrees.
+
+        Parameters
+        ----------
+        lidf_type : str or array_like
+            Name of a registered distribution (see LIDF.distributions) or the weights itself with any length. The
+            weights are normalized to a sum of 1.
+        a, b : float, optional
+            Parameters of the registered distribution.
+        n_elements : int, optional
+            Number of inclination angles of a registered distribution. Default is 18.
+
+        Returns
+        -------
+        lidf : ndarray
+            Leaf Inclination Distribution Function.
+        """
+        if isinstance(lidf_type, str):
+            if lidf_type not in LIDF.distributions:
+                raise AttributeError("lad_method must be {}".format(", ".join(LIDF.distributions)))
+
+            lidf_type = LIDF.distributions[lidf_type](a, b, n_elements)
+
+        lidf = np.asarray(lidf_type, dtype=np.float64)
+
+        if lidf.ndim != 1 or len(lidf) == 0 or np.any(lidf < 0) or not np.sum(lidf) > 0:
+            raise ValueError("The LIDF weights must be a non negative vector with a positive sum")
+
+        return lidf / np.sum(lidf)
+
+
+def _campbell(a, b, n_elements):
+    if a is None:
+        raise ValueError("for the campbell function the parameter alpha must defined.")
+
+    return LIDF.campbell(a, n_elements)
+
+
+def _verhoef(a, b, n_elements):
+    if a is None or b is None:
+        raise ValueError("for the verhoef function the parameter a and b must defined.")
+
+    return LIDF.verhoef(a, b, n_elements)
+
+
+def _nilson(a, b, n_elements):
+    if a is None:
+        raise ValueError("for the nilson function the modal leaf angle a must defined.")
+
+    # A zero eccentricity is a uniform distribution without mode, so b = 0 (the default of SAIL) selects 0.5 as well
+    lad = LIDF.nilson(90.0 / n_elements * (np.arange(n_elements) + 0.5), mla=a,
+                      eccentricity=0.5 if b is None or b == 0 else b, distribution='plagiophile')
+
+    return lad / np.sum(lad)
+
+
+def _beta(a, b, n_elements):
+    if a is None or b is None:
+        raise ValueError("for the beta function the parameter mu (a) and nu (b) must defined.")
+
+    return LIDF.beta(a, b, n_elements)
+
+
+LIDF.register('verhoef', _verhoef)
+LIDF.register('campbell', _campbell)
+LIDF.register('nilson', _nilson)
+LIDF.register('beta', _beta)
+
+
+def _jfunc1(k, l, t, ekt, elt):
+    """J1 function with avoidance of singularity problem, ekt and elt are exp(-k * t) and exp(-l * t)."""
+    del_ = (k - l) * t
+
+    return dual.where(abs(del_) > 1e-3,
+                      (elt - ekt) / (k - l),
+                      0.5 * t * (ekt + elt) * (1. - (del_ ** 2.) / 12.))
+
+
+def _jfunctions(ks, ko, m, t, emt=None):
+    """
+    Transmittances and J functions of SAIL for the extinction in the solar (ks) and view (ko) path, the diffuse
+    extinction m and the leaf area index t. The inputs are arrays or Duals (see pyrism.core.dual) of any shape, which
+    are broadcast against each other (e.g. samples x wavelengths x geometries). Each exponential is evaluated once.
+
+    Parameters
+    ----------
+    ks, ko, m, t : array_like or Dual
+        Extinction coefficients and leaf area index.
+    emt : array_like or Dual, optional
+        exp(-m * t) if it is already known.
+
+    Returns
+    -------
+    tss, too : array_like or Dual
+        Direct transmittance in the solar and view path (exp(-ks * t) and exp(-ko * t)).
+    J1ks, J2ks, J1ko, J2ko, z : array_like or Dual
+        J1(ks, m), J2(ks, m), J1(ko, m), J2(ko, m) and J2(ks, ko).
+    """
+    tss = dual.exp(-ks * t)
+    too = dual.exp(-ko * t)
+
+    if emt is None:
+        emt = dual.exp(-m * t)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        J1ks = _jfunc1(ks, m, t, tss, emt)
+        J1ko = _jfunc1(ko, m, t, too, emt)
+
+        # J2(k, l) = (1 - exp(-(k + l) * t)) / (k + l)
+        J2ks = (1. - tss * emt) / (ks + m)
+        J2ko = (1. - too * emt) / (ko + m)
+        z = (1. - tss * too) / (ks + ko)
+
+    return tss, too, J1ks, J2ks, J1ko, J2ko, z
+
+
+def _hemisphere_grid(n_vza, n_raa, angle_unit='DEG'):
+    """
+    Equally spaced view zenith angles between nadir and the horizon (excluded) and relative azimuth angles between 0
+    and 360 degrees (excluded) of the upper hemisphere.
+    """
+    if angle_unit != 'DEG' and angle_unit != 'RAD':
+        raise ValueError("angle_unit must be 'DEG' or 'RAD', but angle_unit is: {}".format(str(angle_unit)))
+
+    right, full = (90., 360.) if angle_unit == 'DEG' else (np.pi / 2, 2 * np.pi)
+
+    return np.linspace(0., right, n_vza, endpoint=False), np.linspace(0., full, n_raa, endpoint=False)
+
+
+def _hotspot_calculations(alf, lai, ko, ks):
+    fhot = lai * np.sqrt(ko * ks)
+    # Integrate by exponential Simpson method in 20 steps the steps are arranged according to equal partitioning of
+    # the slope of the joint probability function
+    x1 = 0.
+    y1 = 0.
+    f1 = 1.
+    fint = (1. - dual.exp(-alf)) * .05
+    sumint = 0.
+    for istep in srange(1, 21):
+        if istep < 20:
+            x2 = -dual.log(1. - istep * fint) / alf
         else:
-            if not isinstance(lza, np.ndarray):
-                return quad(__integrant, 0, np.pi / 2, args=(lza, mla, eccentricity, scaling_factor))[0]
-            else:
-                lad_list = []
-                for item in lza:
-                    lad_list.append(quad(__integrant, 0, np.pi / 2, args=(item, mla, eccentricity, scaling_factor))[0])
+            x2 = 1.
+        y2 = -(ko + ks) * lai * x2 + fhot * (1. - dual.exp(-alf * x2)) / alf
+        f2 = dual.exp(y2)
+        sumint = sumint + (f2 - f1) * (x2 - x1) / (y2 - y1)
+        x1 = x2
+        y1 = y2
+        f1 = f2
+
+    return f1, dual.where(dual.isnan(sumint), 0., sumint)
+
 
-                return np.asarray(lad_list)
+def _constant_axes(x):
+    """Reduce the axes of x along which all values are equal to a length of one."""
+    for axis in srange(x.ndim):
+        first = np.take(x, [0], axis=axis)
+
+        if x.shape[axis] > 1 and np.all(x == first):
+            x = first
+
+    return x
+
+
+def _sail(VollScat, ks, kt, lai, hotspot, rho_surface, dtype=np.float64, directions=None):
+    """
+    Canopy reflectance factors BRF, BHR, DHR and HDR. The canopy and soil parameters may be arrays or Dual numbers
+    (see pyrism.core.dual).
+
+    If directions is a shape (e.g. (n_vza, n_raa)), VollScat contains that many sensing geometries and the reflectance
+    factors get these leading axes in front of the axes of the canopy parameters. A geometry term which is constant
+    along an axis (e.g. ko along raa) keeps a length of one there, so that its spectra are calculated only once.
+    """
+    # Volume scattering coefficients in the precision of the spectra
+    vks, vko, bf, Fs, Ft = [np.asarray(item, dtype=dtype) for item in (
+        VollScat.ks, VollScat.ko, VollScat.bf, VollScat.Fs, VollScat.Ft)]
+
+    tants = VollScat.geometry.tan_iza
+    tanto = VollScat.geometry.tan_vza
+    cospsi = VollScat.geometry.cos_raa
+
+    if directions is not None:
+        shape = tuple(directions) + (1,) * max(np.ndim(dual.value(item)) for item in (ks, kt, lai, hotspot,
+                                                                                       rho_surface))
+        vks, vko, Fs, Ft, tants, tanto, cospsi = [_constant_axes(np.reshape(item, shape)) for item in (
+            vks, vko, Fs, Ft, tants, tanto, cospsi)]
+
+    sdb = 0.5 * (vks + bf)
+    sdf = 0.5 * (vks - bf)
+    dob = 0.5 * (vko + bf)
+    dof = 0.5 * (vko - bf)
+    ddb = 0.5 * (1.0 + bf)
+    ddf = 0.5 * (1.0 - bf)
+
+    sigb = ddb * ks + ddf * kt
+    sigf = ddf * ks + ddb * kt
+    sigf = dual.where(sigf == 0.0, 1.e-36, sigf)
+    sigb = dual.where(sigb == 0.0, 1.e-36, sigb)
+
+    att = 1. - sigf
+    m = dual.sqrt(att ** 2. - sigb ** 2.)
+    sb = sdb * ks + sdf * kt
+    sf = sdf * ks + sdb * kt
+    vb = dob * ks + dof * kt
+    vf = dof * ks + dob * kt
+    w = Fs * ks + Ft * kt
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        e1 = dual.exp(-m * lai)
+        e2 = e1 ** 2.
+        rinf = (att - m) / sigb
+        rinf2 = rinf ** 2.
+        re = rinf * e1
+        denom = 1. - rinf2 * e2
+
+        tss, too, J1ks, J2ks, J1ko, J2ko, z = _jfunctions(vks, vko, m, lai, e1)
+
+        Pss = (sf + sb * rinf) * J1ks
+        Qss = (sf * rinf + sb) * J2ks
+        Pv = (vf + vb * rinf) * J1ko
+        Qv = (vf * rinf + vb) * J2ko
+
+        tdd = (1. - rinf2) * e1 / denom
+        rdd = rinf * (1. - e2) / denom
+        tsd = (Pss - re * Qss) / denom
+        rsd = (Qss - re * Pss) / denom
+        tdo = (Pv - re * Qv) / denom
+        rdo = (Qv - re * Pv) / denom
+
+        g1 = (z - J1ks * too) / (vko + m)
+        g2 = (z - J1ko * tss) / (vks + m)
+
+        Tv1 = (vf * rinf + vb) * g1
+        Tv2 = (vf + vb * rinf) * g2
+        T1 = Tv1 * (sf + sb * rinf)
+        T2 = Tv2 * (sf * rinf + sb)
+        T3 = (rdo * Qss + tdo * Pss) * rinf
+
+        # Multiple scattering contribution to bidirectional canopy reflectance
+        rsod = (T1 + T2 - T3) / (1. - rinf2)
+
+        # Treatment of the hotspot-effect
+        dso = np.sqrt(tants ** 2. + tanto ** 2. - 2. * tants * tanto * cospsi).astype(dtype)
+
+        # Apply correction 2/(K+k) suggested by F.-M. Breon
+        alf = dual.where(hotspot > 0., (dso / hotspot) * 2. / (vks + vko), 1e36)
+
+        tsstoo, sumint = _hotspot_calculations(alf, lai, vko, vks)
+
+        # The pure hotspot
+        tsstoo = dual.where(alf == 0., tss, tsstoo)
+        sumint = dual.where(alf == 0., (1. - tss) / (vks * lai), sumint)
+
+        # Bidirectional reflectance
+        rsos = w * lai * sumint
+        rso = rsos + rsod
+
+        # Interaction with the soil
+        dn = 1. - rho_surface * rdd
+        dn = dual.where(dn < 1e-36, 1e-36, dn)
+
+        rddt = rdd + tdd * rho_surface * tdd / dn
+        rsdt = rsd + (tsd + tss) * rho_surface * tdd / dn
+        rdot = rdo + tdd * rho_surface * (tdo + too) / dn
+        rsodt = ((tss + tsd) * tdo + (tsd + tss * rho_surface * rdd) * too) * rho_surface / dn
+        rsost = rso + tsstoo * rho_surface
+        rsot = rsost + rsodt
+
+        # No canopy
+        canopy = lai > 0
+        rddt = dual.where(canopy, rddt, rho_surface)
+        rsdt = dual.where(canopy, rsdt, rho_surface)
+        rdot = dual.where(canopy, rdot, rho_surface)
+        rsot = dual.where(canopy, rsot, rho_surface)
+
+    return rsot, rddt, rsdt, rdot
 
 
 class SAIL(Kernel):
@@ -489,8 +792,10 @@ class SAIL(Kernel):
     rho_surface : array_like
         Continuous surface reflectance values from from 400 until 2500 nm. One can use the
         output from LSM class instance.
-    lidf_type : {'verhoef', 'campbell'}, optional
-        Define with which method the LIDF is calculated. Default is 'campbell'
+    lidf_type : str or array_like, optional
+        Define with which method the LIDF is calculated. This is the name of a registered distribution ('verhoef',
+        'campbell', 'nilson', 'beta' or see LIDF.register) or the weights of equally spaced leaf inclination angles
+        with any length (see VolScatt.coef). Default is 'campbell'
     a, b : float, optional
         Parameter a and b depends on which lidf_type is applied:
             * If lidf_type is 'verhoef': Parameter a controls the average leaf inclination. Parameter b influences
@@ -498,6 +803,9 @@ class SAIL(Kernel):
               The default values are for a uniform leaf distribution a = 0, b = 0.
             * If lidf_type is 'campbell': Parameter a is the mean leaf angle (degrees) use 57 for a spherical LIDF.
               The default value represents a spherical leaf distribution a = 57.
+            * If lidf_type is 'nilson': Parameter a is the modal leaf angle (degrees) and b the eccentricity in
+              (0, 1]. The default b = 0 selects an eccentricity of 0.5.
+            * If lidf_type is 'beta': Parameter a and b are mu and nu of the beta distribution.
 
     normalize : boolean, optional
         Set to 'True' to make kernels 0 at nadir view illumination. Since all implemented kernels are normalized
@@ -508,6 +816,10 @@ class SAIL(Kernel):
     angle_unit : {'DEG', 'RAD'}, optional
         * 'DEG': All input angles (iza, vza, raa) are in [DEG] (default).
         * 'RAD': All input angles (iza, vza, raa) are in [RAD].
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of all returns. The inputs ks, kt and rho_surface as well as
+        the volume scattering coefficients are converted to dtype. Default is float64. In float32 the canopy
+        reflectance deviates less than 1e-5 from float64.
 
     Returns
     -------
@@ -526,7 +838,7 @@ class SAIL(Kernel):
     """
 
     def __init__(self, iza, vza, raa, ks, kt, lai, hotspot, rho_surface,
-                 lidf_type='campbell', a=57, b=0, normalize=False, nbar=0.0, angle_unit='DEG'):
+                 lidf_type='campbell', a=57, b=0, normalize=False, nbar=0.0, angle_unit='DEG', dtype=np.float64):
 
         super(SAIL, self).__init__(iza=iza, vza=vza, raa=raa, normalize=normalize, nbar=nbar, angle_unit=angle_unit,
                                    align=True)
@@ -549,20 +861,23 @@ class SAIL(Kernel):
         else:
             pass
 
-        self.ks = ks
-        self.kt = kt
+        self.dtype = float_dtype(dtype)
+
+        self.ks = np.asarray(ks, dtype=self.dtype)
+        self.kt = np.asarray(kt, dtype=self.dtype)
         self.lai = lai
         self.hotspot = hotspot
 
-        self.rho_surface = rho_surface
-        self.VollScat = VolScatt(iza, vza, raa, angle_unit)
+        self.rho_surface = np.asarray(rho_surface, dtype=self.dtype)
 
-        if lidf_type is 'verhoef':
-            self.VollScat.coef(a=a, b=b, lidf_type='verhoef')
-        elif lidf_type is 'campbell':
-            self.VollScat.coef(a=a, lidf_type='campbell')
-        else:
-            raise AssertionError("The lidf_type must be 'verhoef' or 'campbell'")
+        # VolScatt is never normalized, thus it shares the geometry only without the nadir term
+        self.VollScat = VolScatt(iza if self.normalize else self.geometry, vza, raa, angle_unit)
+
+        if isinstance(lidf_type, str) and lidf_type not in LIDF.distributions:
+            raise AssertionError("The lidf_type must be {} or an array of weights".format(
+                ", ".join("'{}'".format(item) for item in LIDF.distributions)))
+
+        self.VollScat.coef(lidf_type=lidf_type, a=a, b=b)
 
         tss, too, tsstoo, rdd, tdd, rsd, tsd, rdo, tdo, rso, rsos, rsod, rddt, rsdt, rdot, rsodt, rsost, rsot, gammasdf, gammasdb, gammaso = self.__calc()
 
@@ -579,13 +894,64 @@ class SAIL(Kernel):
         self.DHR = SailResult(ref=rsdt, refdB=dB(rsdt), L8=self.__store_L8(rsdt), ASTER=self.__store_aster(rsdt))
         self.HDR = SailResult(ref=rdot, refdB=dB(rdot), L8=self.__store_L8(rdot), ASTER=self.__store_aster(rdot))
 
+    @classmethod
+    def hemisphere(cls, iza, n_vza, n_raa, ks, kt, lai, hotspot, rho_surface, lidf_type='campbell', a=57, b=0,
+                   angle_unit='DEG', dtype=np.float64):
+        """
+        Run SAIL for all directions of the upper hemisphere at once.
+
+        The view zenith angles are equally spaced between nadir and the horizon (excluded) and the relative azimuth
+        angles between 0 and 360 degrees (excluded). All n_vza * n_raa directions are evaluated in one vectorized
+        run.
+
+        Parameters
+        ----------
+        iza : int or float
+            Incidence (sun) zenith angle.
+        n_vza, n_raa : int
+            Number of view zenith and relative azimuth angles.
+        ks, kt, lai, hotspot, rho_surface, lidf_type, a, b, angle_unit, dtype :
+            See SAIL.
+
+        Returns
+        -------
+        SailResult with the attributes l, vza, raa, BRF, BRDF and HDR. The angles of the grid vza and raa have the
+        shapes (n_vza,) and (n_raa,) and the spectra have the shape (n_vza, n_raa, 2101).
+        """
+        dtype = float_dtype(dtype)
+        vza, raa = _hemisphere_grid(n_vza, n_raa, angle_unit)
+
+        ks, kt, rho_surface = [np.asarray(item, dtype=dtype) for item in (ks, kt, rho_surface)]
+
+        for name, item in (('ks', ks), ('kt', kt), ('rho_surface', rho_surface)):
+            if item.shape != (2101,):
+                raise AssertionError(
+                    "{0} must contain continuous values from from 400 until 2500 nm with a length of 2101. "
+                    "The actual shape of {0} is {1}".format(name, str(item.shape)))
+
+        if isinstance(lidf_type, str) and lidf_type not in LIDF.distributions:
+            raise AssertionError("The lidf_type must be {} or an array of weights".format(
+                ", ".join("'{}'".format(item) for item in LIDF.distributions)))
+
+        VollScat = VolScatt(iza, np.repeat(vza, n_raa), np.tile(raa, n_vza), angle_unit)
+        VollScat.coef(lidf_type=lidf_type, a=a, b=b)
+
+        rsot, _, _, rdot = _sail(VollScat, ks, kt, lai, hotspot, rho_surface, dtype, directions=(n_vza, n_raa))
+        rsot, rdot = [np.array(np.broadcast_to(item, (n_vza, n_raa, 2101))) for item in (rsot, rdot)]
+
+        return SailResult(l=np.arange(400, 2501), vza=vza, raa=raa, BRF=rsot, BRDF=rsot / np.pi, HDR=rdot)
+
     def __calc(self):
-        sdb = 0.5 * (self.VollScat.ks + self.VollScat.bf)
-        sdf = 0.5 * (self.VollScat.ks - self.VollScat.bf)
-        dob = 0.5 * (self.VollScat.ko + self.VollScat.bf)
-        dof = 0.5 * (self.VollScat.ko - self.VollScat.bf)
-        ddb = 0.5 * (1.0 + self.VollScat.bf)
-        ddf = 0.5 * (1.0 - self.VollScat.bf)
+        # Volume scattering coefficients in the precision of the spectra
+        vks, vko, bf, Fs, Ft = [np.asarray(item, dtype=self.dtype) for item in (
+            self.VollScat.ks, self.VollScat.ko, self.VollScat.bf, self.VollScat.Fs, self.VollScat.Ft)]
+
+        sdb = 0.5 * (vks + bf)
+        sdf = 0.5 * (vks - bf)
+        dob = 0.5 * (vko + bf)
+        dof = 0.5 * (vko - bf)
+        ddb = 0.5 * (1.0 + bf)
+        ddf = 0.5 * (1.0 - bf)
 
         sigb = ddb * self.ks + ddf * self.kt
         sigf = ddf * self.ks + ddb * self.kt
@@ -604,7 +970,7 @@ class SAIL(Kernel):
         sf = sdf * self.ks + sdb * self.kt
         vb = dob * self.ks + dof * self.kt
         vf = dof * self.ks + dob * self.kt
-        w = self.VollScat.Fs * self.ks + self.VollScat.Ft * self.kt
+        w = Fs * self.ks + Ft * self.kt
 
         if np.all(self.lai <= 0):
             # No canopy...
@@ -641,10 +1007,7 @@ class SAIL(Kernel):
             re = rinf * e1
             denom = 1. - rinf2 * e2
 
-            J1ks = self.__Jfunc1(self.VollScat.ks, m, self.lai)
-            J2ks = self.__Jfunc2(self.VollScat.ks, m, self.lai)
-            J1ko = self.__Jfunc1(self.VollScat.ko, m, self.lai)
-            J2ko = self.__Jfunc2(self.VollScat.ko, m, self.lai)
+            tss, too, J1ks, J2ks, J1ko, J2ko, z = _jfunctions(vks, vko, m, self.lai, e1)
 
             Pss = (sf + sb * rinf) * J1ks
             Qss = (sf * rinf + sb) * J2ks
@@ -661,12 +1024,8 @@ class SAIL(Kernel):
             gammasdf = (1. + rinf) * (J1ks - re * J2ks) / denom
             gammasdb = (1. + rinf) * (-re * J1ks + J2ks) / denom
 
-            tss = np.exp(-self.VollScat.ks * self.lai)
-            too = np.exp(-self.VollScat.ko * self.lai)
-            z = self.__Jfunc2(self.VollScat.ks, self.VollScat.ko, self.lai)
-
-            g1 = (z - J1ks * too) / (self.VollScat.ko + m)
-            g2 = (z - J1ko * tss) / (self.VollScat.ks + m)
+            g1 = (z - J1ks * too) / (vko + m)
+            g2 = (z - J1ko * tss) / (vks + m)
 
             Tv1 = (vf * rinf + vb) * g1
             Tv2 = (vf + vb * rinf) * g2
@@ -687,24 +1046,23 @@ class SAIL(Kernel):
             alf = 1e36
 
             # Apply correction 2/(K+k) suggested by F.-M. Breon
-            cts, cto, ctscto, tants, tanto, cospsi, dso = self.__define_geometric_constants(self.izaDeg, self.vzaDeg,
-                                                                                            self.raaDeg)
+            cts, cto, ctscto, tants, tanto, cospsi, dso = self.__define_geometric_constants()
 
             if self.hotspot > 0.:
-                alf = (dso / self.hotspot) * 2. / (self.VollScat.ks + self.VollScat.ko)
+                alf = (dso / self.hotspot) * 2. / (vks + vko)
 
             if alf == 0.:
                 # The pure hotspot
                 tsstoo = tss
-                sumint = (1. - tss) / (self.VollScat.ks * self.lai)
+                sumint = (1. - tss) / (vks * self.lai)
             else:
                 # Outside the hotspot
-                tsstoo, sumint = self.__hotspot_calculations(alf, self.lai, self.VollScat.ko, self.VollScat.ks)
+                tsstoo, sumint = self.__hotspot_calculations(alf, self.lai, vko, vks)
 
             # Bidirectional reflectance
             # Single scattering contribution
             rsos = w * self.lai * sumint
-            gammasos = self.VollScat.ko * self.lai * sumint
+            gammasos = vko * self.lai * sumint
 
             # Total canopy contribution
             rso = rsos + rsod
@@ -728,14 +1086,14 @@ class SAIL(Kernel):
             return [tss, too, tsstoo, rdd, tdd, rsd, tsd, rdo, tdo,
                     rso, rsos, rsod, rddt, rsdt, rdot, rsodt, rsost, rsot, gammasdf, gammasdb, gammaso]
 
-    def __define_geometric_constants(self, tts, tto, psi):
-        cts = np.cos(np.radians(tts))
-        cto = np.cos(np.radians(tto))
+    def __define_geometric_constants(self):
+        cts = self.geometry.cos_iza
+        cto = self.geometry.cos_vza
         ctscto = cts * cto
-        tants = np.tan(np.radians(tts))
-        tanto = np.tan(np.radians(tto))
-        cospsi = np.cos(np.radians(psi))
-        dso = np.sqrt(tants ** 2. + tanto ** 2. - 2. * tants * tanto * cospsi)
+        tants = self.geometry.tan_iza
+        tanto = self.geometry.tan_vza
+        cospsi = self.geometry.cos_raa
+        dso = np.sqrt(tants ** 2. + tanto ** 2. - 2. * tants * tanto * cospsi).astype(self.dtype)
         return cts, cto, ctscto, tants, tanto, cospsi, dso
 
     def __hotspot_calculations(self, alf, lai, ko, ks):
@@ -762,38 +1120,12 @@ class SAIL(Kernel):
             sumint = 0.
         return tsstoo, sumint
 
-    def __Jfunc1(self, k, l, t):
-        """J1 function with avoidance of singularity problem."""
-
-        try:
-            nb = len(l)
-        except TypeError:
-            nb = 1
-        del_ = (k - l) * t
-        if nb > 1:
-            result = np.zeros(nb)
-            result[np.abs(del_) > 1e-3] = (np.exp(-l[np.abs(del_) > 1e-3] * t) -
-                                           np.exp(-k * t)) / (k - l[np.abs(del_) > 1e-3])
-            result[np.abs(del_) <= 1e-3] = 0.5 * t * (np.exp(-k * t) +
-                                                      np.exp(-l[np.abs(del_) <= 1e-3] * t)) * \
-                                           (1. - (del_[np.abs(del_) <= 1e-3] ** 2.) / 12.)
-        else:
-            if np.abs(del_) > 1e-3:
-                result = (np.exp(-l * t) - np.exp(-k * t)) / (k - l)
-            else:
-                result = 0.5 * t * (np.exp(-k * t) + np.exp(-l * t)) * (1. - (del_ ** 2.) / 12.)
-        return result
-
-    def __Jfunc2(self, k, l, t):
-        """J2 function."""
-        return (1. - np.exp(-(k + l) * t)) / (k + l)
-
     def __store_aster(self, value):
         """
         Store the leaf reflectance for ASTER bands B1 - B9.
         """
 
-        value = np.array([self.l, value])
+        value = np.array([self.l, value], dtype=self.dtype)
         value = value.transpose()
 
         ASTER = namedtuple('ASTER', 'B1 B2 B3 B4 B5 B6 B7 B8 B9')
@@ -828,7 +1160,7 @@ class SAIL(Kernel):
         B2 - B7.
         """
 
-        value = np.array([self.l, value])
+        value = np.array([self.l, value], dtype=self.dtype)
         value = value.transpose()
 
         L8 = namedtuple('L8', 'B2 B3 B4 B5 B6 B7')
@@ -874,6 +1206,9 @@ class PROSPECT:
         Mean leaf angle (degrees) use 57 for a spherical LIDF. Default is 40.
     version : {'5', 'D'}
         PROSPECT version. Default is '5'.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of all returns. Default is float64. In float32 the spectra
+        deviate less than 1e-5 from float64, which is below the tolerance of the reference spectra (1e-4).
 
     Returns
     -------
@@ -897,7 +1232,7 @@ class PROSPECT:
 
     """
 
-    def __init__(self, N, Cab, Cxc, Cbr, Cw, Cm, Can=0, alpha=40, version='5'):
+    def __init__(self, N, Cab, Cxc, Cbr, Cw, Cm, Can=0, alpha=40, version='5', dtype=np.float64):
 
         self.N = N
         self.Cab = Cab
@@ -908,6 +1243,7 @@ class PROSPECT:
         self.Can = Can
         self.alpha = alpha
         self.ver = version
+        self.dtype = float_dtype(dtype)
 
         self.l = np.arange(400, 2501)
         self.n_l = len(self.l)
@@ -943,6 +1279,11 @@ class PROSPECT:
             self.Km = lib.pd.Km
             self.Kan = lib.pd.Kan
 
+        # The spectral library is stored in float32
+        self.KN, self.Kab, self.Kxc, self.Kbr, self.Kw, self.Km, self.Kan = [
+            item.astype(self.dtype, copy=False) for item in (self.KN, self.Kab, self.Kxc, self.Kbr, self.Kw, self.Km,
+                                                             self.Kan)]
+
         self.n_elems_list = [len(spectrum) for spectrum in
                              [self.KN, self.Kab, self.Kxc, self.Kbr, self.Kw, self.Km, self.Kan]]
 
@@ -974,7 +1315,8 @@ class PROSPECT:
         nm = n2 - 1
         a = (KN + 1) * (KN + 1) / 2.
         k = -(n2 - 1) * (n2 - 1) / 4.
-        sa = np.sin(np.deg2rad(alpha))
+        # In the precision of the spectra (a float64 scalar would promote float32 spectra)
+        sa = np.sin(np.deg2rad(alpha)).astype(np.result_type(KN, np.float32))
 
         if alpha != 90:
             b1 = np.sqrt((sa * sa - npx / 2) * (sa * sa - npx / 2) + k)
@@ -1068,7 +1410,7 @@ class PROSPECT:
         self.om = self.ks / self.ke
 
         self.int = [self.l, self.ks, self.kt, self.ka, self.ke, self.om]
-        RT = np.asarray(self.int, dtype=np.float32)
+        RT = np.asarray(self.int, dtype=self.dtype)
         self.int = RT.transpose()
 
     def __store(self):
@@ -1222,7 +1564,7 @@ class PROSPECT:
             om = ranges[:, 5].mean()
 
             ranges = [ks, kt, ka, ke, om]
-            return np.asarray(ranges, dtype=np.float32)
+            return np.asarray(ranges, dtype=self.dtype)
 
     def indices(self):
         self.ndvi = (self.select(851, 879)[0] - self.select(636, 673)[0]) / (
@@ -1783,13 +2125,10 @@ class exponential(CorrFunc):
         self.calc()
 
     def calc(self):
-        Wn = []
-        for i in srange(self.Ts):
-            i += 1
-            self.wn = self.corrlen ** 2 / i ** 2 * (1 + (self.wvnb * self.corrlen / i) ** 2) ** (-1.5)
-            Wn.append(self.wn)
+        i = np.arange(1, self.Ts + 1).reshape((-1,) + (1,) * max(np.ndim(self.wvnb), 1))
 
-        self.Wn = np.asarray(Wn, dtype=np.float)
+        self.Wn = self.corrlen ** 2 / i ** 2 * (1 + (self.wvnb * self.corrlen / i) ** 2) ** (-1.5)
+        self.wn = self.Wn[-1]
         self.rss = self.sigma / self.corrlen
 
 
@@ -1809,13 +2148,10 @@ class gaussian(CorrFunc):
         self.calc()
 
     def calc(self):
-        Wn = []
-        for i in srange(self.Ts):
-            i += 1
-            self.wn = self.corrlen ** 2 / (2 * i) * np.exp(-(self.wvnb * self.corrlen) ** 2 / (4 * i))
-            Wn.append(self.wn)
+        i = np.arange(1, self.Ts + 1).reshape((-1,) + (1,) * max(np.ndim(self.wvnb), 1))
 
-        self.Wn = np.asarray(Wn, dtype=np.float)
+        self.Wn = self.corrlen ** 2 / (2 * i) * dual.exp(-(self.wvnb * self.corrlen) ** 2 / (4 * i))
+        self.wn = self.Wn[-1]
         self.rss = np.sqrt(2) * self.sigma / self.corrlen
 
 
@@ -1835,15 +2171,11 @@ class xpower(CorrFunc):
         self.calc()
 
     def calc(self):
-        import scipy as sp
-        Wn = []
-        for i in srange(self.Ts):
-            i += 1
-            self.wn = self.corrlen ** 2 * (self.wvnb * self.corrlen) ** (-1 + self.n * i) * sp.special.kv(
-                1 - self.n * i, self.wvnb * self.corrlen) / (2 ** (self.n * i - 1) * sp.special.gamma(self.n * i))
-            Wn.append(self.wn)
+        i = np.arange(1, self.Ts + 1).reshape((-1,) + (1,) * max(np.ndim(self.wvnb), 1))
 
-        self.Wn = np.asarray(Wn, dtype=np.float)
+        self.Wn = self.corrlen ** 2 * (self.wvnb * self.corrlen) ** (-1 + self.n * i) * dual.kv(
+            1 - self.n * i, self.wvnb * self.corrlen) / (2. ** (self.n * i - 1) * gamma(self.n * i))
+        self.wn = self.Wn[-1]
         if self.n == 1.5:
             self.rss = np.sqrt(self.n * 2) * self.sigma / self.corrlen
         else:
@@ -1864,7 +2196,9 @@ class mixed(CorrFunc):
         exp = exponential(self.n, self.wvnb, self.sigma, self.corrlen, self.Ts)
 
         self.Wn = gauss.Wn / exp.Wn
-        self.rss = gauss.rss / exp.rss
+
+        # The exponential correlation has no finite rms slope, thus the one of the Gaussian part is used
+        self.rss = gauss.rss
 
 
 # ---- Surface Models ----
@@ -1889,6 +2223,8 @@ class LSM:
         Surface (Lambertian) reflectance in optical wavelength.
     moisture : int or float
         Surface moisture content between 0 and 1.
+    dtype : {numpy.float64, numpy.float32}, optional
+        Floating point precision of the calculation and of all returns. Default is float64.
 
     Returns
     -------
@@ -1905,18 +2241,20 @@ class LSM:
 
     """
 
-    def __init__(self, reflectance, moisture):
+    def __init__(self, reflectance, moisture, dtype=np.float64):
 
         self.l = np.arange(400, 2501)
         self.sRef = reflectance
         self.moisture = moisture
+        self.dtype = float_dtype(dtype)
         self.__calc()
         self.__store()
 
     def __calc(self):
-        self.ref = self.sRef * (self.moisture * lib.soil.rsoil1 + (1 - self.moisture) * lib.soil.rsoil2)
+        rsoil1, rsoil2 = [item.astype(self.dtype, copy=False) for item in lib.soil]
+        self.ref = self.sRef * (self.moisture * rsoil1 + (1 - self.moisture) * rsoil2)
         self.int = [self.l, self.ref]
-        self.int = np.asarray(self.int, dtype=np.float32)
+        self.int = np.asarray(self.int, dtype=self.dtype)
         self.int = self.int.transpose()
 
     #        self.surface = ReflectanceResult(ref=self.ref,
@@ -2038,6 +2376,70 @@ class LSM:
                 delattr(self, item)
 
 
+def _slope_averaged_reflection(er, sigx, s, cs, n_nodes=64):
+    """
+    Slope averaged reflection coefficients (see I2EM.__average_reflection_coefficients) with a Gauss-Legendre quadrature
+    over the slopes in units of the rms slope sigx for all angles at once. The parameters er and sigx may be Dual
+    numbers.
+
+    The vertical reflection coefficient has a pole at the facets with A = -sqrt(1 + Zx ** 2 + Zy ** 2) / sqrt(er + 1),
+    which is only shifted from the real slopes by the loss of the soil. For each Zy the Zx axis is split in two panels
+    which are mirrored at the real part of the pole (so that the odd part of the pole cancels) and the remainder. With
+    64 nodes per panel the result agrees with the dblquad integration to about 1e-8 for rms slopes up to 1.
+    """
+    u, w = np.polynomial.legendre.leggauss(n_nodes)
+    x, wx = (u + 1) / 2, w / 2
+
+    s = np.reshape(s, (-1, 1, 1))
+    cs = np.reshape(cs, (-1, 1, 1))
+    ty = 3 * u.reshape(1, -1, 1)
+
+    # Pole of Rv: (cs + Zx * s) ** 2 * (er + 1) = 1 + Zx ** 2 + Zy ** 2 with cs + Zx * s < 0. The panels are constants
+    # of the derivatives (the integral does not depend on them).
+    e1 = dual.value(er) + 1
+    a = e1 * s ** 2 - 1
+    b = 2 * e1 * cs * s
+    c = e1 * cs ** 2 - 1 - (dual.value(sigx) * ty) ** 2
+    d = np.sqrt(b ** 2 - 4 * a * c + 0j)
+    q = -(b + np.where(np.real(np.conj(b) * d) >= 0, d, -d)) / 2
+    roots = np.real([q / a, c / q])
+    t0 = np.clip(np.where(roots[0] < roots[1], roots[0], roots[1]) / dual.value(sigx), -3, 3)
+
+    # The mirrored panels [t0 - h, t0] and [t0, t0 + h] and the remainder [lower, upper]
+    h = np.minimum(t0 + 3, 3 - t0)
+    lower = np.where(t0 < 0, t0 + h, -3.)
+    upper = np.where(t0 < 0, 3., t0 - h)
+    tx = np.concatenate([t0 - h * x, t0 + h * x, lower + (upper - lower) * x], axis=-1)
+    weights = np.concatenate(np.broadcast_arrays(h * wx, h * wx, (upper - lower) * wx), axis=-1)
+    weights = weights * 3 * w.reshape(1, -1, 1) * np.exp(-(tx ** 2 + ty ** 2) / 2) / (2 * np.pi)
+
+    Zx = sigx * tx
+    Zy = sigx * ty
+
+    A = cs + Zx * s
+    B = er * (1 + Zx ** 2 + Zy ** 2)
+    CC = s ** 2 - 2 * Zx * s * cs + Zx ** 2 * cs ** 2 + Zy ** 2
+    root = dual.sqrt(B - CC)
+
+    Rv = (er * A - root) / (er * A + root)
+    Rh = (A - root) / (A + root)
+
+    # The dblquad integration takes the real part of the integrands
+    return dual.sum(dual.real(Rv) * weights, axis=(1, 2)), dual.sum(dual.real(Rh) * weights, axis=(1, 2))
+
+
+def _shadowing(iza, rss, backscatter):
+    """
+    Shadowing function of Smith (1967) for a Gaussian surface with the rms slope rss at the backscatter geometry
+    (vza == iza and raa == 180°). It is one where backscatter is False. The parameter rss may be a Dual number.
+    """
+    ctorslp = cot(np.where(backscatter, iza, np.pi / 4)) / np.sqrt(2) / rss
+    shadf = 0.5 * (dual.exp(-ctorslp ** 2) / np.sqrt(np.pi) / ctorslp - dual.erfc(ctorslp))
+
+    # The shadowing of the incident and the scattered direction are the same
+    return dual.where(backscatter, 1 / (1 + 2 * shadf), 1.)
+
+
 class I2EM(Kernel):
     """
      RADAR Surface Scatter Based Kernel (I2EM). Compute BSC VV and
@@ -2057,10 +2459,13 @@ class I2EM(Kernel):
      angle_unit : {'DEG', 'RAD'}, optional
          * 'DEG': All input angles (iza, vza, raa) are in [DEG] (default).
          * 'RAD': All input angles (iza, vza, raa) are in [RAD].
-     frequency : int or float
-         RADAR Frequency (GHz).
-     diel_constant : int or float
-         Complex dielectric constant of soil.
+     frequency : int, float or array_like
+         RADAR Frequency (GHz). If frequency is an array with n_frequencies values, the backscatter coefficients have
+         the shape (n_frequencies, n_angles) and the frequency independent parts (the trigonometric terms of the
+         geometry and the slope averaged reflection coefficients) are computed once for all frequencies.
+     diel_constant : int, float, complex or array_like
+         Complex dielectric constant of soil. If frequency is an array, diel_constant may be an array with one value
+         per frequency.
      corrlength : int or float
          Correlation length (cm).
      sigma : int or float
@@ -2071,9 +2476,40 @@ class I2EM(Kernel):
      corrfunc : {'exponential', 'gaussian', 'xpower', 'mixed'}, optional
          Correlation distribution functions. The `mixed` correlation function is the result of the division of
          gaussian correlation function with exponential correlation function. Default is 'exponential'.
+     jacobian : boolean, optional
+         Set to 'True' to calculate the derivatives of the backscatter coefficients with respect to the real and
+         imaginary part of the dielectric constant, the rms height and the correlation length in the same pass.
+         Only available for a scalar frequency. Default is False.
+     cache : pyrism.cache.PersistentCache or None, optional
+         Persistent cache for the slope averaged reflection coefficients (Rav and Rah), which are the most expensive
+         part of the model. They only depend on the incidence angle, the dielectric constant and the ratio of rms
+         height and correlation length. Default is None (no caching).
+     profile : boolean, optional
+         Set to 'True' to record the wall time of each stage of the model, the series length and the number of
+         integrand evaluations of the numerical quadrature in the attribute profile. Default is False.
+     monostatic : boolean, optional
+         Set to 'True' for backscatter (vza == iza and raa == 180°). The arguments vza and raa are ignored (if iza is
+         a Geometry, it must be monostatic). The results are the ones of the general model at this geometry, but the
+         field coefficients use simplified expressions, the shadowing applies to all angles and the slope averaged
+         reflection coefficients are a Gauss-Legendre quadrature for all distinct incidence angles at once (it agrees
+         with the numerical integration of the general model to about 1e-8), which is much faster for many angles.
+         Default is False.
+     slope_average : tuple of ndarray or None, optional
+         Slope averaged reflection coefficients (Rav, Rah) of an earlier run with the same angles, dielectric
+         constant and ratio of rms height and correlation length (e.g. the attributes Rav and Rah). They replace the
+         numerical quadrature, thus a run at other frequencies is much faster. Default is None.
 
      Returns
      -------
+     jacobian : ReflectanceResult or None
+         If jacobian is True, the derivatives with the attributes names, VV, HH, VVdB and HHdB. The derivatives have
+         the shape (n_angles, 4) and the last axis is ordered like names (eps_real, eps_imag, sigma, corrlength).
+     BSC.VV, BSC.HH, ... : ndarray
+         Backscatter coefficients with the shape (n_angles,) or (n_frequencies, n_angles) if frequency is an array.
+     profile : ProfileResult or None
+         If profile is True, the profile with the attributes stages (wall time in seconds per stage), total, Ts
+         (number of terms of the series), evaluations (integrand evaluations of the slope averaged reflection
+         coefficients) and cached (number of angles whose slope averages were found in the cache).
      For more attributes see also pyrism.core.Kernel and pyrism.core.ReflectanceResult.
 
      See Also
@@ -2094,37 +2530,126 @@ class I2EM(Kernel):
     # TODO: Delete unnecessary self. calls.
 
     def __init__(self, iza, vza, raa, normalize=True, nbar=0.0, angle_unit='DEG', frequency=None, diel_constant=None,
-                 corrlength=None, sigma=None, n=10, corrfunc='exponential'):
+                 corrlength=None, sigma=None, n=10, corrfunc='exponential', jacobian=False, cache=None,
+                 profile=False, monostatic=False, slope_average=None):
+
+        if monostatic and not isinstance(iza, Geometry):
+            vza = iza
+            raa = 180. if angle_unit == 'DEG' else np.pi
 
         super(I2EM, self).__init__(iza, vza, raa, normalize, nbar, angle_unit)
 
-        if corrfunc is 'exponential':
+        self.monostatic = monostatic
+
+        if monostatic:
+            n_angles = len(self.iza) - 1 if self.normalize else len(self.iza)
+
+            if not (np.allclose(self.vza[:n_angles], self.iza[:n_angles]) and
+                    np.allclose(self.raa[:n_angles], np.pi)):
+                raise ValueError("The geometry of the monostatic mode must have vza == iza and raa == 180°")
+
+        if corrfunc == 'exponential':
             self.corrfunc = exponential
-        elif corrfunc is 'gaussian':
+        elif corrfunc == 'gaussian':
             self.corrfunc = gaussian
-        elif corrfunc is 'xpower':
+        elif corrfunc == 'xpower':
             self.corrfunc = xpower
-        elif corrfunc is 'mixed':
+        elif corrfunc == 'mixed':
             self.corrfunc = mixed
         else:
             raise ValueError("The parameter corrfunc must be 'exponential', 'gaussian' or 'xpower'")
 
+        if np.ndim(frequency) > 0:
+            # The frequencies are the first axis of all frequency dependent terms
+            frequency = np.asarray(frequency, dtype=np.float64).ravel()
+
+            if jacobian:
+                raise ValueError("The jacobian is only available for a scalar frequency")
+
+            if np.ndim(diel_constant) > 0:
+                diel_constant = np.asarray(diel_constant).ravel()
+
+                if len(diel_constant) != len(frequency):
+                    raise ValueError("diel_constant must be a scalar or have one value per frequency. The actual "
+                                     "lengths are diel_constant: {0} and frequency: {1}".format(
+                                         str(len(diel_constant)), str(len(frequency))))
+
+                diel_constant = diel_constant.reshape(-1, 1)
+
+        elif np.ndim(diel_constant) > 0:
+            raise ValueError("diel_constant can only be an array if frequency is an array")
+
         self.er = diel_constant
         self.corrlen = corrlength  # in cm
         self.n = n
         self.sigma = sigma  # in cm
         self.freq = frequency
+        self.cache = cache
+        self.slope_average = slope_average
+        self.profile = ProfileResult(stages=OrderedDict(), evaluations=0, cached=0) if profile else None
+
+        self.__run(self.__set_coef)
+        self.__run(self.__reflection_coefficients)
+        self.__run(self.__r_transition)
+        self.__run(self.__average_reflection_coefficients)
+        self.__run(self.__biStatic_coefficient)
+        self.__run(self.__Ipp)
+        self.__run(self.__shadowing_function)
+        self.__run(self.__sigma_nought)
+        self.jacobian = self.__run(self.__jacobian) if jacobian else None
+        self.__run(self.__normalize)
+        self.__run(self.__store)
+
+        if self.profile is not None:
+            self.profile.Ts = self.Ts
+            self.profile.total = sum(self.profile.stages.values())
+
+    @classmethod
+    def hemisphere(cls, iza, n_vza, n_raa, frequency, diel_constant, corrlength, sigma, n=10, corrfunc='exponential',
+                   angle_unit='DEG', cache=None):
+        """
+        Run I2EM for all scattering directions of the upper hemisphere at once.
 
-        self.__set_coef()
-        self.__reflection_coefficients()
-        self.__r_transition()
-        self.__average_reflection_coefficients()
-        self.__biStatic_coefficient()
-        self.__Ipp()
-        self.__shadowing_function()
-        self.__sigma_nought()
-        self.__normalize()
-        self.__store()
+        The scattering zenith angles are equally spaced between nadir and the horizon (excluded) and the relative
+        azimuth angles between 0 and 360 degrees (excluded). All n_vza * n_raa directions are evaluated in one
+        vectorized run and the slope averaged reflection coefficients are computed only once for the incidence angle.
+
+        Parameters
+        ----------
+        iza : int or float
+            Incidence zenith angle.
+        n_vza, n_raa : int
+            Number of scattering zenith and relative azimuth angles.
+        frequency, diel_constant, corrlength, sigma, n, corrfunc, angle_unit, cache :
+            See I2EM.
+
+        Returns
+        -------
+        ReflectanceResult with the attributes vza, raa, VV, HH, VVdB and HHdB. The angles of the grid vza and raa have
+        the shapes (n_vza,) and (n_raa,) and the backscatter coefficients have the shape (n_vza, n_raa) or
+        (n_frequencies, n_vza, n_raa) if frequency is an array.
+        """
+        vza, raa = _hemisphere_grid(n_vza, n_raa, angle_unit)
+
+        model = cls(iza, np.repeat(vza, n_raa), np.tile(raa, n_vza), normalize=False, angle_unit=angle_unit,
+                    frequency=frequency, diel_constant=diel_constant, corrlength=corrlength, sigma=sigma, n=n,
+                    corrfunc=corrfunc, cache=cache)
+
+        shape = np.shape(model.VV)[:-1] + (n_vza, n_raa)
+
+        return ReflectanceResult(vza=vza, raa=raa, VV=np.reshape(model.VV, shape), HH=np.reshape(model.HH, shape),
+                                 VVdB=np.reshape(model.VVdB, shape), HHdB=np.reshape(model.HHdB, shape))
+
+    def __run(self, stage):
+        # Call a stage of the model and record its wall time if profile is True
+        if self.profile is None:
+            return stage()
+
+        start = default_timer()
+        result = stage()
+        self.profile.stages[stage.__name__.strip('_')] = default_timer() - start
+
+        return result
 
     def __normalize(self):
         self.norm = 0.
@@ -2132,13 +2657,17 @@ class I2EM(Kernel):
         # the nadir-nadir kernel
         if self.normalize == True:
             # normalize nbar-nadir (so kernel is 0 at nbar-nadir)
-            self.norm = self.VV[-1]
+            self.norm = self.VV[..., -1]
 
             # depreciate length of arrays (well, teh ones we'll use again in any case)
-            self.VV = self.VV[0:-1]
-            self.HH = self.HH[0:-1]
-            self.VVdB = self.VVdB[0:-1]
-            self.HHdB = self.HHdB[0:-1]
+            self.VV = self.VV[..., 0:-1]
+            self.HH = self.HH[..., 0:-1]
+            self.VVdB = self.VVdB[..., 0:-1]
+            self.HHdB = self.HHdB[..., 0:-1]
+
+            if self.jacobian is not None:
+                for item in ('VV', 'HH', 'VVdB', 'HHdB'):
+                    self.jacobian[item] = self.jacobian[item][0:-1]
 
             self.vzaDeg = self.vzaDeg[0:-1]
             self.izaDeg = self.izaDeg[0:-1]
@@ -2151,50 +2680,68 @@ class I2EM(Kernel):
     def __set_coef(self):
         self.phi = 0
         self.merror = 1.0e8
-        self.k = 2 * np.pi * self.freq / 30
-        self.kz_iza = self.k * np.cos(self.iza + 0.01)
-        self.kz_vza = self.k * np.cos(self.vza)
+        self.k = 2 * np.pi * np.reshape(self.freq, (-1, 1) if np.ndim(self.freq) > 0 else ()) / 30
+
+        # Trigonometric terms of the (slightly shifted) incidence angle
+        self.__cs, self.__s = self.geometry.cos_sin_iza(0.01)
+
+        self.kz_iza = self.k * self.__cs
+        self.kz_vza = self.k * self.geometry.cos_vza
 
     def __reflection_coefficients(self):
         warnings.filterwarnings("ignore")
 
-        self.rt = np.sqrt(self.er - np.sin(self.iza + 0.01) ** 2)
-        self.Rvi = (self.er * np.cos(self.iza + 0.01) - self.rt) / (self.er * np.cos(self.iza + 0.01) + self.rt)
-        self.Rhi = (np.cos(self.iza + 0.01) - self.rt) / (np.cos(self.iza + 0.01) + self.rt)
-        self.wvnb = self.k * np.sqrt(
-            (np.sin(self.vza) * np.cos(self.raa) - np.sin(self.iza + 0.01) * np.cos(self.phi)) ** 2 + (
-                    np.sin(self.vza) * np.sin(self.raa) - np.sin(self.iza + 0.01) * np.sin(self.phi)) ** 2)
+        self.rt = np.sqrt(self.er - self.__s ** 2)
+        self.Rvi = (self.er * self.__cs - self.rt) / (self.er * self.__cs + self.rt)
+        self.Rhi = (self.__cs - self.rt) / (self.__cs + self.rt)
+        if self.monostatic:
+            self.wvnb = self.k * (self.geometry.sin_vza + self.__s)
+        else:
+            self.wvnb = self.k * np.sqrt(
+                (self.geometry.sin_vza * self.geometry.cos_raa - self.__s * np.cos(self.phi)) ** 2 + (
+                        self.geometry.sin_vza * self.geometry.sin_raa - self.__s * np.sin(self.phi)) ** 2)
         self.Ts = 1
 
-        while self.merror >= 1.0e-3 and self.Ts <= 150:
+        # Series length of each frequency
+        terms = np.zeros(np.shape(self.k)[:-1], dtype=int)
+
+        while np.any(self.merror >= 1.0e-3) and self.Ts <= 150:
             self.Ts += 1
             self.error = ((self.k * self.sigma) ** 2 * (
-                    np.cos(self.iza + 0.01) + np.cos(self.vza)) ** 2) ** self.Ts / factorial(self.Ts)
-            self.merror = self.error.mean()
+                    self.__cs + self.geometry.cos_vza) ** 2) ** self.Ts / factorial(self.Ts)
+            self.merror = self.error.mean(axis=-1)
+            terms[(terms == 0) & (self.merror < 1.0e-3)] = self.Ts
 
         self.CorrFunc = self.corrfunc(self.n, self.wvnb, self.sigma, self.corrlen, self.Ts)
 
+        if terms.ndim > 0:
+            # The series of each frequency ends at its own length, so that the results agree with a call per
+            # frequency. The terms after it are removed with the weights of the correlation function.
+            terms[terms == 0] = self.Ts
+            i = np.arange(1, self.Ts + 1).reshape(-1, 1, 1)
+            self.CorrFunc.Wn = np.where(i <= terms[:, np.newaxis], self.CorrFunc.Wn, 0.)
+
     def __r_transition(self):
         warnings.filterwarnings("ignore")
         self.Rv0 = (np.sqrt(self.er) - 1) / (np.sqrt(self.er) + 1)
         self.Rh0 = -self.Rv0
 
-        self.Ft = 8 * self.Rv0 ** 2 * np.sin(self.vza) * (
-                np.cos(self.iza + 0.01) + np.sqrt(self.er - np.sin(self.iza + 0.01) ** 2)) / (
-                          np.cos(self.iza + 0.01) * np.sqrt(self.er - np.sin(self.iza + 0.01) ** 2))
+        self.Ft = 8 * self.Rv0 ** 2 * self.geometry.sin_vza * (
+                self.__cs + np.sqrt(self.er - self.__s ** 2)) / (
+                          self.__cs * np.sqrt(self.er - self.__s ** 2))
         self.a1 = 0
         self.b1 = 0
 
         for i in srange(self.Ts):
             i += 1
-            self.a0 = ((self.k * self.sigma) * np.cos(self.iza + 0.01)) ** (2 * i) / factorial(i)
+            self.a0 = ((self.k * self.sigma) * self.__cs) ** (2 * i) / factorial(i)
             self.a1 = self.a1 + self.a0 * self.CorrFunc.Wn[i - 1]
             self.b1 = self.b1 + self.a0 * (np.abs(
-                self.Ft / 2 + 2 ** (i + 1) * self.Rv0 / np.cos(self.iza + 0.01) * np.exp(
-                    - ((self.k * self.sigma) * np.cos(self.iza + 0.01)) ** 2))) ** 2 * self.CorrFunc.Wn[i - 1]
+                self.Ft / 2 + 2. ** (i + 1) * self.Rv0 / self.__cs * np.exp(
+                    - ((self.k * self.sigma) * self.__cs) ** 2))) ** 2 * self.CorrFunc.Wn[i - 1]
 
         self.St = 0.25 * (np.abs(self.Ft) ** 2) * self.a1 / self.b1
-        self.St0 = 1 / (np.abs(1 + 8 * self.Rv0 / (np.cos(self.iza + 0.01) * self.Ft))) ** 2
+        self.St0 = 1 / (np.abs(1 + 8 * self.Rv0 / (self.__cs * self.Ft))) ** 2
         self.Tf = 1 - self.St / self.St0
 
     def __average_reflection_coefficients(self):
@@ -2209,77 +2756,122 @@ class I2EM(Kernel):
         self.sigy = self.sigx
         self.xxx = 3 * self.sigx
 
-        def RaV_integration():
-            warnings.filterwarnings("ignore")
-            rav = []
-            for i in srange(len(self.iza)):
-                def integration(Zy, Zx):
-                    self.A = np.cos(self.iza + 0.01)[i] + Zx * np.sin(self.iza + 0.01)[i]
-                    self.B = self.er * (1 + Zx ** 2 + Zy ** 2)
-                    self.CC = np.sin(self.iza + 0.01)[i] ** 2 - 2 * Zx * np.sin(self.iza + 0.01)[i] * \
-                              np.cos(self.iza + 0.01)[i] + Zx ** 2 * np.cos(self.iza + 0.01)[i] ** 2 + Zy ** 2
-                    self.Rv = (self.er * self.A - np.sqrt(self.B - self.CC)) / (
-                            self.er * self.A + np.sqrt(self.B - self.CC))
-                    self.pd = np.exp(-Zx ** 2 / (2 * self.sigx ** 2) - Zy ** 2 / (2 * self.sigy ** 2))
-                    Rav = self.Rv * self.pd
-                    return Rav
-
-                ravv = dblquad(integration, -self.xxx, self.xxx, lambda x: -self.xxx, lambda x: self.xxx)
-                temp = np.asarray(ravv[0]) / (2 * np.pi * self.sigx * self.sigy)
-                rav.append(temp)
-            self.Rav = np.asarray(rav)
-            return self.Rav
-
-        def RaH_integration():
-            warnings.filterwarnings("ignore")
-
-            rah = []
-            for i in srange(len(self.iza)):
-                def integration(Zy, Zx):
-                    self.A = np.cos(self.iza + 0.01)[i] + Zx * np.sin(self.iza + 0.01)[i]
-                    self.B = self.er * (1 + Zx ** 2 + Zy ** 2)
-                    self.CC = np.sin(self.iza + 0.01)[i] ** 2 - 2 * Zx * np.sin(self.iza + 0.01)[i] * \
-                              np.cos(self.iza + 0.01)[i] + Zx ** 2 * np.cos(self.iza + 0.01)[i] ** 2 + Zy ** 2
-
-                    self.Rh = (self.A - np.sqrt(self.B - self.CC)) / (self.A + np.sqrt(self.B - self.CC))
-
-                    self.pd = np.exp(-Zx ** 2 / (2 * self.sigx ** 2) - Zy ** 2.0 / (2 * self.sigy ** 2))
-                    RaH = self.Rh * self.pd
-                    return RaH
-
-                rahh = dblquad(integration, -self.xxx, self.xxx, lambda x: -self.xxx, lambda x: self.xxx)
-                temp = np.asarray(rahh[0]) / (2 * np.pi * self.sigx * self.sigy)
-                rah.append(temp)
-            self.Rah = np.asarray(rah)
-            return self.Rah
-
-        self.Rav = RaV_integration()
-        self.Rah = RaH_integration()
+        if self.slope_average is not None:
+            self.Rav, self.Rah = (np.asarray(item) for item in self.slope_average)
+            return
+
+        # The slope averages do not depend on the frequency, thus they are computed once per dielectric constant
+        diel_constants = np.ravel(self.er)
+        if np.all(diel_constants == diel_constants[0]):
+            diel_constants = diel_constants[:1]
+
+        # The slope averages do not depend on vza and raa, thus they are computed once per distinct incidence angle
+        _, first, inverse = np.unique(self.iza, return_index=True, return_inverse=True)
+
+        rav = []
+        rah = []
+        for er in diel_constants:
+            if self.monostatic:
+                self.__slope_average_monostatic(first, er, rav, rah)
+                continue
+
+            for i in first:
+                if self.cache is None:
+                    value = self.__slope_average(i, er)
+                else:
+                    key = self.cache.key('I2EM.Rav.Rah', self.iza[i], er, self.sigx)
+                    value = self.cache.get(key)
+
+                    if value is None:
+                        value = self.__slope_average(i, er)
+                        self.cache.put(key, value)
+                    elif self.profile is not None:
+                        self.profile.cached += 1
+
+                rav.append(value[0])
+                rah.append(value[1])
+
+        shape = (-1, len(first)) if len(diel_constants) > 1 else (len(first),)
+        self.Rav = np.asarray(rav).reshape(shape)[..., inverse]
+        self.Rah = np.asarray(rah).reshape(shape)[..., inverse]
+
+    def __slope_average_monostatic(self, first, er, rav, rah):
+        # Gauss-Legendre quadrature of the slope averages for blocks of the distinct angles at once (see
+        # _slope_averaged_reflection) instead of a dblquad integration per angle. The quadrature agrees with dblquad to
+        # about 1e-8 and is cheap, thus the cache is not used.
+        for block in range(0, len(first), 64):
+            i = first[block:block + 64]
+            value = _slope_averaged_reflection(er, self.sigx, self.__s[i], self.__cs[i])
+
+            rav.extend(value[0])
+            rah.extend(value[1])
+
+        if self.profile is not None:
+            # Two integrands at 64 x 192 nodes per angle
+            self.profile.evaluations += 2 * len(first) * 64 * 192
+
+    def __slope_average(self, i, er):
+        """Slope averaged reflection coefficients Rav and Rah for the i-th angle and the dielectric constant er."""
+        cs = self.__cs[i]
+        s = self.__s[i]
+
+        def surface(Zy, Zx):
+            A = cs + Zx * s
+            B = er * (1 + Zx ** 2 + Zy ** 2)
+            CC = s ** 2 - 2 * Zx * s * cs + Zx ** 2 * cs ** 2 + Zy ** 2
+            pd = np.exp(-Zx ** 2 / (2 * self.sigx ** 2) - Zy ** 2 / (2 * self.sigy ** 2))
+
+            return A, B, CC, pd
+
+        def RaV_integration(Zy, Zx):
+            A, B, CC, pd = surface(Zy, Zx)
+            return (er * A - np.sqrt(B - CC)) / (er * A + np.sqrt(B - CC)) * pd
+
+        def RaH_integration(Zy, Zx):
+            A, B, CC, pd = surface(Zy, Zx)
+            return (A - np.sqrt(B - CC)) / (A + np.sqrt(B - CC)) * pd
+
+        if self.profile is not None:
+            RaV_integration, RaH_integration = self.__counted(RaV_integration), self.__counted(RaH_integration)
+
+        norm = 2 * np.pi * self.sigx * self.sigy
+        rav = dblquad(RaV_integration, -self.xxx, self.xxx, lambda x: -self.xxx, lambda x: self.xxx)[0] / norm
+        rah = dblquad(RaH_integration, -self.xxx, self.xxx, lambda x: -self.xxx, lambda x: self.xxx)[0] / norm
+
+        return np.array([rav, rah])
+
+    def __counted(self, integrand):
+        # Integrand which counts its evaluations in the profile
+        def counted(*args):
+            self.profile.evaluations += 1
+            return integrand(*args)
+
+        return counted
 
     def __biStatic_coefficient(self):
         warnings.filterwarnings("ignore")
 
-        if np.array_equal(self.vza, self.iza) == True and (np.all(self.raa) == 3.14159265) == True:
-            self.Rvt = self.Rvi + (self.Rv0 - self.Rvi) * self.Tf
-            self.Rht = self.Rhi + (self.Rh0 - self.Rhi) * self.Tf
+        self.Rvt = self.Rav
+        self.Rht = self.Rah
+
+        if self.monostatic:
+            # cos(raa) = -1
+            geometry = (self.__s * self.geometry.sin_vza + 1 + self.__cs * self.geometry.cos_vza) / (
+                    self.__cs + self.geometry.cos_vza)
 
         else:
-            self.Rvt = self.Rav
-            self.Rht = self.Rah
+            geometry = (self.__s * self.geometry.sin_vza - (1 + self.__cs * self.geometry.cos_vza) *
+                        self.geometry.cos_raa) / (self.__cs + self.geometry.cos_vza)
 
-        self.fvv = 2 * self.Rvt * (
-                np.sin(self.iza + 0.01) * np.sin(self.vza) - (1 + np.cos(self.iza + 0.01) * np.cos(self.vza)) * np.cos(
-            self.raa)) / (np.cos(self.iza + 0.01) + np.cos(self.vza))
-        self.fhh = -2 * self.Rht * (
-                np.sin(self.iza + 0.01) * np.sin(self.vza) - (1 + np.cos(self.iza + 0.01) * np.cos(self.vza)) * np.cos(
-            self.raa)) / (np.cos(self.iza + 0.01) + np.cos(self.vza))
+        self.fvv = 2 * self.Rvt * geometry
+        self.fhh = -2 * self.Rht * geometry
 
     def __Fppupdn_calc(self, ud, method, Rvi, Rhi, er, k, kz, ksz, s, cs, ss, css, cf, cfs, sfs):
         warnings.filterwarnings("ignore")
 
         if method == 1:
             Gqi = ud * kz
-            Gqti = ud * k * np.sqrt(er - s ** 2)
+            Gqti = ud * k * dual.sqrt(er - s ** 2)
             qi = ud * kz
 
             c11 = k * cfs * (ksz - qi)
@@ -2298,7 +2890,7 @@ class I2EM(Kernel):
 
         if method == 2:
             Gqs = ud * ksz
-            Gqts = ud * k * np.sqrt(er - ss ** 2)
+            Gqts = ud * k * dual.sqrt(er - ss ** 2)
             qs = ud * ksz
 
             c11 = k * cfs * (kz + qs)
@@ -2313,8 +2905,45 @@ class I2EM(Kernel):
             c42 = k * css * (cfs * (cs * (kz + qs) - k * s * (ss * cfs - s * cf)) - k * s * ss * sfs ** 2)
             c52 = -css * (k ** 2 * ss * (ss * cfs - s * cf) + Gqts * cfs * (kz + qs))
 
+        return self.__Fppupdn_sum((c11, c21, c31, c41, c51), (c12, c22, c32, c42, c52), Rvi, Rhi, er, k, kz, s)
+
+    def __Fppupdn_monostatic(self, ud, method, Rvi, Rhi, er, k, kz, ksz, s, cs, ss, css):
+        # __Fppupdn_calc for the monostatic geometry (cos(phi) = 1, cos(raa) = -1 and sin(raa) = 0)
+        u = ss + s
+
+        if method == 1:
+            G = ud * kz
+            Gt = ud * k * dual.sqrt(er - s ** 2)
+            qi = ud * kz
+            d = k * css - qi
+
+            c11 = -k * (ksz - qi)
+            c41 = -k * cs * (css * d + k * ss * u)
+            c1 = (c11, cs * (k ** 2 * s * u - G * d), -k * s * (s * d + G * u), c41, G * (css * d + k * ss * u))
+            c2 = (c11, cs * (k ** 2 * s * u - Gt * d), -k * s * (s * d + Gt * u), c41, Gt * (css * d + k * ss * u))
+
+        else:
+            G = ud * ksz
+            Gt = ud * k * dual.sqrt(er - ss ** 2)
+            qs = ud * ksz
+            d = kz + qs
+            e = cs * d + k * s * u
+
+            c11 = -k * d
+            c31 = k * ss * (s * d - k * cs * u)
+            c41 = -k * css * e
+            c1 = (c11, -G * e, c31, c41, css * (k ** 2 * ss * u + G * d))
+            c2 = (c11, -Gt * e, c31, c41, css * (k ** 2 * ss * u + Gt * d))
+
+        return self.__Fppupdn_sum(c1, c2, Rvi, Rhi, er, k, kz, s)
+
+    @staticmethod
+    def __Fppupdn_sum(c1, c2, Rvi, Rhi, er, k, kz, s):
+        c11, c21, c31, c41, c51 = c1
+        c12, c22, c32, c42, c52 = c2
+
         q = kz
-        qt = k * np.sqrt(er - s ** 2)
+        qt = k * dual.sqrt(er - s ** 2)
 
         vv = (1 + Rvi) * (-(1 - Rvi) * c11 / q + (1 + Rvi) * c12 / qt) + \
              (1 - Rvi) * ((1 - Rvi) * c21 / q - (1 + Rvi) * c22 / qt) + \
@@ -2333,127 +2962,74 @@ class I2EM(Kernel):
     def __Ipp(self):
         warnings.filterwarnings("ignore")
 
-        self.Fvvupi, self.Fhhupi = self.__Fppupdn_calc(+1, 1,
-                                                       self.Rvi,
-                                                       self.Rhi,
-                                                       self.er,
-                                                       self.k,
-                                                       self.kz_iza,
-                                                       self.kz_vza,
-                                                       np.sin(self.iza + 0.01),
-                                                       np.cos(self.iza + 0.01),
-                                                       np.sin(self.vza),
-                                                       np.cos(self.vza),
-                                                       np.cos(self.phi),
-                                                       np.cos(self.raa),
-                                                       np.sin(self.raa))
-
-        self.Fvvups, self.Fhhups = self.__Fppupdn_calc(+1, 2,
-                                                       self.Rvi,
-                                                       self.Rhi,
-                                                       self.er,
-                                                       self.k,
-                                                       self.kz_iza,
-                                                       self.kz_vza,
-                                                       np.sin(self.iza + 0.01),
-                                                       np.cos(self.iza + 0.01),
-                                                       np.sin(self.vza),
-                                                       np.cos(self.vza),
-                                                       np.cos(self.phi),
-                                                       np.cos(self.raa),
-                                                       np.sin(self.raa))
-
-        self.Fvvdni, self.Fhhdni = self.__Fppupdn_calc(-1, 1,
-                                                       self.Rvi,
-                                                       self.Rhi,
-                                                       self.er,
-                                                       self.k,
-                                                       self.kz_iza,
-                                                       self.kz_vza,
-                                                       np.sin(self.iza + 0.01),
-                                                       np.cos(self.iza + 0.01),
-                                                       np.sin(self.vza),
-                                                       np.cos(self.vza),
-                                                       np.cos(self.phi),
-                                                       np.cos(self.raa),
-                                                       np.sin(self.raa))
-
-        self.Fvvdns, self.Fhhdns = self.__Fppupdn_calc(-1, 2,
-                                                       self.Rvi,
-                                                       self.Rhi,
-                                                       self.er,
-                                                       self.k,
-                                                       self.kz_iza,
-                                                       self.kz_vza,
-                                                       np.sin(self.iza + 0.01),
-                                                       np.cos(self.iza + 0.01),
-                                                       np.sin(self.vza),
-                                                       np.cos(self.vza),
-                                                       np.cos(self.phi),
-                                                       np.cos(self.raa),
-                                                       np.sin(self.raa))
-
-        self.qi = self.k * np.cos(self.iza + 0.01)
-        self.qs = self.k * np.cos(self.vza)
-
-        ivv = []
-        ihh = []
-        for i in srange(self.Ts):
-            i += 1
-            self.Ivv = (self.kz_iza + self.kz_vza) ** i * self.fvv * np.exp(
-                -self.sigma ** 2 * self.kz_iza * self.kz_vza) + \
-                       0.25 * (self.Fvvupi * (self.kz_vza - self.qi) ** (i - 1) * np.exp(
-                -self.sigma ** 2 * (self.qi ** 2 - self.qi * (self.kz_vza - self.kz_iza))) + self.Fvvdni * (
-                                       self.kz_vza + self.qi) ** (i - 1) * np.exp(
-                -self.sigma ** 2 * (self.qi ** 2 + self.qi * (self.kz_vza - self.kz_iza))) + self.Fvvups * (
-                                       self.kz_iza + self.qs) ** (i - 1) * np.exp(
-                -self.sigma ** 2 * (self.qs ** 2 - self.qs * (self.kz_vza - self.kz_iza))) + self.Fvvdns * (
-                                       self.kz_iza - self.qs) ** (i - 1) * np.exp(
-                -self.sigma ** 2 * (self.qs ** 2 + self.qs * (self.kz_vza - self.kz_iza))))
-
-            self.Ihh = (self.kz_iza + self.kz_vza) ** i * self.fhh * np.exp(
-                -self.sigma ** 2 * self.kz_iza * self.kz_vza) + \
-                       0.25 * (self.Fhhupi * (self.kz_vza - self.qi) ** (i - 1) * np.exp(
-                -self.sigma ** 2 * (self.qi ** 2 - self.qi * (self.kz_vza - self.kz_iza))) +
-                               self.Fhhdni * (self.kz_vza + self.qi) ** (i - 1) * np.exp(
-                        -self.sigma ** 2 * (self.qi ** 2 + self.qi * (self.kz_vza - self.kz_iza))) +
-                               self.Fhhups * (self.kz_iza + self.qs) ** (i - 1) * np.exp(
-                        -self.sigma ** 2 * (self.qs ** 2 - self.qs * (self.kz_vza - self.kz_iza))) +
-                               self.Fhhdns * (self.kz_iza - self.qs) ** (i - 1) * np.exp(
-                        -self.sigma ** 2 * (self.qs ** 2 + self.qs * (self.kz_vza - self.kz_iza))))
-
-            ivv.append(self.Ivv)
-            ihh.append(self.Ihh)
-        self.Ivv = np.asarray(ivv, dtype=np.complex)
-        self.Ihh = np.asarray(ihh, dtype=np.complex)
+        # The four field coefficients (up and down going, incident and scattered) share all trigonometric arguments
+        if self.monostatic:
+            F = [self.__Fppupdn_monostatic(ud, method, self.Rvi, self.Rhi, self.er, self.k, self.kz_iza, self.kz_vza,
+                                           self.__s, self.__cs, self.geometry.sin_vza, self.geometry.cos_vza)
+                 for ud, method in ((+1, 1), (+1, 2), (-1, 1), (-1, 2))]
+        else:
+            F = [self.__Fppupdn_calc(ud, method, self.Rvi, self.Rhi, self.er, self.k, self.kz_iza, self.kz_vza,
+                                     self.__s, self.__cs, self.geometry.sin_vza, self.geometry.cos_vza,
+                                     np.cos(self.phi), self.geometry.cos_raa, self.geometry.sin_raa)
+                 for ud, method in ((+1, 1), (+1, 2), (-1, 1), (-1, 2))]
+
+        self.Fvvupi, self.Fhhupi = F[0]
+        self.Fvvups, self.Fhhups = F[1]
+        self.Fvvdni, self.Fhhdni = F[2]
+        self.Fvvdns, self.Fhhdns = F[3]
+
+        self.qi = self.k * self.__cs
+        self.qs = self.k * self.geometry.cos_vza
+
+        kzi = self.kz_iza
+        kzs = self.kz_vza
+        qi = self.qi
+        qs = self.qs
+        sigma2 = self.sigma ** 2
+
+        # Bases of the powers with shape (5, [n_frequencies,] n_angles). The first one is raised to i and the others
+        # to i - 1 for i = 1, ..., Ts, thus the power table with shape (Ts, 5, [n_frequencies,] n_angles) is the
+        # cumulative product of the bases with a first row of (kzi + kzs, 1, 1, 1, 1).
+        bases = np.array([kzi + kzs, kzs - qi, kzs + qi, kzi + qs, kzi - qs])
+        factors = np.repeat(bases[np.newaxis], self.Ts, axis=0)
+        factors[0, 1:] = 1
+        powers = np.cumprod(factors, axis=0)
+
+        # The exponential attenuation factors do not depend on i
+        attenuation = np.exp(-sigma2 * np.array([kzi * kzs,
+                                                 qi ** 2 - qi * (kzs - kzi),
+                                                 qi ** 2 + qi * (kzs - kzi),
+                                                 qs ** 2 - qs * (kzs - kzi),
+                                                 qs ** 2 + qs * (kzs - kzi)]))
+
+        weights = np.array(np.broadcast_arrays(
+            self.fvv, 0.25 * self.Fvvupi, 0.25 * self.Fvvdni, 0.25 * self.Fvvups, 0.25 * self.Fvvdns,
+            self.fhh, 0.25 * self.Fhhupi, 0.25 * self.Fhhdni, 0.25 * self.Fhhups, 0.25 * self.Fhhdns),
+            dtype=np.complex128).reshape((2,) + attenuation.shape) * attenuation
+
+        # Ipp with shape (2, Ts, [n_frequencies,] n_angles) for VV and HH
+        self.Ivv, self.Ihh = np.einsum('tk...,pk...->pt...', powers, weights)
 
     def __shadowing_function(self):
-        import scipy as sp
         warnings.filterwarnings("ignore")
 
-        if np.array_equal(self.vza, self.iza) == True and (np.all(self.raa) == 3.14159265) == True:
-            ct = cot(self.iza)
-            cts = cot(self.vza)
-            rslp = self.CorrFunc.rss
-            ctorslp = ct / np.sqrt(2) / rslp
-            ctsorslp = cts / np.sqrt(2) / rslp
-            shadf = 0.5 * (np.exp(-ctorslp ** 2) / np.sqrt(np.pi) / ctorslp - sp.erf(ctorslp))
-            shadfs = 0.5 * (np.exp(-ctsorslp ** 2) / np.sqrt(np.pi) / ctsorslp - sp.erf(ctsorslp))
-            self.ShdwS = 1 / (1 + shadf + shadfs)
+        # The shadowing only applies to the backscatter geometry. In the monostatic mode all angles are backscatter.
+        if self.monostatic:
+            self.backscatter = self.iza > 0
         else:
-            self.ShdwS = 1
+            self.backscatter = (self.iza > 0) & np.isclose(self.vza, self.iza) & np.isclose(self.geometry.cos_raa, -1)
+
+        self.ShdwS = _shadowing(self.iza, self.CorrFunc.rss, self.backscatter)
 
     def __sigma_nought(self):
         warnings.filterwarnings("ignore")
 
-        self.sigmavv = 0
-        self.sigmahh = 0
-        for i in srange(self.Ts):
-            i += 1
-            self.a0 = self.CorrFunc.Wn[i - 1] / factorial(i) * self.sigma ** (2 * i)
+        # Weights of the series terms with shape (Ts, [n_frequencies,] n_angles)
+        i = np.arange(1, self.Ts + 1).reshape((-1,) + (1,) * (np.ndim(self.CorrFunc.Wn) - 1))
+        self.a0 = self.CorrFunc.Wn / factorial(i) * self.sigma ** (2 * i)
 
-            self.sigmavv = self.sigmavv + np.abs(self.Ivv[i - 1]) ** 2 * self.a0
-            self.sigmahh = self.sigmahh + np.abs(self.Ihh[i - 1]) ** 2 * self.a0
+        self.sigmavv, self.sigmahh = np.einsum('pt...,t...->p...', np.abs(np.array([self.Ivv, self.Ihh])) ** 2,
+                                               self.a0)
 
         self.VV = self.sigmavv * self.ShdwS * self.k ** 2 / 2 * np.exp(
             -self.sigma ** 2 * (self.kz_iza ** 2 + self.kz_vza ** 2))
@@ -2464,25 +3040,90 @@ class I2EM(Kernel):
             self.VVdB = dB(np.asarray(self.VV, dtype=np.float))
             self.HHdB = dB(np.asarray(self.HH, dtype=np.float))
 
+    def __jacobian(self):
+        # Forward-mode derivatives (see pyrism.core.dual) of the backscatter coefficients. The series length Ts is
+        # piecewise constant and kept.
+        eps_real, eps_imag, sigma, corrlen = Dual.variables(np.real(self.er), np.imag(self.er), self.sigma,
+                                                            self.corrlen)
+        er = eps_real + 1j * eps_imag
+
+        s = self.__s
+        cs = self.__cs
+        ss = self.geometry.sin_vza
+        css = self.geometry.cos_vza
+
+        rt = dual.sqrt(er - s ** 2)
+        Rvi = (er * cs - rt) / (er * cs + rt)
+        Rhi = (cs - rt) / (cs + rt)
+
+        # The values of the slope averaged reflection coefficients are the ones of the dblquad integration and the
+        # derivatives are the ones of the Gauss-Legendre quadrature of the same integral, which converges to the
+        # dblquad values (about 1e-8) for rms slopes up to 1
+        Rav, Rah = _slope_averaged_reflection(er, 1.1 * sigma / corrlen, s, cs)
+        Rvt = Dual(self.Rvt, Rav.deriv, Rav.n_variables)
+        Rht = Dual(self.Rht, Rah.deriv, Rah.n_variables)
+
+        geometry = (s * ss - (1 + cs * css) * self.geometry.cos_raa) / (cs + css)
+        fvv = 2 * Rvt * geometry
+        fhh = -2 * Rht * geometry
+
+        F = [self.__Fppupdn_calc(ud, method, Rvi, Rhi, er, self.k, self.kz_iza, self.kz_vza, s, cs, ss, css,
+                                 np.cos(self.phi), self.geometry.cos_raa, self.geometry.sin_raa)
+             for ud, method in ((+1, 1), (+1, 2), (-1, 1), (-1, 2))]
+
+        i = np.arange(1, self.Ts + 1).reshape(-1, 1)
+        kzi = self.kz_iza
+        kzs = self.kz_vza
+        qi = self.k * cs
+        qs = self.k * css
+        sigma2 = sigma ** 2
+
+        def series(f, Fupi, Fups, Fdni, Fdns):
+            return (kzi + kzs) ** i * f * dual.exp(-sigma2 * kzi * kzs) + \
+                   0.25 * (Fupi * (kzs - qi) ** (i - 1) * dual.exp(-sigma2 * (qi ** 2 - qi * (kzs - kzi))) +
+                           Fdni * (kzs + qi) ** (i - 1) * dual.exp(-sigma2 * (qi ** 2 + qi * (kzs - kzi))) +
+                           Fups * (kzi + qs) ** (i - 1) * dual.exp(-sigma2 * (qs ** 2 - qs * (kzs - kzi))) +
+                           Fdns * (kzi - qs) ** (i - 1) * dual.exp(-sigma2 * (qs ** 2 + qs * (kzs - kzi))))
+
+        Ivv = series(fvv, *[item[0] for item in F])
+        Ihh = series(fhh, *[item[1] for item in F])
+
+        CorrFunc = self.corrfunc(self.n, self.wvnb, sigma, corrlen, self.Ts)
+        a0 = CorrFunc.Wn / factorial(i) * sigma ** (2 * i)
+        ShdwS = _shadowing(self.iza, CorrFunc.rss, self.backscatter)
+        attenuation = ShdwS * self.k ** 2 / 2 * dual.exp(-sigma2 * (kzi ** 2 + kzs ** 2))
+
+        VV = dual.sum(dual.real(Ivv * dual.conj(Ivv)) * a0, axis=0) * attenuation
+        HH = dual.sum(dual.real(Ihh * dual.conj(Ihh)) * a0, axis=0) * attenuation
+
+        # d(10 log10(x)) = 10 / (ln(10) x) dx
+        VVdB = 10 / np.log(10) / VV.value[:, np.newaxis]
+        HHdB = 10 / np.log(10) / HH.value[:, np.newaxis]
+
+        return ReflectanceResult(names=['eps_real', 'eps_imag', 'sigma', 'corrlength'], VV=VV.jacobian(),
+                                 HH=HH.jacobian(), VVdB=VVdB * VV.jacobian(), HHdB=HHdB * HH.jacobian())
+
     def __store(self):
-        self.BSC = ReflectanceResult(array=np.array([[self.VV[0]], [self.HH[0]]]),
-                                     arraydB=np.array([[dB(self.VV[0])], [dB(self.HH[0])]]),
+        self.BSC = ReflectanceResult(array=np.array([[self.VV[..., 0]], [self.HH[..., 0]]]),
+                                     arraydB=np.array([[dB(self.VV[..., 0])], [dB(self.HH[..., 0])]]),
                                      VV=self.VV,
                                      HH=self.HH,
                                      VVdB=self.VVdB,
                                      HHdB=self.HHdB)
 
         self.BRDF = ReflectanceResult(
-            array=np.array([[BRDF(self.VV, self.iza, self.vza)[0]], [BRDF(self.HH, self.iza, self.vza)[0]]]),
+            array=np.array([[BRDF(self.VV, self.iza, self.vza)[..., 0]],
+                            [BRDF(self.HH, self.iza, self.vza)[..., 0]]]),
             arraydB=np.array(
-                [[dB(BRDF(self.VV, self.iza, self.vza))[0]], [dB(BRDF(self.HH, self.iza, self.vza))[0]]]),
+                [[dB(BRDF(self.VV, self.iza, self.vza))[..., 0]], [dB(BRDF(self.HH, self.iza, self.vza))[..., 0]]]),
             VV=BRDF(self.VV, self.iza, self.vza),
             HH=BRDF(self.HH, self.iza, self.vza),
             VVdB=dB(BRDF(self.VV, self.iza, self.vza)),
             HHdB=dB(BRDF(self.HH, self.iza, self.vza)))
 
-        self.BRF = ReflectanceResult(array=np.array([[BRF(self.BRDF.VV)[0]], [BRF(self.BRDF.HH)[0]]]),
-                                     arraydB=np.array([[dB(BRF(self.BRDF.VV))[0]], [dB(BRF(self.BRDF.HH))[0]]]),
+        self.BRF = ReflectanceResult(array=np.array([[BRF(self.BRDF.VV)[..., 0]], [BRF(self.BRDF.HH)[..., 0]]]),
+                                     arraydB=np.array([[dB(BRF(self.BRDF.VV))[..., 0]],
+                                                       [dB(BRF(self.BRDF.HH))[..., 0]]]),
                                      VV=BRF(self.BRDF.VV),
                                      HH=BRF(self.BRDF.HH),
                                      VVdB=dB(BRF(self.BRDF.VV)),
@@ -2616,15 +3257,15 @@ class I2EM(Kernel):
 
             wn = np.zeros([n_spec, nr])
 
-            if self.corrfunc is 'exponential':  # exponential
+            if self.corrfunc == 'exponential':  # exponential
                 for n in srange(n_spec):
                     wn[n, :] = (n + 1) * self.kl ** 2 / ((n + 1) ** 2 + (wvnb * self.corrlen) ** 2) ** 1.5
 
-            elif self.corrfunc is 'gaussian':  # gaussian
+            elif self.corrfunc == 'gaussian':  # gaussian
                 for n in srange(n_spec):
                     wn[n, :] = 0.5 * self.kl ** 2 / (n + 1) * np.exp(-(wvnb * self.corrlen) ** 2 / (4 * (n + 1)))
 
-            elif self.corrfunc is 'mixed':
+            elif self.corrfunc == 'mixed':
                 gauss = np.zeros([n_spec, nr])
                 exp = np.zeros([n_spec, nr])
 
@@ -0,0 +1 @@
+from .processing import (process, tiles, open_raster)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import sys
+from collections import deque
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from ..core.parallel import imap_blocks
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+    string_types = basestring
+else:
+    srange = range
+    string_types = str
+
+
+def open_raster(raster):
+    """
+    Open a parameter raster.
+
+    Parameters
+    ----------
+    raster : str, array_like, int or float
+        File name of a .npy file, which is opened as read-only memory map, a 2-D array or a constant.
+
+    Returns
+    -------
+    raster : ndarray
+        2-D array (numpy.memmap for files) or 0-D array for constants.
+    """
+    if isinstance(raster, string_types):
+        raster = np.load(raster, mmap_mode='r')
+    else:
+        raster = np.asanyarray(raster)
+
+    if raster.ndim not in (0, 2):
+        raise ValueError("Parameter rasters must be 2-D arrays or constants. The actual shape is {}".format(
+            str(raster.shape)))
+
+    return raster
+
+
+def tiles(shape, tile_size):
+    """
+    Split a raster in to consecutive tiles.
+
+    Parameters
+    ----------
+    shape : tuple
+        Shape (rows, columns) of the raster.
+    tile_size : int or tuple
+        Maximal size (rows, columns) of the tiles.
+
+    Returns
+    -------
+    tiles : generator
+        Tuples of (row slice, column slice) which cover the raster row by row.
+    """
+    tile_rows, tile_cols = np.broadcast_to(tile_size, (2,))
+
+    if tile_rows < 1 or tile_cols < 1:
+        raise ValueError("tile_size must be greater than 0. The actual value is: {}".format(str(tile_size)))
+
+    for row in srange(0, shape[0], tile_rows):
+        for col in srange(0, shape[1], tile_cols):
+            yield slice(row, min(row + tile_rows, shape[0])), slice(col, min(col + tile_cols, shape[1]))
+
+
+def process(func, rasters, out=None, tile_size=256, processes=None, mask=None, fill_value=np.nan):
+    """
+    Apply a batched model to rasters of per pixel parameters.
+
+    The rasters are read tile by tile. The pixels of a tile form a parameter matrix with one row per pixel and one
+    column per raster, which is passed to `func`. The results are written tile by tile in to `out`, so that the memory
+    is bounded by the tile size and not by the raster size if the rasters and `out` are memory maps.
+
+    Parameters
+    ----------
+    func : callable
+        Batched model, e.g. pyrism.models.PROSAILFunction or pyrism.models.I2EMFunction. `func(block)` must accept an
+        array with shape (n_pixels, len(rasters)) and return an array with shape (n_pixels, ...). If `processes` is
+        not None, `func` must be picklable.
+    rasters : sequence
+        Parameter rasters in the order of the columns of the parameter matrix. Each item is the file name of a 2-D
+        .npy file, a 2-D array or a constant (see open_raster). All 2-D rasters must have the same shape.
+    out : str, ndarray or None, optional
+        File name of a .npy file which is created as memory map, an array (e.g. a numpy.memmap) with shape
+        (rows, columns, ...) in to which the results are written or None (default) to allocate a new array.
+    tile_size : int or tuple, optional
+        Maximal size (rows, columns) of the tiles. Default is 256.
+    processes : int or None, optional
+        Number of worker processes. If None (default) all tiles are evaluated in the current process.
+    mask : str, array_like or None, optional
+        Raster of valid pixels. Only the valid pixels with finite parameters are evaluated.
+    fill_value : float, optional
+        Value of the pixels which are not evaluated. Default is NaN.
+
+    Returns
+    -------
+    out : ndarray
+        Model output with shape (rows, columns, ...). numpy.memmap if `out` is a file name.
+    """
+    rasters = [open_raster(item) for item in rasters]
+    shapes = set(item.shape for item in rasters if item.ndim == 2)
+
+    if mask is not None:
+        mask = open_raster(mask)
+        shapes.add(mask.shape)
+
+    if len(shapes) != 1:
+        raise ValueError("The rasters must have the same 2-D shape. The actual shapes are {}".format(str(shapes)))
+
+    shape = shapes.pop()
+    pending = deque()
+
+    def blocks():
+        for tile in tiles(shape, tile_size):
+            size = (tile[0].stop - tile[0].start, tile[1].stop - tile[1].start)
+            block = np.column_stack([np.broadcast_to(item[tile] if item.ndim == 2 else item, size).ravel()
+                                     for item in rasters]).astype(np.float64)
+
+            valid = np.all(np.isfinite(block), axis=1)
+            if mask is not None:
+                valid &= np.asarray(mask[tile], dtype=bool).ravel()
+
+            # Tiles without valid pixels are not evaluated
+            pending.append((tile, size, valid if np.any(valid) else None))
+
+            if np.any(valid):
+                yield block[valid]
+
+    skipped = []
+
+    for result in imap_blocks(func, blocks(), processes):
+        while pending[0][2] is None:
+            skipped.append(pending.popleft())
+
+        tile, size, valid = pending.popleft()
+
+        if out is None or isinstance(out, string_types):
+            out_shape = shape + result.shape[1:]
+            out = np.empty(out_shape, dtype=result.dtype) if out is None else \
+                open_memmap(out, mode='w+', dtype=result.dtype, shape=out_shape)
+
+        if np.all(valid):
+            out[tile] = result.reshape(size + result.shape[1:])
+        else:
+            values = np.full((len(valid),) + result.shape[1:], fill_value, dtype=out.dtype)
+            values[valid] = result
+            out[tile] = values.reshape(size + result.shape[1:])
+
+        for tile, _, _ in skipped:
+            out[tile] = fill_value
+        skipped = []
+
+    if out is None or isinstance(out, string_types):
+        raise ValueError("The rasters have no valid pixels")
+
+    for tile, _, _ in pending:
+        out[tile] = fill_value
+
+    if isinstance(out, np.memmap):
+        out.flush()
+
+    return out
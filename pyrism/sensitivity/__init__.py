@@ -0,0 +1 @@
+from .sobol import (Sobol, saltelli, sobol_indices)
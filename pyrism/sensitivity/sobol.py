@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+from __future__ import division
+
+import sys
+
+import numpy as np
+from scipy.stats import norm
+
+from ..core import SensitivityResult
+from ..core.parallel import imap_blocks
+
+# python 3.6 comparability
+if sys.version_info < (3, 0):
+    srange = xrange
+else:
+    srange = range
+
+
+def _scale(sample, bounds):
+    bounds = np.asarray(bounds, dtype=np.float64)
+    return bounds[:, 0] + sample * (bounds[:, 1] - bounds[:, 0])
+
+
+def _saltelli_block(A, B):
+    """
+    Arrange the matrices A and B with shape (n, D) row by row in to the Saltelli design [A, AB_1, ..., AB_D, B], where
+    AB_i is A with the i-th column from B.
+    """
+    n, D = A.shape
+    block = np.empty((n, D + 2, D))
+    block[:, 0] = A
+    block[:, -1] = B
+
+    for i in srange(D):
+        block[:, i + 1] = A
+        block[:, i + 1, i] = B[:, i]
+
+    return block.reshape(n * (D + 2), D)
+
+
+def saltelli(bounds, N, seed=None):
+    """
+    Generate a Saltelli sample matrix for the calculation of first-order and total Sobol indices
+    (:cite:`Saltelli.2010`).
+
+    Parameters
+    ----------
+    bounds : array_like
+        Lower and upper bounds of the parameters with shape (D, 2).
+    N : int
+        Number of base samples.
+    seed : int, optional
+        Seed of the random number generator.
+
+    Returns
+    -------
+    sample : ndarray
+        Sample matrix with shape (N * (D + 2), D). The rows are ordered like [A_1, AB_1_1, ..., AB_D_1, B_1, A_2, ...],
+        which is the layout of SALib without second order indices.
+    """
+    bounds = np.asarray(bounds, dtype=np.float64)
+    D = len(bounds)
+    rng = np.random.RandomState(seed)
+    base = rng.random_sample((N, 2 * D))
+
+    return _scale(_saltelli_block(base[:, :D], base[:, D:]), bounds)
+
+
+class _SobolAccumulator(object):
+    """
+    Streaming estimator of first-order (:cite:`Saltelli.2010`) and total (Jansen) Sobol indices. Confidence intervals
+    are estimated with a Poisson bootstrap, so that the memory is independent of the number of samples.
+
+    The first-order estimator is evaluated with centered outputs fB - mean, which does not change its expectation but
+    removes the variance caused by the mean (e.g. of outputs in dB). The sums of fAB - fA are kept for this purpose.
+    """
+
+    def __init__(self, D, n_boot, rng):
+        self.D = D
+        self.n_boot = n_boot
+        self.rng = rng
+        self.shape = None
+
+    def __init_sums(self, shape):
+        self.shape = shape
+        self.n = 0
+        self.sum = np.zeros(shape)
+        self.sum2 = np.zeros(shape)
+        self.s1 = np.zeros((self.D,) + shape)
+        self.st = np.zeros((self.D,) + shape)
+        self.d = np.zeros((self.D,) + shape)
+
+        self.n_b = np.zeros(self.n_boot)
+        self.sum_b = np.zeros((self.n_boot,) + shape)
+        self.sum2_b = np.zeros((self.n_boot,) + shape)
+        self.s1_b = np.zeros((self.n_boot, self.D) + shape)
+        self.st_b = np.zeros((self.n_boot, self.D) + shape)
+        self.d_b = np.zeros((self.n_boot, self.D) + shape)
+
+    def update(self, Y):
+        """
+        Add model outputs in the Saltelli layout with shape (n * (D + 2), ...).
+        """
+        Y = np.asarray(Y, dtype=np.float64)
+        Y = Y.reshape((-1, self.D + 2) + Y.shape[1:])
+
+        if self.shape is None:
+            self.__init_sums(Y.shape[2:])
+
+        fA = Y[:, 0]
+        fB = Y[:, -1]
+        fAB = Y[:, 1:-1]
+
+        f = fA + fB
+        f2 = fA ** 2 + fB ** 2
+        d = fAB - fA[:, np.newaxis]
+        s1 = fB[:, np.newaxis] * d
+        st = d ** 2
+
+        self.n += len(Y)
+        self.sum += f.sum(axis=0)
+        self.sum2 += f2.sum(axis=0)
+        self.s1 += s1.sum(axis=0)
+        self.st += st.sum(axis=0)
+        self.d += d.sum(axis=0)
+
+        if self.n_boot > 0:
+            w = self.rng.poisson(1., (self.n_boot, len(Y))).astype(np.float64)
+            self.n_b += w.sum(axis=1)
+            self.sum_b += np.tensordot(w, f, axes=1)
+            self.sum2_b += np.tensordot(w, f2, axes=1)
+            self.s1_b += np.tensordot(w, s1, axes=1)
+            self.st_b += np.tensordot(w, st, axes=1)
+            self.d_b += np.tensordot(w, d, axes=1)
+
+    def result(self, conf_level=0.95):
+        if self.shape is None:
+            raise ValueError("There are no model outputs to analyze")
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = self.sum / (2 * self.n)
+            var = self.sum2 / (2 * self.n) - mean ** 2
+            S1 = (self.s1 - mean * self.d) / self.n / var
+            ST = 0.5 * self.st / self.n / var
+
+            if self.n_boot > 0:
+                n_b = self.n_b.reshape((self.n_boot,) + (1,) * len(self.shape))
+                mean_b = self.sum_b / (2 * n_b)
+                var_b = self.sum2_b / (2 * n_b) - mean_b ** 2
+                S1_b = (self.s1_b - mean_b[:, np.newaxis] * self.d_b) / n_b[:, np.newaxis] / var_b[:, np.newaxis]
+                ST_b = 0.5 * self.st_b / n_b[:, np.newaxis] / var_b[:, np.newaxis]
+
+                z = norm.ppf(0.5 + conf_level / 2.)
+                S1_conf = z * np.std(S1_b, axis=0, ddof=1)
+                ST_conf = z * np.std(ST_b, axis=0, ddof=1)
+            else:
+                S1_conf = np.full_like(S1, np.nan)
+                ST_conf = np.full_like(ST, np.nan)
+
+        return SensitivityResult(S1=S1, S1_conf=S1_conf, ST=ST, ST_conf=ST_conf, N=self.n)
+
+
+def sobol_indices(Y, D, names=None, n_boot=100, conf_level=0.95, chunk_size=1024, seed=None):
+    """
+    Compute first-order and total Sobol indices from model outputs in the Saltelli layout (see `saltelli`).
+
+    Parameters
+    ----------
+    Y : array_like
+        Model outputs with shape (N * (D + 2), ...), e.g. a numpy.memmap. The outputs are read chunk by chunk.
+    D : int
+        Number of parameters.
+    names : list of str, optional
+        Names of the parameters.
+    n_boot : int, optional
+        Number of bootstrap resamples for the confidence intervals. Default is 100.
+    conf_level : float, optional
+        Confidence level of the intervals. Default is 0.95.
+    chunk_size : int, optional
+        Number of base samples which are processed at once. Default is 1024.
+    seed : int, optional
+        Seed of the bootstrap random number generator.
+
+    Returns
+    -------
+    SensitivityResult
+
+    See Also
+    --------
+    pyrism.core.SensitivityResult
+    """
+    if len(Y) % (D + 2) != 0:
+        raise ValueError("The length of Y must be a multiple of D + 2 = {0}. The actual length is {1}".format(
+            str(D + 2), str(len(Y))))
+
+    acc = _SobolAccumulator(D, n_boot, np.random.RandomState(seed))
+    step = chunk_size * (D + 2)
+
+    for start in srange(0, len(Y), step):
+        acc.update(Y[start:start + step])
+
+    result = acc.result(conf_level)
+    result.names = list(names) if names is not None else ['x{}'.format(i + 1) for i in srange(D)]
+
+    return result
+
+
+class Sobol(object):
+    """
+    Variance based global sensitivity analysis with first-order and total Sobol indices
+    (:cite:`Saltelli.2010`).
+
+    The Saltelli sample is generated block by block, the blocks are evaluated with the batch runner
+    (pyrism.core.parallel) and only the estimator sums are kept. Thus, the memory is bounded by the block size and
+    designs with 10^6 samples can be analyzed.
+
+    Parameters
+    ----------
+    func : callable
+        Batched model function which maps a parameter matrix with shape (n, D) to outputs with shape (n, ...), e.g.
+        pyrism.models.PROSAILFunction or pyrism.models.I2EMFunction.
+    bounds : array_like
+        Lower and upper bounds of the parameters with shape (D, 2).
+    names : list of str, optional
+        Names of the parameters. If func has an attribute `names`, these are used by default.
+
+    Returns
+    -------
+    All returns are attributes!
+    sample_size : int
+        Number of model evaluations of the last run.
+
+    See Also
+    --------
+    saltelli
+    sobol_indices
+    pyrism.core.SensitivityResult
+    """
+
+    def __init__(self, func, bounds, names=None):
+        self.func = func
+        self.bounds = np.asarray(bounds, dtype=np.float64)
+        self.D = len(self.bounds)
+
+        if names is None:
+            names = getattr(func, 'names', None)
+        if names is None:
+            names = ['x{}'.format(i + 1) for i in srange(self.D)]
+
+        if len(names) != self.D:
+            raise AssertionError("The number of names ({0}) and bounds ({1}) must agree".format(str(len(names)),
+                                                                                             str(self.D)))
+        self.names = list(names)
+
+    def __blocks(self, N, chunk_size, rng):
+        for start in srange(0, N, chunk_size):
+            base = rng.random_sample((min(chunk_size, N - start), 2 * self.D))
+            yield _scale(_saltelli_block(base[:, :self.D], base[:, self.D:]), self.bounds)
+
+    def run(self, N, chunk_size=256, processes=None, n_boot=100, conf_level=0.95, seed=None):
+        """
+        Sample and evaluate the model and compute the Sobol indices.
+
+        Parameters
+        ----------
+        N : int
+            Number of base samples. The model is evaluated N * (D + 2) times.
+        chunk_size : int, optional
+            Number of base samples per block. Default is 256.
+        processes : int or None, optional
+            Number of worker processes. If None (default) all blocks are evaluated in the current process.
+        n_boot : int, optional
+            Number of bootstrap resamples for the confidence intervals. Default is 100.
+        conf_level : float, optional
+            Confidence level of the intervals. Default is 0.95.
+        seed : int, optional
+            Seed of the random number generators.
+
+        Returns
+        -------
+        SensitivityResult
+        """
+        rng = np.random.RandomState(seed)
+        acc = _SobolAccumulator(self.D, n_boot, np.random.RandomState(rng.randint(2 ** 31 - 1)))
+
+        for Y in imap_blocks(self.func, self.__blocks(N, chunk_size, rng), processes):
+            acc.update(Y)
+
+        self.sample_size = N * (self.D + 2)
+
+        result = acc.result(conf_level)
+        result.names = self.names
+
+        return result
@@ -0,0 +1,334 @@
+import numpy as np
+import pytest
+
+from pyrism import PROSPECT, SAIL, LSM
+from pyrism.core import evaluate, dual
+from pyrism.models import batch, PROSAILFunction
+from pyrism.models.models import _jfunctions
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("N, Cab, Cxc, Cbr, Cw, Cm, Can, version", [
+    (1.5, 40, 8., 0.0, 0.01, 0.009, 0, '5'),
+    (1.2, 30, 10., 0.0, 0.015, 0.009, 1, 'D')
+])
+class TestBatchPROSPECT:
+    def test_prospect(self, N, Cab, Cxc, Cbr, Cw, Cm, Can, version):
+        prospect = PROSPECT(N=N, Cab=Cab, Cxc=Cxc, Cbr=Cbr, Cw=Cw, Cm=Cm, Can=Can, version=version)
+        leaf = batch.prospect([N, N + 1], Cab, Cxc, Cbr, Cw, Cm, Can, version=version)
+
+        assert leaf.ks.shape == (2, 2101)
+        assert np.allclose(prospect.ks, leaf.ks[0], atol=1e-5)
+        assert np.allclose(prospect.kt, leaf.kt[0], atol=1e-5)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("iza, vza, raa, lai, hotspot, lidf_type, a, b", [
+    (30, 10, 0, 3, 0.01, 'verhoef', -0.35, -0.15),
+    (35, 30, 50, 1, 0.25, 'campbell', 57, 0)
+])
+class TestBatchSAIL:
+    def test_sail(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        lsm = LSM(reflectance=1, moisture=1)
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5")
+        sail = SAIL(iza=iza, vza=vza, raa=raa, ks=prospect.ks, kt=prospect.kt, lai=lai, hotspot=hotspot,
+                    rho_surface=lsm.ref, a=a, b=b, lidf_type=lidf_type)
+
+        canopy = batch.sail(iza, vza, raa, prospect.ks, prospect.kt, [lai, 0], hotspot, lsm.ref,
+                            lidf_type=lidf_type, a=a, b=b)
+
+        assert np.allclose(sail.BRF.ref, canopy.BRF[0], atol=1e-5)
+        assert np.allclose(sail.BHR.ref, canopy.BHR[0], atol=1e-5)
+        assert np.allclose(sail.DHR.ref, canopy.DHR[0], atol=1e-5)
+        assert np.allclose(sail.HDR.ref, canopy.HDR[0], atol=1e-5)
+        assert np.allclose(lsm.ref, canopy.BRF[1])
+
+    def test_prosail_function(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        func = PROSAILFunction(iza, vza, raa, names=('N', 'lai'),
+                               fixed=dict(Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, hotspot=hotspot, reflectance=1,
+                                          moisture=1), lidf_type=lidf_type, a=a, b=b)
+        params = np.array([[1.5, lai], [2.0, lai + 1], [1.0, lai / 2.]])
+
+        assert np.allclose(evaluate(func, params, chunk_size=2), func(params))
+
+    def test_prosail_function_evaluate(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        fixed = dict(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, hotspot=hotspot, reflectance=1)
+        func = PROSAILFunction(iza, vza, raa, names=('lai', 'moisture'), fixed=fixed, lidf_type=lidf_type, a=a, b=b)
+        reference = PROSAILFunction(iza, vza, raa, names=('lai', 'moisture', 'N'), fixed=fixed, lidf_type=lidf_type,
+                                    a=a, b=b)
+        states = dict(lai=np.linspace(0.5, lai + 1, 5), moisture=np.linspace(0, 1, 5))
+
+        assert func.leaf is not None and func.rho_surface is None
+        assert np.allclose(func.evaluate(states), reference(np.column_stack([states['lai'], states['moisture'],
+                                                                             np.full(5, 1.5)])))
+        assert np.allclose(func.evaluate(states), func(np.column_stack([states['lai'], states['moisture']])))
+
+        with pytest.raises(ValueError):
+            func.evaluate(dict(lai=states['lai']))
+
+    def test_prosail_function_float32(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        fixed = dict(Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, hotspot=hotspot, reflectance=1)
+        params = np.array([[1.5, lai, 0.2], [2.0, lai + 1, 0.8]])
+        reference = PROSAILFunction(iza, vza, raa, names=('N', 'lai', 'moisture'), fixed=fixed, bands='L8',
+                                    lidf_type=lidf_type, a=a, b=b)
+        func = PROSAILFunction(iza, vza, raa, names=('N', 'lai', 'moisture'), fixed=fixed, bands='L8',
+                               lidf_type=lidf_type, a=a, b=b, dtype=np.float32)
+        value, jacobian = func.jacobian(params)
+
+        assert func(params).dtype == np.float32
+        assert value.dtype == np.float32 and jacobian.dtype == np.float32
+        assert np.allclose(reference(params), func(params), atol=1e-5)
+        assert np.allclose(reference.jacobian(params)[1], jacobian, atol=1e-4)
+
+    def test_sail_workspace(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        leaf = batch.prospect([1.5, 2.0, 1.2], [40, 20, 60], 8., 0.0, 0.01, 0.009)
+        rho_surface = LSM(reflectance=1, moisture=1).ref
+        canopy = batch.sail(iza, vza, raa, leaf.ks, leaf.kt, [lai, 0, lai / 2.], hotspot, rho_surface,
+                            lidf_type=lidf_type, a=a, b=b)
+
+        workspace = batch.Workspace()
+        out = batch.sail(iza, vza, raa, leaf.ks, leaf.kt, [lai, 0, lai / 2.], hotspot, rho_surface,
+                         lidf_type=lidf_type, a=a, b=b, workspace=workspace)
+        result = batch.sail(iza, vza, raa, leaf.ks, leaf.kt, [lai, 0, lai / 2.], hotspot, rho_surface,
+                            lidf_type=lidf_type, a=a, b=b, workspace=workspace, out=out)
+
+        assert result is out
+        for item in ('BRF', 'BRDF', 'BHR', 'DHR', 'HDR'):
+            assert np.allclose(canopy[item], result[item], rtol=1e-12, atol=0)
+
+        with pytest.raises(ValueError):
+            batch.sail(iza, vza, raa, leaf.ks, leaf.kt, lai, hotspot, rho_surface, out=out, dtype=np.float32)
+
+    def test_prosail_function_workspace(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        fixed = dict(Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, hotspot=hotspot, reflectance=1)
+        params = np.array([[1.5, 40, lai, 0.2], [2.0, 20, lai + 1, 0.8]])
+        workspace = batch.Workspace()
+
+        for bands in (None, 'L8'):
+            func = PROSAILFunction(iza, vza, raa, names=('N', 'Cab', 'lai', 'moisture'), fixed=fixed, bands=bands,
+                                   lidf_type=lidf_type, a=a, b=b)
+            out = np.empty_like(func(params))
+
+            assert func(params, out=out, workspace=workspace) is out
+            assert np.allclose(func(params), out, rtol=1e-12, atol=0)
+            assert np.allclose(func.evaluate(params, workspace=workspace), out, rtol=1e-12, atol=0)
+
+    def test_prosail_function_except(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        with pytest.raises(ValueError):
+            PROSAILFunction(iza, vza, raa, names=('N', 'lai'), fixed=dict(Cab=40))
+
+    def test_sail_jacobian(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        leaf = batch.prospect(1.5, 40, 8., 0.0, 0.01, 0.009)
+        soil = LSM(reflectance=1, moisture=1).ref
+        canopy = batch.sail(iza, vza, raa, leaf.ks, leaf.kt, lai, hotspot, soil, lidf_type=lidf_type, a=a, b=b,
+                            jacobian=True)
+
+        assert canopy.jacobian.BRF.shape == (1, 2101, 2)
+
+        h = 1e-6
+        for i, (dl, dh) in enumerate(((h, 0), (0, h))):
+            upper = batch.sail(iza, vza, raa, leaf.ks, leaf.kt, lai + dl, hotspot + dh, soil, lidf_type=lidf_type,
+                               a=a, b=b)
+            lower = batch.sail(iza, vza, raa, leaf.ks, leaf.kt, lai - dl, hotspot - dh, soil, lidf_type=lidf_type,
+                               a=a, b=b)
+
+            assert np.allclose((upper.BRF - lower.BRF) / (2 * h), canopy.jacobian.BRF[..., i], atol=1e-6)
+
+    def test_prosail_function_jacobian(self, iza, vza, raa, lai, hotspot, lidf_type, a, b):
+        names = ('N', 'Cab', 'Cxc', 'Cbr', 'Cw', 'Cm', 'lai', 'hotspot', 'reflectance', 'moisture')
+        func = PROSAILFunction(iza, vza, raa, names=names, bands='ASTER', lidf_type=lidf_type, a=a, b=b)
+        params = np.array([[1.5, 40, 8., 0.1, 0.01, 0.009, lai, hotspot, 1, 0.5],
+                           [2.0, 20, 5., 0.0, 0.02, 0.005, lai + 1, hotspot, 0.8, 0.2]])
+
+        output, jacobian = func.jacobian(params)
+
+        assert np.allclose(output, func(params))
+        assert jacobian.shape == (2, 9, len(names))
+
+        for i in range(len(names)):
+            h = np.zeros(len(names))
+            h[i] = 1e-6 * max(1., params[0, i])
+            assert np.allclose((func(params + h) - func(params - h)) / (2 * h[i]), jacobian[..., i], atol=1e-6)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("version, Can", [
+    ('5', 0),
+    ('D', 1)
+])
+class TestBatchPROSPECTWorkspace:
+    def test_prospect_workspace(self, version, Can):
+        params = dict(N=[1.5, 2.2, 1.0], Cab=[40., 20., 0.], Cxc=8., Cbr=[0.1, 0., 0.], Cw=0.01, Cm=[0.009, 0.002, 0.],
+                      Can=Can + 1, version=version)
+        leaf = batch.prospect(**params)
+        workspace = batch.Workspace()
+        out = batch.prospect(workspace=workspace, **params)
+
+        assert batch.prospect(workspace=workspace, out=out, **params) is out
+        for item in ('ks', 'kt', 'ke', 'om'):
+            assert np.allclose(leaf[item], out[item], rtol=1e-12, atol=0)
+        assert np.allclose(leaf.ka, out.ka, atol=1e-12)
+
+        with pytest.raises(ValueError):
+            batch.prospect(jacobian=True, workspace=workspace, **params)
+
+
+@pytest.mark.webtest
+class TestBatchLSM:
+    def test_lsm(self):
+        reflectance = np.array([[0.2, 0.5], [1., 0.8]])
+        moisture = np.array([[0., 0.3], [0.6, 1.]])
+        soil = batch.lsm(reflectance, moisture)
+
+        assert soil.ref.shape == (4, 2101)
+        for i, (brightness, wetness) in enumerate(zip(reflectance.flatten(), moisture.flatten())):
+            assert np.allclose(soil.ref[i], LSM(brightness, wetness).ref)
+
+        assert np.allclose(batch.lsm(0.5, moisture).ref, batch.lsm(np.full(4, 0.5), moisture).ref)
+
+    def test_lsm_bands(self):
+        soil = batch.lsm([0.2, 0.5, 1.], [0., 0.3, 0.6])
+
+        for bands in ('L8', 'ASTER', [(500, 600), (700, 800)]):
+            soil_bands = batch.lsm([0.2, 0.5, 1.], [0., 0.3, 0.6], bands=bands)
+
+            assert 'l' not in soil_bands
+            assert np.allclose(soil_bands.ref, batch.band_mean(soil.ref, bands))
+
+    def test_lsm_workspace(self):
+        workspace = batch.Workspace()
+        soil = batch.lsm([0.2, 0.5, 1.], [0., 0.3, 0.6], dtype=np.float32)
+        out = batch.lsm([0.2, 0.5, 1.], 0.5, workspace=workspace, dtype=np.float32)
+
+        assert batch.lsm([0.2, 0.5, 1.], [0., 0.3, 0.6], workspace=workspace, out=out, dtype=np.float32) is out
+        assert out.ref.dtype == np.float32
+        assert np.allclose(out.ref, soil.ref, rtol=1e-6)
+
+        out = batch.lsm([0.2, 0.5, 1.], 0.5, bands='L8', workspace=workspace)
+        assert np.allclose(out.ref, batch.band_mean(batch.lsm([0.2, 0.5, 1.], 0.5).ref, 'L8'))
+
+        with pytest.raises(ValueError):
+            batch.lsm([0.2, 0.5], 0.5, out=out)
+
+    def test_lsm_sail(self):
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5")
+        canopy = batch.sail(30, 10, 0, prospect.ks, prospect.kt, 3, 0.01, batch.lsm([0.2, 1.], [0.1, 1.]).ref)
+
+        for i, (reflectance, moisture) in enumerate(((0.2, 0.1), (1., 1.))):
+            sail = SAIL(30, 10, 0, prospect.ks, prospect.kt, 3, 0.01, LSM(reflectance, moisture).ref)
+            assert np.allclose(canopy.BRF[i], sail.BRF.ref)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("version, Can", [
+    ('5', 0),
+    ('D', 1)
+])
+class TestBatchPROSPECTJacobian:
+    def test_prospect_jacobian(self, version, Can):
+        params = dict(N=np.array([1.5, 2.2]), Cab=np.array([40., 20.]), Cxc=8., Cbr=0.1, Cw=0.01, Cm=0.009, Can=Can)
+        leaf = batch.prospect(version=version, jacobian=True, **params)
+
+        assert leaf.jacobian.names == list(batch.PROSPECT_PARAMETERS)
+        assert leaf.jacobian.ks.shape == (2, 2101, 7)
+
+        for i, name in enumerate(batch.PROSPECT_PARAMETERS):
+            h = 1e-6 * max(1., np.max(params[name]))
+            upper = dict(params, **{name: params[name] + h})
+            lower = dict(params, **{name: params[name] - h})
+
+            for item in ('ks', 'kt'):
+                difference = (batch.prospect(version=version, **upper)[item] -
+                              batch.prospect(version=version, **lower)[item]) / (2 * h)
+                assert np.allclose(difference, leaf.jacobian[item][..., i], atol=1e-6)
+
+
+@pytest.mark.webtest
+class TestFloat32:
+    def test_scalar_fills(self):
+        value = np.linspace(0, 1, 5, dtype=np.float32)
+        x, y = dual.Dual.variables(value, value)
+
+        assert dual.where(value > 0.5, value, 1e-36).dtype == np.float32
+        assert dual.where(value > 0.5, x, 1e36).value.dtype == np.float32
+        assert (x * 2. + y).value.dtype == np.float32
+
+    def test_prospect_sail(self):
+        leaf = batch.prospect([1.5, 2.], 40, 8., 0.0, 0.01, 0.009, dtype=np.float32)
+        canopy = batch.sail(30, 20, 10, leaf.ks, leaf.kt, [3., 0.], [0.1, 0.], batch.lsm(0.2, 0.3).ref,
+                            dtype=np.float32)
+
+        assert leaf.ks.dtype == leaf.kt.dtype == np.float32
+        for item in ('BRF', 'BRDF', 'BHR', 'DHR', 'HDR'):
+            assert canopy[item].dtype == np.float32
+
+
+@pytest.mark.webtest
+class TestJFunctions:
+    def test_broadcast(self):
+        # samples x wavelengths x geometries, m equals ks at one wavelength (singular J1)
+        ks = np.array([0.5, 0.8, 1.2]).reshape(1, 1, 3)
+        ko = np.array([0.6, 0.7, 1.0]).reshape(1, 1, 3)
+        m = np.array([0.2, 0.5, 0.9, 1.5]).reshape(1, 4, 1)
+        t = np.array([0.5, 3.]).reshape(2, 1, 1)
+
+        def j1(k, l, t):
+            if abs((k - l) * t) > 1e-3:
+                return (np.exp(-l * t) - np.exp(-k * t)) / (k - l)
+            return 0.5 * t * (np.exp(-k * t) + np.exp(-l * t)) * (1. - ((k - l) * t) ** 2. / 12.)
+
+        def j2(k, l, t):
+            return (1. - np.exp(-(k + l) * t)) / (k + l)
+
+        results = _jfunctions(ks, ko, m, t)
+        shape = (2, 4, 3)
+
+        for index in np.ndindex(*shape):
+            k, o, l, x = ks[0, 0, index[2]], ko[0, 0, index[2]], m[0, index[1], 0], t[index[0], 0, 0]
+            expected = (np.exp(-k * x), np.exp(-o * x), j1(k, l, x), j2(k, l, x), j1(o, l, x), j2(o, l, x),
+                        j2(k, o, x))
+
+            for result, value in zip(results, expected):
+                assert np.isclose(np.broadcast_to(result, shape)[index], value)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("iza, lai, hotspot", [
+    (30, 3, 0.1),
+    (50, 1, 0.01)
+])
+class TestAlbedo:
+    def test_black_sky(self, iza, lai, hotspot):
+        lsm = LSM(reflectance=1, moisture=1)
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5")
+        albedo = batch.albedo(iza, prospect.ks, prospect.kt, lai, hotspot, lsm.ref, n_vza=4, n_raa=3, chunk_size=5)
+
+        vza, raa = np.polynomial.legendre.leggauss(4), np.polynomial.legendre.leggauss(3)
+        black_sky = 0
+        for mu, mu_weight in zip(0.5 * (vza[0] + 1), 0.5 * vza[1]):
+            for phi, phi_weight in zip(0.5 * np.pi * (raa[0] + 1), 0.5 * np.pi * raa[1]):
+                sail = SAIL(iza, np.degrees(np.arccos(mu)), np.degrees(phi), prospect.ks, prospect.kt, lai, hotspot,
+                            lsm.ref)
+                black_sky = black_sky + 2. / np.pi * mu * mu_weight * phi_weight * sail.BRF.ref
+
+        assert albedo.black_sky.shape == (1, 2101)
+        assert np.allclose(albedo.black_sky[0], black_sky)
+        assert np.allclose(albedo.white_sky[0], sail.BHR.ref)
+
+    def test_blue_sky(self, iza, lai, hotspot):
+        lsm = LSM(reflectance=1, moisture=1)
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5")
+        albedo = batch.albedo(iza, prospect.ks, prospect.kt, [lai, 0], hotspot, lsm.ref, skyl=[0., 1.])
+
+        assert albedo.blue_sky.shape == (2, 2101)
+        assert np.allclose(albedo.blue_sky[0], albedo.black_sky[0])
+        assert np.allclose(albedo.blue_sky[1], albedo.white_sky[1])
+        assert np.allclose(albedo.black_sky[1], lsm.ref)
+        assert np.all(albedo.broadband.blue_sky > 0) and np.all(albedo.broadband.blue_sky < 1)
+
+        default = batch.albedo(iza, prospect.ks, prospect.kt, lai, hotspot, lsm.ref, dtype=np.float32)
+        for item in ('black_sky', 'white_sky', 'blue_sky'):
+            assert default[item].dtype == np.float32
+        assert np.allclose(default.broadband.black_sky, albedo.broadband.black_sky[0], atol=1e-5)
+        assert albedo.broadband.white_sky[0] < default.broadband.blue_sky[0] < albedo.broadband.black_sky[0] or \
+            albedo.broadband.black_sky[0] < default.broadband.blue_sky[0] < albedo.broadband.white_sky[0]
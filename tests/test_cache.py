@@ -0,0 +1,119 @@
+from multiprocessing import Pool
+
+import numpy as np
+import pytest
+
+from pyrism import I2EM, PROSPECT
+from pyrism.cache import LRUCache, PersistentCache, freeze, memoize
+from pyrism.models import I2EMFunction
+
+
+def store(args):
+    cache, i = args
+    cache.put(cache.key('test', i), np.arange(i + 1.))
+    return cache.get(cache.key('test', i)).sum()
+
+
+@pytest.mark.webtest
+class TestPersistentCache:
+    def test_put_get(self, tmpdir):
+        cache = PersistentCache(str(tmpdir.join('cache.sqlite')))
+        key = cache.key('test', 30., 6.9 + 0.5j)
+
+        assert cache.get(key) is None
+        cache.put(key, np.array([1., 2.]))
+
+        assert np.allclose(cache.get(key), [1., 2.])
+        assert key in cache
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert np.allclose(PersistentCache(str(tmpdir.join('cache.sqlite'))).get(key), [1., 2.])
+
+    def test_key(self, tmpdir):
+        cache = PersistentCache(str(tmpdir.join('cache.sqlite')), digits=4)
+
+        assert cache.key('test', 0.123456) == cache.key('test', 0.1234561)
+        assert cache.key('test', 0.123456) != cache.key('test', 0.1236)
+
+    def test_eviction(self, tmpdir):
+        cache = PersistentCache(str(tmpdir.join('cache.sqlite')), max_bytes=2000)
+
+        for i in range(20):
+            cache.put(cache.key('test', i), np.zeros(10))
+
+        assert cache.nbytes <= 2000
+        assert 0 < len(cache) < 20
+        assert cache.key('test', 19) in cache
+        assert cache.key('test', 0) not in cache
+
+    def test_processes(self, tmpdir):
+        cache = PersistentCache(str(tmpdir.join('cache.sqlite')))
+
+        pool = Pool(4)
+        try:
+            result = pool.map(store, [(cache, i) for i in range(40)])
+        finally:
+            pool.terminate()
+
+        assert np.allclose(result, [np.arange(i + 1.).sum() for i in range(40)])
+        assert len(cache) == 40
+
+    def test_i2em(self, tmpdir):
+        cache = PersistentCache(str(tmpdir.join('cache.sqlite')))
+        kwargs = dict(frequency=1.26, diel_constant=6.9 + 0.56j, corrlength=10, sigma=0.3)
+
+        expected = I2EM([20, 30], [20, 30], 50, **kwargs)
+        first = I2EM([20, 30], [20, 30], 50, cache=cache, **kwargs)
+        second = I2EM([20, 30], [20, 30], 50, cache=cache, **kwargs)
+
+        assert np.allclose(first.VV, expected.VV)
+        assert np.allclose(second.HH, expected.HH)
+        assert cache.hits == 3
+
+        func = I2EMFunction(20, 20, 50, names=('eps_real',), fixed=dict(frequency=1.26, eps_imag=0.56,
+                                                                         corrlength=10, sigma=0.3), cache=cache)
+        assert np.allclose(func([[6.9]]), [[expected.VV[0], expected.HH[0]]])
+        assert cache.hits == 5
+
+
+@pytest.mark.webtest
+class TestLRUCache:
+    def test_lru(self):
+        cache = LRUCache(max_bytes=3 * 800)
+
+        for i in range(3):
+            cache.put(i, np.zeros(100))
+        cache.get(0)
+        cache.put(3, np.zeros(100))
+
+        assert 0 in cache and 1 not in cache
+        assert cache.nbytes == 3 * 800
+        assert cache.info().hits == 1
+
+    def test_freeze(self):
+        a = np.arange(10.)
+
+        assert freeze((a, dict(b=1))) == freeze((a.copy(), dict(b=1)))
+        assert freeze(a) != freeze(a + 1)
+        assert freeze(a) != freeze(a.astype(np.float32))
+
+    def test_memoize(self):
+        prospect = memoize(PROSPECT)
+        leaf = prospect(N=1.5, Cab=40, Cxc=8, Cbr=0, Cw=0.01, Cm=0.009)
+
+        assert prospect(N=1.5, Cab=40, Cxc=8, Cbr=0, Cw=0.01, Cm=0.009) is leaf
+        assert prospect(N=1.6, Cab=40, Cxc=8, Cbr=0, Cw=0.01, Cm=0.009) is not leaf
+
+        info = prospect.info()
+        assert (info.hits, info.misses, info.entries) == (1, 2, 2)
+        assert info.nbytes > 2 * leaf.ks.nbytes
+
+    def test_memoize_arrays(self):
+        @memoize(max_entries=2)
+        def square(x):
+            return x ** 2
+
+        x = np.arange(5.)
+        assert np.allclose(square(x), x ** 2)
+        assert np.allclose(square(x.copy()), x ** 2)
+        assert square.info().hits == 1
+        assert len(square.cache) == 1
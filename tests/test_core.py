@@ -1,7 +1,8 @@
 import pytest
-from numpy import radians, allclose, array
+from numpy import radians, allclose, array, cos, sin
 
-from pyrism.core import Kernel
+from pyrism.core import Geometry, Kernel
+from pyrism.models import I2EM, VolScatt
 
 
 @pytest.mark.webtest
@@ -41,3 +42,52 @@ class TestKernelAngle:
     def test_align_except(self, izaRad, vzaRad, raaRad, izaDeg, vzaDeg, raaDeg):
         with pytest.raises(AssertionError):
             Kernel(array([izaRad, 2, 3]), array([izaRad, 2]), array([izaRad]), angle_unit='RAD', align=False)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("angle_unit, scale", [
+    ('DEG', 1.),
+    ('RAD', radians(1.))
+])
+def test_kernel_geometry(angle_unit, scale):
+    kernel = Kernel(array([-30., 20.]) * scale, array([10., -40.]) * scale, array([50.]) * scale, normalize=True,
+                    nbar=5 * scale, angle_unit=angle_unit)
+
+    assert allclose(kernel.iza, radians([30., 20., 5.]))
+    assert allclose(kernel.vza, radians([10., 40., 0.]))
+    assert allclose(kernel.raa, radians([230., 230., 0.]))
+    assert allclose(kernel.phi, radians([230., 230., 0.]))
+    assert len(kernel.izaDeg) == 3
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("normalize", [False, True])
+class TestGeometry:
+    def test_geometry(self, normalize):
+        geometry = Geometry(array([30., 40.]), array([10., 20.]), array([50.]), normalize=normalize)
+        kernel = Kernel(geometry, None, None, normalize=normalize)
+
+        assert kernel.geometry is geometry
+        assert allclose(kernel.iza, geometry.iza)
+        assert allclose(geometry.cos_iza, cos(geometry.iza))
+        assert allclose(geometry.sin_vza, sin(geometry.vza))
+        assert allclose(geometry.cos_sin_iza(0.01)[1], sin(geometry.iza + 0.01))
+
+    def test_geometry_except(self, normalize):
+        with pytest.raises(ValueError):
+            Kernel(Geometry(30, 10, 50, normalize=normalize), None, None, normalize=not normalize)
+
+    def test_geometry_models(self, normalize):
+        geometry = Geometry(array([30., 40.]), array([10., 20.]), array([50., 0.]), normalize=normalize)
+        kwargs = dict(normalize=normalize, frequency=1.26, diel_constant=10 + 1j, corrlength=10, sigma=0.3)
+
+        assert allclose(I2EM(geometry, None, None, **kwargs).VV,
+                        I2EM(array([30., 40.]), array([10., 20.]), array([50., 0.]), **kwargs).VV)
+
+        volscatt = VolScatt(Geometry(30, 10, 50), None, None)
+        volscatt.coef(a=57, lidf_type='campbell')
+        expected = VolScatt(30, 10, 50)
+        expected.coef(a=57, lidf_type='campbell')
+
+        assert allclose(volscatt.ks, expected.ks)
+        assert allclose(volscatt.Fs, expected.Fs)
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from pyrism import I2EM
+from pyrism.emulate import Emulator, GaussianProcess, PolynomialChaos, I2EMTable
+
+
+def polynomial(params):
+    return np.column_stack([1 + params[:, 0] ** 2 * params[:, 1] - 3 * params[:, 1], params[:, 0] * params[:, 1]])
+
+
+def smooth(params):
+    return np.column_stack([np.sin(3 * params[:, 0]) + np.cos(2 * params[:, 1]), np.exp(-params[:, 0])])
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("bounds", [
+    [[0, 1], [-2, 3]]
+])
+class TestEmulate:
+    def test_polynomial_chaos(self, bounds):
+        emulator = PolynomialChaos(bounds, degree=3).fit(polynomial, 200, seed=0)
+        params = np.array([[0.5, 1.0], [0.2, -1.5]])
+
+        assert np.allclose(emulator(params), polynomial(params))
+        assert emulator.validation.N == 40
+        assert np.all(emulator.validation.rmse < 1e-10)
+
+    def test_gaussian_process(self, bounds):
+        emulator = GaussianProcess(bounds, n_inducing=100, seed=0).fit(smooth, 1000, seed=1)
+
+        assert np.all(emulator.validation.rmse < 1e-2)
+        assert np.all(emulator.validation.r2 > 0.999)
+
+    def test_too_few_samples(self, bounds):
+        with pytest.raises(ValueError):
+            PolynomialChaos(bounds, degree=5).fit(polynomial, 20)
+
+    @pytest.mark.parametrize("emulator", [PolynomialChaos, GaussianProcess])
+    def test_load(self, bounds, emulator, tmpdir):
+        emulator = emulator(bounds, names=['a', 'b']).fit(smooth, 300, seed=0)
+        filename = str(tmpdir.join('emulator.npz'))
+        emulator.save(filename)
+
+        loaded = Emulator.load(filename)
+        params = np.array([[0.5, 1.0], [0.2, -1.5]])
+
+        assert type(loaded) is type(emulator)
+        assert loaded.names == ['a', 'b']
+        assert np.allclose(loaded(params), emulator(params))
+        assert np.allclose(loaded.validation.rmse, emulator.validation.rmse)
+
+
+AXES = (np.linspace(20, 50, 4), [5., 15., 25.], [1., 3.], [0.2, 0.5, 0.8], [3., 6., 9.])
+
+
+@pytest.fixture(scope='module')
+def table():
+    # The slope averaged reflection coefficients of each node are expensive, thus the table is built once
+    return I2EMTable.build(*AXES)
+
+
+@pytest.mark.webtest
+class TestI2EMTable:
+    axes = AXES
+
+    def test_nodes(self):
+        table = I2EMTable.build(*self.axes, dtype=np.float64)
+        model = I2EM(30, 30, 180, frequency=I2EMTable.frequency, diel_constant=15 + 3j, sigma=0.5, corrlength=6.,
+                     monostatic=True)
+
+        assert np.allclose(table.interpolate([[30, 15, 3, 0.5, 6]]), [[model.BSC.VVdB[0], model.BSC.HHdB[0]]])
+
+    def test_frequency(self, table):
+        k = 2 * np.pi * 1.26 / 30
+        result = table([25., 35.], 1.26, 10 + 2j, 0.35 / k, 4.5 / k)
+        model = I2EM(np.array([25., 35.]), 0, 180, frequency=1.26, diel_constant=10 + 2j, sigma=0.35 / k,
+                     corrlength=4.5 / k, monostatic=True)
+
+        assert result.VVdB.shape == (2,)
+        assert np.allclose(np.column_stack([result.VVdB, result.HHdB]),
+                           table.interpolate([[25, 10, 2, 0.35, 4.5], [35, 10, 2, 0.35, 4.5]]))
+        assert np.allclose(result.VVdB, model.BSC.VVdB, atol=2)
+        assert np.allclose(result.HHdB, model.BSC.HHdB, atol=2)
+        assert np.allclose(result.VV, 10 ** (result.VVdB / 10))
+
+    def test_outside(self, table):
+        values = table.interpolate([[10, 15, 2, 0.5, 6], [30, 15, 2, 0.5, np.nan], [50, 25, 3, 0.8, 9]])
+
+        assert np.all(np.isnan(values[:2]))
+        assert np.all(np.isfinite(values[2]))
+
+    def test_accuracy(self, table):
+        refined = I2EMTable.build(*self.axes, accuracy=0.5)
+
+        assert refined.error <= 0.5 < table.error
+        assert refined.values.size > table.values.size
+        assert np.all(refined.validate(20, seed=0).max_error < table.validate(20, seed=0).max_error)
+
+    def test_load(self, tmpdir):
+        filename = str(tmpdir.join('table'))
+        table = I2EMTable.build(*self.axes, filename=filename)
+        loaded = I2EMTable.load(filename)
+        params = [[33, 12, 2.5, 0.4, 5], [45, 20, 1.5, 0.7, 8]]
+
+        assert isinstance(loaded.values, np.memmap)
+        assert loaded.error == table.error
+        assert np.allclose(loaded.interpolate(params), table.interpolate(params))
+
+    def test_axes(self):
+        with pytest.raises(ValueError):
+            I2EMTable([[20.], [5., 15.], [1., 3.], [0.2, 0.5], [3., 6.]], np.zeros((1, 2, 2, 2, 2, 2)))
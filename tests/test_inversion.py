@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from pyrism.inversion import LUT
+
+
+def model(params):
+    return np.column_stack([params[:, 0] + params[:, 1], params[:, 0] * params[:, 1], np.sin(params[:, 1])])
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("truth", [
+    np.array([[0.5, 1.0], [0.2, 0.3], [0.9, 0.1]])
+])
+class TestLUT:
+    def test_invert(self, truth):
+        lut = LUT.generate(model, [[0, 1], [0, 1.5]], 20000, names=['a', 'b'], chunk_size=3000, seed=0)
+        result = lut.invert(model(truth), k=5)
+
+        assert result.names == ['a', 'b']
+        assert np.allclose(result.params, truth, atol=0.02)
+        assert np.all(result.cost < 1e-3)
+
+    def test_exact(self, truth):
+        lut = LUT(truth, model(truth))
+        result = lut.invert(model(truth), k=3)
+
+        assert np.allclose(result.params, truth)
+
+    def test_load(self, truth, tmpdir):
+        lut = LUT.generate(model, [[0, 1], [0, 1.5]], 5000, filename=str(tmpdir.join('lut')), names=['a', 'b'],
+                           chunk_size=1000, seed=0, scale=True)
+        loaded = LUT.load(str(tmpdir.join('lut')), scale=True)
+
+        assert isinstance(loaded.observables, np.memmap)
+        assert loaded.names == ['a', 'b']
+        assert np.allclose(loaded.invert(model(truth)).params, lut.invert(model(truth)).params)
@@ -2,11 +2,11 @@ import os
 from distutils import dir_util
 
 import pytest
-from numpy import allclose, loadtxt, atleast_1d
+from numpy import allclose, loadtxt, atleast_1d, float32
 from pytest import fixture
 from scipy.io import loadmat
 
-from pyrism import PROSPECT, SAIL, LSM
+from pyrism import PROSPECT, SAIL, LSM, LIDF
 
 
 @fixture
@@ -69,6 +69,20 @@ class TestPROSPECT:
 
         assert allclose(trans_mtlab, trans, atol=1.e-4)
 
+    def test_float32_prospect5(self, datadir):
+        fname = datadir("prospect5_spectrum.txt")
+        w, true_refl, true_trans = loadtxt(fname, unpack=True)
+
+        prospect = PROSPECT(N=2.1, Cab=40, Cxc=10., Cbr=0.1, Cw=0.015, Cm=0.009, version="5", dtype=float32)
+
+        assert prospect.ks.dtype == float32 and prospect.int.dtype == float32
+        assert allclose(true_refl, prospect.ks, atol=1e-4)
+        assert allclose(true_trans, prospect.kt, atol=1e-4)
+
+    def test_raise_exception_dtype(self):
+        with pytest.raises(ValueError):
+            PROSPECT(N=2.1, Cab=40, Cxc=10., Cbr=0.1, Cw=0.015, Cm=0.009, dtype=int)
+
     def test_raise_exception_version(self):
         with pytest.raises(ValueError):
             PROSPECT(N=2.1, Cab=40, Cxc=10., Cbr=0.1, Cw=0.015, Cm=0.009, Can=1, version="d")
@@ -120,6 +134,59 @@ class TestPROSAIL:
         assert allclose(dhr, sail.DHR.ref, atol=0.01)
 
 
+    def test_float32_prosail5(self, datadir):
+        fname = datadir("REFL_CAN.txt")
+        w, resv, hdr, sdr, bhr, dhr = loadtxt(fname, unpack=True)
+
+        lsm = LSM(reflectance=1, moisture=1, dtype=float32)
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5", dtype=float32)
+        sail = SAIL(iza=30, vza=10, raa=0, ks=prospect.ks, kt=prospect.kt, lai=3, hotspot=0.01, rho_surface=lsm.ref,
+                    a=-0.35, b=-0.15, lidf_type='verhoef', dtype=float32)
+
+        for reference, ref in ((sdr, sail.BRF.ref), (hdr, sail.HDR.ref), (bhr, sail.BHR.ref), (dhr, sail.DHR.ref)):
+            assert ref.dtype == float32
+            assert allclose(reference, ref, atol=0.01)
+
+    def test_lidf_weights_prosail5(self, datadir):
+        fname = datadir("REFL_CAN.txt")
+        w, resv, hdr, sdr, bhr, dhr = loadtxt(fname, unpack=True)
+
+        lsm = LSM(reflectance=1, moisture=1)
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5")
+        sail = SAIL(iza=30, vza=10, raa=0, ks=prospect.ks, kt=prospect.kt, lai=3, hotspot=0.01, rho_surface=lsm.ref,
+                    lidf_type=LIDF.verhoef(-0.35, -0.15))
+
+        assert allclose(sdr, sail.BRF.ref, atol=0.01)
+
+        for lidf_type, a, b in (('nilson', 45., 0.5), ('beta', 1.101, 1.930)):
+            sail = SAIL(iza=30, vza=10, raa=0, ks=prospect.ks, kt=prospect.kt, lai=3, hotspot=0.01,
+                        rho_surface=lsm.ref, lidf_type=lidf_type, a=a, b=b)
+
+            assert sail.BRF.ref.shape == (2101,)
+            assert (sail.BRF.ref > 0).all()
+
+    def test_hemisphere_prosail5(self, datadir):
+        lsm = LSM(reflectance=1, moisture=1)
+        prospect = PROSPECT(N=1.5, Cab=40, Cxc=8., Cbr=0.0, Cw=0.01, Cm=0.009, version="5")
+        hemisphere = SAIL.hemisphere(30, 6, 8, prospect.ks, prospect.kt, 3, 0.01, lsm.ref, a=-0.35, b=-0.15,
+                                     lidf_type='verhoef')
+
+        assert hemisphere.BRF.shape == (6, 8, 2101)
+        assert allclose(hemisphere.vza, [0, 15, 30, 45, 60, 75])
+        assert allclose(hemisphere.raa, [0, 45, 90, 135, 180, 225, 270, 315])
+
+        for i, j in ((0, 0), (2, 0), (3, 5), (5, 7)):
+            sail = SAIL(iza=30, vza=hemisphere.vza[i], raa=hemisphere.raa[j], ks=prospect.ks, kt=prospect.kt, lai=3,
+                        hotspot=0.01, rho_surface=lsm.ref, a=-0.35, b=-0.15, lidf_type='verhoef')
+
+            assert allclose(hemisphere.BRF[i, j], sail.BRF.ref)
+            assert allclose(hemisphere.BRDF[i, j], sail.BRDF.ref)
+            assert allclose(hemisphere.HDR[i, j], sail.HDR.ref)
+
+        # SAIL is symmetric in the relative azimuth angle
+        assert allclose(hemisphere.BRF[:, 1:], hemisphere.BRF[:, :0:-1])
+
+
 class TestPROSAILError:
     def test_ks(self, datadir):
         fname = datadir("REFL_CAN.txt")
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from pyrism.models import I2EMFunction
+from pyrism.raster import process, tiles
+
+
+class Model(object):
+    def __call__(self, params):
+        return np.column_stack([params[:, 0] + params[:, 1], params[:, 0] * params[:, 1]])
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("shape, tile_size", [
+    ((37, 23), 8),
+    ((10, 50), (3, 64))
+])
+class TestRaster:
+    def test_tiles(self, shape, tile_size):
+        count = np.zeros(shape, dtype=int)
+        for tile in tiles(shape, tile_size):
+            count[tile] += 1
+
+        assert np.all(count == 1)
+
+    def test_process(self, shape, tile_size, tmpdir):
+        rng = np.random.RandomState(0)
+        a, b = rng.random_sample(shape), rng.random_sample(shape)
+        np.save(str(tmpdir.join('a.npy')), a)
+
+        out = process(Model(), [str(tmpdir.join('a.npy')), b], out=str(tmpdir.join('out.npy')), tile_size=tile_size)
+        expected = np.stack([a + b, a * b], axis=-1)
+
+        assert isinstance(out, np.memmap)
+        assert np.allclose(out, expected)
+        assert np.allclose(np.load(str(tmpdir.join('out.npy'))), expected)
+
+    def test_process_mask(self, shape, tile_size):
+        rng = np.random.RandomState(1)
+        a = rng.random_sample(shape)
+        a[:5, :] = np.nan
+        mask = np.ones(shape, dtype=bool)
+        mask[-1, -1] = False
+
+        out = process(Model(), [a, 2.], tile_size=tile_size, mask=mask, processes=2)
+        valid = np.isfinite(a) & mask
+
+        assert np.allclose(out[valid], np.column_stack([a[valid] + 2, a[valid] * 2]))
+        assert np.all(np.isnan(out[~valid]))
+
+    def test_process_except(self, shape, tile_size):
+        with pytest.raises(ValueError):
+            process(Model(), [np.zeros(shape), np.zeros((2, 2))], tile_size=tile_size)
+
+
+@pytest.mark.webtest
+def test_process_i2em_geometry():
+    iza = np.array([[30., 35.], [40., 45.]])
+    func = I2EMFunction(0, 0, 0, names=('iza', 'vza', 'sigma'),
+                        fixed=dict(frequency=1.26, eps_real=10, eps_imag=1, corrlength=10, raa=0))
+
+    out = process(func, [iza, iza, 0.3], tile_size=1)
+    expected = func(np.column_stack([iza.ravel(), iza.ravel(), np.full(4, 0.3)])).reshape(2, 2, -1)
+
+    assert out.shape == (2, 2, 2)
+    assert np.allclose(out, expected)
+    assert not np.allclose(out[0, 0], out[1, 1])
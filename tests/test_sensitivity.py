@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from pyrism.models import I2EMFunction
+from pyrism.sensitivity import Sobol, saltelli, sobol_indices
+
+
+def ishigami(params):
+    return np.sin(params[:, 0]) + 7 * np.sin(params[:, 1]) ** 2 + 0.1 * params[:, 2] ** 4 * np.sin(params[:, 0])
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("S1, ST", [
+    ([0.3139, 0.4424, 0.0], [0.5576, 0.4424, 0.2437])
+])
+class TestSobol:
+    def test_sobol(self, S1, ST):
+        result = Sobol(ishigami, [[-np.pi, np.pi]] * 3).run(20000, chunk_size=2048, seed=1)
+        assert np.allclose(result.S1, S1, atol=0.05)
+        assert np.allclose(result.ST, ST, atol=0.05)
+
+    def test_sobol_indices(self, S1, ST):
+        Y = ishigami(saltelli([[-np.pi, np.pi]] * 3, 20000, seed=2))
+        result = sobol_indices(Y, 3, chunk_size=1000, seed=1)
+        assert np.allclose(result.S1, S1, atol=0.05)
+        assert np.allclose(result.ST, ST, atol=0.05)
+        assert np.all(result.S1_conf > 0)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("S1, ST", [
+    ([[0.1567, 0.1169], [-0.0035, -0.0027], [0.4211, 0.4707]], [[0.1013, 0.0650], [0.0047, 0.0030], [0.7341, 0.7936]])
+])
+class TestSobolI2EM:
+    def test_regression(self, S1, ST):
+        # Sobol indices of the I2EM backscatter (VVdB and HHdB) with respect to eps_real, eps_imag and sigma. The
+        # blocks are evaluated by worker processes and must give the indices of the serial run.
+        func = I2EMFunction(35, None, None, names=('eps_real', 'eps_imag', 'sigma'),
+                            fixed=dict(frequency=5.3, corrlength=10.), output=('VVdB', 'HHdB'), normalize=False,
+                            monostatic=True)
+        sobol = Sobol(func, [[5., 25.], [1., 5.], [0.2, 1.2]])
+        serial = sobol.run(24, chunk_size=8, seed=0)
+        result = sobol.run(24, chunk_size=8, processes=2, seed=0)
+
+        for item in ('S1', 'S1_conf', 'ST', 'ST_conf'):
+            assert np.array_equal(result[item], serial[item])
+
+        assert result.names == ['eps_real', 'eps_imag', 'sigma']
+        assert np.all(np.argmax(result.ST, axis=0) == 2)
+
+        # Secondary check against the indices of an earlier run
+        assert np.allclose(result.S1, S1, atol=1e-3)
+        assert np.allclose(result.ST, ST, atol=1e-3)
+
+
+class TestSaltelli:
+    def test_layout(self):
+        sample = saltelli([[0, 1], [10, 20]], 5, seed=0).reshape(5, 4, 2)
+        assert np.allclose(sample[:, 1, 0], sample[:, 3, 0])
+        assert np.allclose(sample[:, 1, 1], sample[:, 0, 1])
+        assert np.allclose(sample[:, 2, 0], sample[:, 0, 0])
+        assert np.all((sample[..., 1] >= 10) & (sample[..., 1] <= 20))
+
+    def test_length_except(self):
+        with pytest.raises(ValueError):
+            sobol_indices(np.zeros(7), 3)
@@ -24,6 +24,25 @@ class TestLIDF:
         lidf_rom = LIDF.campbell(a, n_elements=18)
         assert np.allclose(lidf_rom, lidf_campbell, atol=1e-4)
 
+    def test_nilson(self, a, b, lidf_verhoef, lidf_campbell):
+        lza = np.linspace(0, 90, 10)
+        lad = LIDF.nilson(lza, mla=10, eccentricity=0.9, distribution='plagiophile')
+
+        true = 0.5 / np.sqrt(1 - 0.9 ** 2 * np.cos((lza - 10) * np.pi / 180) ** 2)
+
+        assert np.allclose(lad, true)
+        assert np.isclose(LIDF.nilson(lza[3], mla=10, eccentricity=0.9, distribution='plagiophile'), lad[3])
+        assert LIDF.nilson(lza, distribution='random') == 1
+
+    @pytest.mark.parametrize("mla", [3, 12, 33, 47, 62, 78, 88])
+    def test_nilson_mode(self, a, b, lidf_verhoef, lidf_campbell, mla):
+        for eccentricity in (0.5, 0.9, None, 0):
+            lidf = LIDF.weights('nilson', mla, eccentricity)
+
+            # The maximum lies in the 5° bin of the modal leaf angle, also for b = 0 (the default of SAIL)
+            assert np.argmax(lidf) == mla // 5
+            assert lidf.max() / lidf.min() > 1.05
+
 
 @pytest.mark.webtest
 @pytest.mark.parametrize("iza, vza, raa, a, b, ks, ko, bf, Fs, Ft", [
@@ -50,3 +69,59 @@ class TestVolScatVerhoef:
         res = (vol.ks[0], vol.ko[0], vol.bf, vol.Fs[0], vol.Ft[0])
         true = (ks, ko, bf, Fs, Ft)
         assert np.allclose(res, true, atol=1e-4)
+
+
+@pytest.mark.webtest
+@pytest.mark.parametrize("iza, vza, raa", [
+    (50, 30, 50),
+    (0, 45, 180)
+])
+class TestVolScatWeights:
+    def test_weights(self, iza, vza, raa):
+        vol = VolScatt(iza, vza, raa)
+        vol.coef(lidf_type='campbell', a=57)
+
+        weights = VolScatt(iza, vza, raa)
+        weights.coef(lidf_type=2 * LIDF.campbell(57))
+
+        for name in ('ks', 'ko', 'bf', 'Fs', 'Ft'):
+            assert np.allclose(getattr(weights, name), getattr(vol, name))
+
+    def test_measured(self, iza, vza, raa):
+        lidf = LIDF.beta(1.101, 1.930, n_elements=90)
+        vol = VolScatt(iza, vza, raa)
+        vol.coef(lidf_type=lidf)
+
+        ks = ko = Fs = 0.
+        for weight, lza in zip(lidf, np.arange(90) + 0.5):
+            chi_s, chi_o, frho, ftau = vol.volume(lza)
+            ks += weight * chi_s / vol.geometry.cos_iza
+            ko += weight * chi_o / vol.geometry.cos_vza
+            Fs += weight * frho * np.pi / (vol.geometry.cos_iza * vol.geometry.cos_vza)
+
+        assert np.allclose(vol.ks, ks)
+        assert np.allclose(vol.ko, ko)
+        assert np.allclose(vol.Fs, Fs)
+
+    def test_registered(self, iza, vza, raa):
+        LIDF.register('test', lambda a, b, n_elements: np.ones(n_elements))
+
+        vol = VolScatt(iza, vza, raa)
+        vol.coef(lidf_type='test')
+        uniform = VolScatt(iza, vza, raa)
+        uniform.coef(lidf_type='beta', a=1, b=1)
+
+        assert np.allclose(vol.ks, uniform.ks)
+        assert np.allclose(LIDF.weights('nilson', 45, 0.5).sum(), 1)
+
+        del LIDF.distributions['test']
+
+    def test_errors(self, iza, vza, raa):
+        vol = VolScatt(iza, vza, raa)
+
+        with pytest.raises(AttributeError):
+            vol.coef(lidf_type='unknown')
+        with pytest.raises(ValueError):
+            vol.coef(lidf_type='beta', a=1)
+        with pytest.raises(ValueError):
+            vol.coef(lidf_type=[0.5, -0.5])